@@ -4,6 +4,8 @@ import io
 import shutil
 import zipfile
 import fileinput
+import random
+import time
 
 import requests
 import click
@@ -114,5 +116,215 @@ def bundle_webui():
         raise click.Abort()
 
 
+@cli.command()
+@click.option('--series', default=500, help='Number of configured series.')
+@click.option('--entries', default=2000, help='Number of entry titles.')
+def bench_series_matcher(series, entries):
+    """Compares first letter routing with SeriesMatcher routing of titles to series"""
+    from flexget.plugins.filter.series import SeriesMatcher
+    from flexget.plugins.parsers.parser_internal import ParserInternal
+
+    rand = random.Random(0)
+    words = ['the', 'show', 'game', 'house', 'night', 'star', 'city', 'life', 'blue', 'last', 'man', 'world',
+             'dark', 'king', 'family', 'doctor', 'law', 'and', 'order', 'new', 'girl', 'big', 'bang', 'theory']
+    names = set()
+    while len(names) < series:
+        names.add(' '.join(rand.choice(words).capitalize() for _ in range(rand.randint(1, 4))) + ' %d' % len(names))
+    config = [{name: {}} for name in sorted(names)]
+    titles = []
+    for _ in range(entries):
+        name = rand.choice(sorted(names)) if rand.random() < 0.5 else 'Unknown %d' % rand.randint(0, 10000)
+        titles.append('%s.S%02dE%02d.720p.HDTV.x264-GRP' % (name.replace(' ', '.'), rand.randint(1, 9),
+                                                           rand.randint(1, 20)))
+    parser = ParserInternal()
+
+    def run(route):
+        start = time.time()
+        pairs = 0
+        matches = set()
+        for index, title in route():
+            pairs += 1
+            name = list(config[index])[0]
+            if parser.parse_series(title, name=name).valid:
+                matches.add((index, title))
+        return time.time() - start, pairs, matches
+
+    def first_letter():
+        by_letter = {}
+        for title in titles:
+            parsed = parser.parse_series(title)
+            letters = [parsed.name[:1].lower()] if parsed.name else \
+                [word[:1].lower() for word in title.replace(' ', '.').split('.')]
+            for letter in set(letters):
+                by_letter.setdefault(letter, []).append(title)
+        for index, item in enumerate(config):
+            for title in by_letter.get(list(item)[0][:1].lower(), []):
+                yield index, title
+
+    def matcher():
+        series_matcher = SeriesMatcher(config)
+        for title in titles:
+            for index in series_matcher.candidates(title):
+                yield index, title
+
+    old_time, old_pairs, old_matches = run(first_letter)
+    new_time, new_pairs, new_matches = run(matcher)
+    click.echo('first letter: %.2fs, %d parses' % (old_time, old_pairs))
+    click.echo('matcher:      %.2fs, %d parses' % (new_time, new_pairs))
+    if old_matches != new_matches:
+        raise click.ClickException('Routing results differ')
+
+
+@cli.command()
+@click.option('--runs', default=5, help='Number of startups to time for each mode.')
+def bench_startup(runs):
+    """Compares loading all plugins with loading them from the plugin manifest"""
+    import subprocess
+    import sys
+    import tempfile
+
+    script = ('import sys, time\n'
+              'start = time.time()\n'
+              'from flexget import logger, plugin\n'
+              'logger.initialize(True)\n'
+              'plugin.load_plugins(manifest=sys.argv[1] or None)\n'
+              'print(time.time() - start)\n')
+    tmp_dir = tempfile.mkdtemp()
+    manifest = os.path.join(tmp_dir, 'plugin_manifest.json')
+
+    def startup(path):
+        output = subprocess.check_output([sys.executable, '-c', script, path])
+        return float(output.decode('utf-8').strip().splitlines()[-1])
+
+    try:
+        # Build the manifest once, it is reused by following startups
+        click.echo('build manifest: %.3fs' % startup(manifest))
+        full = min(startup('') for _ in range(runs))
+        lazy = min(startup(manifest) for _ in range(runs))
+    finally:
+        shutil.rmtree(tmp_dir)
+    click.echo('all plugins: %.3fs' % full)
+    click.echo('manifest: %.3fs (%.1fx)' % (lazy, full / lazy))
+
+
+@cli.command()
+@click.option('--entries', default=100000, help='Number of entries to create.')
+def bench_entries(entries):
+    """Measures memory and time used by creating and accepting entries"""
+    import gc
+    import tracemalloc
+    from flexget import logger
+    from flexget.entry import Entry
+
+    logger.initialize(True)
+    # Field names are built at runtime, like ones from parsed feeds
+    fields = [''.join(name) for name in (['des', 'cription'], ['torrent_', 'seeds'], ['content_', 'size'])]
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    items = []
+    for i in range(entries):
+        entry = Entry(title='Some.Show.S01E%02d.720p.HDTV.x264-GRP %d' % (i % 99, i),
+                      url='http://example.com/%d' % i)
+        entry[fields[0]] = 'Description'
+        entry[fields[1]] = i
+        entry[fields[2]] = 1024
+        if i % 2:
+            entry.accept('accepted by benchmark')
+        items.append(entry)
+    took = time.time() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    click.echo('%s entries: %.3fs, %.1f MB (%d bytes per entry), peak %.1f MB' % (
+        entries, took, current / 1e6, current / entries, peak / 1e6))
+
+
+@cli.command()
+@click.option('--patterns', default=2000, help='Number of regexps.')
+@click.option('--titles', default=5000, help='Number of titles to search.')
+def bench_regexp(patterns, titles):
+    """Compares searching many regexps one by one with RegexpMatcher"""
+    import random
+    import re
+    from flexget.utils.tools import RegexpMatcher
+
+    rnd = random.Random(0)
+    words = [''.join(rnd.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rnd.randint(3, 9))) for _ in range(3000)]
+    regexps = [re.compile(r'%s.*%s[ ._]s\d+' % (rnd.choice(words), rnd.choice(words)), re.IGNORECASE | re.UNICODE)
+               for _ in range(patterns)]
+    values = ['.'.join(rnd.choice(words) for _ in range(5)) + '.S01E01.720p' for _ in range(titles)]
+    start = time.time()
+    expected = [[i for i, regexp in enumerate(regexps) if regexp.search(value)] for value in values]
+    separate = time.time() - start
+    start = time.time()
+    matcher = RegexpMatcher(regexps)
+    found = [matcher.matching([value]) for value in values]
+    combined = time.time() - start
+    assert found == expected
+    click.echo('separate: %.3fs' % separate)
+    click.echo('matcher: %.3fs (%.1fx)' % (combined, separate / combined))
+
+
+@cli.command()
+@click.option('--titles', default=20000, help='Number of titles to parse.')
+def bench_qualities(titles):
+    """Measures quality parsing of distinct and repeated titles"""
+    import random
+    from flexget.utils import qualities
+
+    rnd = random.Random(0)
+    values = ['Some.Show.S%02dE%02d.%s.%s.%s-GRP%d' % (
+        rnd.randint(1, 9), rnd.randint(1, 30), rnd.choice(['720p', '1080p', '2160p', '']),
+        rnd.choice(['HDTV', 'WEB-DL', 'BluRay', 'WEBRip']), rnd.choice(['x264', 'HEVC', 'h.264 AAC2.0', 'DD5.1 x264']),
+        i) for i in range(titles)]
+    qualities._parse_cache.clear()
+    start = time.time()
+    for value in values:
+        qualities.Quality(value)
+    click.echo('distinct: %.3fs' % (time.time() - start))
+    # Like the same feed items being seen across tasks and runs
+    repeated = values[:titles // 20] * 20
+    start = time.time()
+    for value in repeated:
+        qualities.Quality(value)
+    click.echo('repeated: %.3fs for %s titles' % (time.time() - start, len(repeated)))
+
+
+@cli.command()
+@click.option('--entries', default=10000, help='Number of entries to render.')
+def bench_templates(entries):
+    """Measures the set and if plugins with templates compiled for every entry and cached"""
+    from collections import namedtuple
+    from flexget import logger
+    from flexget.entry import Entry
+    from flexget.plugins.filter.if_condition import FilterIf
+    from flexget.plugins.modify.set_field import ModifySet
+    from flexget.utils import template
+
+    logger.initialize(True)
+    template.make_environment(namedtuple('FakeManager', 'config_base')(os.getcwd()))
+    set_config = {'path': '/media/{{ series_name|default("unknown") }}/Season {{ series_season }}',
+                  'label': '{{ title|lower|replace(".", " ") }}'}
+    conditions = ['series_season > 1 and "720p" in title', 'has_field("imdb_id") or content_size < 1000']
+    modify_set, filter_if = ModifySet(), FilterIf()
+
+    def run(cached):
+        items = [Entry(title='Some.Show.S%02dE%02d.720p.HDTV.x264-GRP' % (i % 9 + 1, i % 30), url='http://a/%d' % i,
+                       series_name='Some Show', series_season=i % 9 + 1, content_size=i) for i in range(entries)]
+        start = time.time()
+        for entry in items:
+            if not cached:
+                template._template_cache.clear()
+                template._expression_cache.clear()
+            modify_set.modify(entry, set_config)
+            entry['path'], entry['label']
+            for condition in conditions:
+                filter_if.check_condition(condition, entry)
+        return time.time() - start
+
+    click.echo('compiled for every entry: %.3fs' % run(False))
+    click.echo('cached: %.3fs' % run(True))
+
+
 if __name__ == '__main__':
     cli()
@@ -16,6 +16,7 @@ import binascii
 import cherrypy
 import yaml
 from flask import Response, jsonify, request
+from flexget.utils import metrics
 from flexget.utils.tools import get_latest_flexget_version_number
 from pyparsing import (
     Word, Keyword, Group, Forward, Suppress, OneOrMore, oneOf, White, restOfLine, ParseException, Combine
@@ -245,6 +246,14 @@ class ServerVersionAPI(APIResource):
                         'latest_version': latest})
 
 
+@server_api.route('/metrics/')
+class ServerMetricsAPI(APIResource):
+    @api.response(200, description='Plugin metrics in prometheus text format')
+    def get(self, session=None):
+        """ Wall and CPU time, database queries, entries and HTTP traffic of plugins, per task and phase """
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @server_api.route('/dump_threads/', doc=False)
 class ServerDumpThreads(APIResource):
     @api.response(200, description='Flexget threads dump', model=dump_threads_schema)
@@ -310,7 +310,7 @@ def _task_info_dict(task):
         'id': int(task.id),
         'name': task.name,
         'current_phase': task.current_phase,
-        'current_plugin': task.current_plugin,
+        'current_plugin': task.reported_plugin,
     }
 
 
@@ -319,10 +319,9 @@ class TaskQueueAPI(APIResource):
     @api.response(200, model=task_api_queue_schema)
     def get(self, session=None):
         """ List task(s) in queue for execution """
-        tasks = [_task_info_dict(task) for task in self.manager.task_queue.run_queue.queue]
-
-        if self.manager.task_queue.current_task:
-            tasks.insert(0, _task_info_dict(self.manager.task_queue.current_task))
+        task_queue = self.manager.task_queue
+        queued = task_queue.running_tasks + task_queue.waiting_tasks + sorted(task_queue.run_queue.queue)
+        tasks = [_task_info_dict(task) for task in queued]
 
         return jsonify(tasks)
 
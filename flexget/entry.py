@@ -5,13 +5,18 @@ from future.utils import PY2, native_str, text_type
 import copy
 import functools
 import logging
+import sys
+from collections import Mapping
 
+from flexget.logger import TRACE
 from flexget.plugin import PluginError
 from flexget.utils.lazy_dict import LazyDict, LazyLookup
 from flexget.utils.template import render_from_entry, FlexGetTemplate
 
 log = logging.getLogger('entry')
 
+ENTRY_ACTIONS = ('accept', 'reject', 'fail', 'complete')
+
 
 class EntryUnicodeError(Exception):
     """This exception is thrown when trying to set non-unicode compatible field value to entry."""
@@ -36,14 +41,18 @@ class Entry(LazyDict):
     and raises :class:`EntryUnicodeError` if conversion fails on any value
     being set. Such failures are caught by :class:`~flexget.task.Task`
     and trigger :meth:`~flexget.task.Task.abort`.
+
+    Traces, snapshots and hooks are only allocated once an entry has any.
     """
 
+    __slots__ = ('_traces', '_snapshots', '_state', '_hooks', 'task')
+
     def __init__(self, *args, **kwargs):
         super(Entry, self).__init__()
-        self.traces = []
-        self.snapshots = {}
+        self._traces = None
+        self._snapshots = None
         self._state = 'undecided'
-        self._hooks = {'accept': [], 'reject': [], 'fail': [], 'complete': []}
+        self._hooks = None
         self.task = None
 
         if len(args) == 2:
@@ -54,6 +63,28 @@ class Entry(LazyDict):
         # Make sure constructor does not escape our __setitem__ enforcement
         self.update(*args, **kwargs)
 
+    @property
+    def traces(self):
+        if self._traces is None:
+            self._traces = []
+        return self._traces
+
+    @property
+    def snapshots(self):
+        if self._snapshots is None:
+            self._snapshots = {}
+        return self._snapshots
+
+    def __getstate__(self):
+        # Slots are not pickled with the older pickle protocols otherwise
+        state = dict((name, getattr(self, name)) for name in Entry.__slots__)
+        state['store'] = self.store
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
     def trace(self, message, operation=None, plugin=None):
         """
         Adds trace message to the entry which should contain useful information about why
@@ -76,7 +107,11 @@ class Entry(LazyDict):
         :param action: Name of action to run hooks for
         :param kwargs: Keyword arguments that should be passed to the registered functions
         """
-        for func in self._hooks[action]:
+        if action not in ENTRY_ACTIONS:
+            raise ValueError('`%s` is not a valid entry action' % action)
+        if not self._hooks:
+            return
+        for func in self._hooks.get(action, []):
             func(self, **kwargs)
 
     def add_hook(self, action, func, **kwargs):
@@ -88,10 +123,11 @@ class Entry(LazyDict):
         :param kwargs: Keyword arguments that should be passed to ``func``
         :raises: ValueError when given an invalid ``action``
         """
-        try:
-            self._hooks[action].append(functools.partial(func, **kwargs))
-        except KeyError:
+        if action not in ENTRY_ACTIONS:
             raise ValueError('`%s` is not a valid entry action' % action)
+        if self._hooks is None:
+            self._hooks = {}
+        self._hooks.setdefault(action, []).append(functools.partial(func, **kwargs))
 
     def on_accept(self, func, **kwargs):
         """
@@ -211,13 +247,26 @@ class Entry(LazyDict):
             if not isinstance(value, (str, LazyLookup)):
                 raise PluginError('Tried to set title to %r' % value)
 
-        try:
-            log.trace('ENTRY SET: %s = %r' % (key, value))
-        except Exception as e:
-            log.debug('trying to debug key `%s` value threw exception: %s' % (key, e))
-
+        if log.isEnabledFor(TRACE):
+            try:
+                log.trace('ENTRY SET: %s = %r' % (key, value))
+            except Exception as e:
+                log.debug('trying to debug key `%s` value threw exception: %s' % (key, e))
+
+        if self._snapshots:
+            for snapshot in self._snapshots.values():
+                snapshot.field_changing(key)
+        if not PY2 and type(key) is str:  # pylint: disable=unidiomatic-typecheck
+            # Share field names between entries, python 2 cannot intern unicode strings
+            key = sys.intern(key)
         super(Entry, self).__setitem__(key, value)
 
+    def __delitem__(self, key):
+        if self._snapshots:
+            for snapshot in self._snapshots.values():
+                snapshot.field_changing(key)
+        super(Entry, self).__delitem__(key)
+
     def safe_str(self):
         return '%s | %s' % (self['title'], self['url'])
 
@@ -243,17 +292,32 @@ class Entry(LazyDict):
         Takes a snapshot of the entry under *name*. Snapshots can be accessed via :attr:`.snapshots`.
         :param string name: Snapshot name
         """
-        snapshot = {}
-        for field, value in self.items():
-            try:
-                snapshot[field] = copy.deepcopy(value)
-            except TypeError:
-                log.warning('Unable to take `%s` snapshot for field `%s` in `%s`' % (name, field, self['title']))
+        snapshot = EntrySnapshot(self, name)
         if snapshot:
             if name in self.snapshots:
                 log.warning('Snapshot `%s` is being overwritten for `%s`' % (name, self['title']))
             self.snapshots[name] = snapshot
 
+    def restore_snapshot(self, name):
+        """
+        Reverts all fields of the entry to the state of snapshot *name*.
+        :param string name: Snapshot name
+        """
+        snapshot = self.snapshots[name]
+        for key in snapshot.changed_fields():
+            if key in snapshot:
+                self[key] = copy.deepcopy(snapshot[key])
+            else:
+                del self[key]
+        self.snapshots[name] = EntrySnapshot(self, name)
+
+    def lazy_peers(self):
+        """Entries of the same task which are still undecided or accepted, batched lazy lookups include them."""
+        if self.task is None:
+            return []
+        return [entry for entry in self.task.all_entries
+                if entry is not self and entry._state in ('undecided', 'accepted')]
+
     def update_using_map(self, field_map, source_item, ignore_none=False):
         """
         Populates entry fields from a source object using a dictionary that maps from entry field names to
@@ -301,3 +365,123 @@ class Entry(LazyDict):
 
     def __repr__(self):
         return '<Entry(title=%s,state=%s)>' % (self['title'], self._state)
+
+
+class EntrySnapshot(Mapping):
+    """
+    Read only view of the fields an :class:`Entry` had when the snapshot was taken.
+
+    Values are shared with the entry until a field is changed or removed, only then the previous value is kept in the
+    snapshot. Lazy fields are not evaluated by taking a snapshot, they are evaluated on the entry when accessed.
+    """
+
+    __slots__ = ('entry', '_values', '_added', '_hooks')
+
+    def __init__(self, entry, name=None):
+        self.entry = entry
+        # Values of fields as they were on snapshot, for fields changed since and mutable fields
+        self._values = None
+        # Fields which were not in the entry on snapshot
+        self._added = None
+        # Hooks the entry had on snapshot, for copy_entry
+        self._hooks = None
+        if entry._hooks:
+            self._hooks = dict((action, list(funcs)) for action, funcs in entry._hooks.items())
+        for key, value in entry.store.items():
+            # Containers can be changed in place, keep them as they are now
+            if isinstance(value, (list, dict, set)):
+                try:
+                    self._save(key, copy.deepcopy(value))
+                except TypeError:
+                    log.warning('Unable to take `%s` snapshot for field `%s` in `%s`' % (name, key, entry.get('title')))
+                    self._add(key)
+
+    def __getstate__(self):
+        return dict((name, getattr(self, name)) for name in EntrySnapshot.__slots__)
+
+    def __setstate__(self, state):
+        # Snapshots pickled before hooks were kept
+        self._hooks = None
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def _save(self, key, value):
+        if self._values is None:
+            self._values = {}
+        self._values[key] = value
+
+    def _add(self, key):
+        if self._added is None:
+            self._added = set()
+        self._added.add(key)
+
+    def _known(self, key):
+        return (self._values is not None and key in self._values) or (self._added is not None and key in self._added)
+
+    def field_changing(self, key):
+        """Called by the entry before field `key` is set or removed."""
+        if self._known(key):
+            return
+        store = self.entry.store
+        if key not in store:
+            self._add(key)
+        elif not isinstance(store[key], LazyLookup):
+            # Evaluating a lazy field does not change it, the snapshot will show the evaluated value
+            self._save(key, store[key])
+
+    def changed_fields(self):
+        """
+        :return: Names of the fields which have been added, removed or given another value since the snapshot.
+        :rtype: set
+        """
+        store = self.entry.store
+        changed = set(key for key in self._added or () if key in store)
+        if self._values:
+            changed.update(key for key, value in self._values.items() if key not in store or store[key] != value)
+        return changed
+
+    def copy_entry(self):
+        """
+        Creates a new :class:`Entry` with the fields and hooks the entry had when the snapshot was taken.
+
+        Fields which were not looked up yet stay lazy on the new entry.
+        """
+        entry = Entry()
+        lookup = None
+        for key in self:
+            if self._values is not None and key in self._values:
+                value = self._values[key]
+            else:
+                value = self.entry.store[key]
+            if isinstance(value, LazyLookup):
+                if lookup is None:
+                    lookup = value.copy(entry)
+                value = lookup
+            elif isinstance(value, (list, dict, set)):
+                value = copy.deepcopy(value)
+            entry.store[key] = value
+        if self._hooks:
+            entry._hooks = dict((action, list(funcs)) for action, funcs in self._hooks.items())
+        return entry
+
+    def __getitem__(self, key):
+        if self._values is not None and key in self._values:
+            return self._values[key]
+        if (self._added is not None and key in self._added) or key not in self.entry.store:
+            raise KeyError(key)
+        return self.entry[key]
+
+    def __iter__(self):
+        store = self.entry.store
+        for key in store:
+            if self._added is None or key not in self._added:
+                yield key
+        for key in self._values or ():
+            if key not in store:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return '<EntrySnapshot(title=%s)>' % self.get('title')
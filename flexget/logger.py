@@ -103,6 +103,27 @@ def get_capture_loglevel():
     return getattr(local_context, 'loglevel', None)
 
 
+def get_local_context():
+    """Returns the logging context (task, session and redirected output) of the current thread."""
+    context = dict((key, getattr(local_context, key, None)) for key in ('session_id', 'output', 'loglevel'))
+    context['task'] = getattr(local_context, 'task', '')
+    return context
+
+
+@contextlib.contextmanager
+def use_local_context(context):
+    """
+    Context manager which applies a logging context obtained with :func:`get_local_context` to the current thread.
+    Used to keep task information and captured output for work done on behalf of a task in another thread.
+    """
+    old_context = get_local_context()
+    local_context.__dict__.update(context)
+    try:
+        yield
+    finally:
+        local_context.__dict__.update(old_context)
+
+
 class RollingBuffer(collections.deque):
     """File-like that keeps a certain number of lines of text in memory."""
 
@@ -186,7 +186,8 @@ class Manager(object):
         if self.initialized:
             raise RuntimeError('Cannot call initialize on an already initialized manager.')
 
-        plugin.load_plugins(extra_dirs=[os.path.join(self.config_base, 'plugins')])
+        manifest = None if self.unit_test else os.path.join(self.config_base, 'plugin_manifest.json')
+        plugin.load_plugins(extra_dirs=[os.path.join(self.config_base, 'plugins')], manifest=manifest)
 
         # Reparse CLI options now that plugins are loaded
         if not self.args:
@@ -228,6 +229,11 @@ class Manager(object):
     def has_lock(self):
         return self._has_lock
 
+    @property
+    def threadsafe_database(self):
+        """False if the database is in memory, every thread would see a database of its own."""
+        return ':memory:' not in (self.database_uri or '')
+
     def execute(self, options=None, output=None, loglevel=None, priority=1, suppress_warnings=None):
         """
         Run all (can be limited with options) tasks from the config.
@@ -376,7 +382,7 @@ class Manager(object):
             if not self.task_queue.is_alive():
                 log.error('Task queue has died unexpectedly. Restarting it. Please open an issue on Github and include'
                           ' any previous error logs.')
-                self.task_queue = TaskQueue()
+                self.task_queue = TaskQueue(self.config.get('task_queue'))
                 self.task_queue.start()
             if len(self.task_queue):
                 log.verbose('There is a task already running, execution queued.')
@@ -3,12 +3,16 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.urllib.error import HTTPError, URLError
 from future.utils import python_2_unicode_compatible
 
+import json
 import logging
 import os
 import re
+import sys
+import threading
 import time
 import warnings
 import pkg_resources
+from contextlib import contextmanager
 from functools import total_ordering
 from http.client import BadStatusLine
 
@@ -17,8 +21,9 @@ from requests import RequestException
 
 from flexget import plugins as plugins_pkg
 from flexget import config_schema
+from flexget._version import __version__
 from flexget.event import add_event_handler as add_phase_handler
-from flexget.event import fire_event, remove_event_handlers
+from flexget.event import Event, fire_event, get_events, remove_event_handlers
 
 log = logging.getLogger('plugin')
 
@@ -267,7 +272,7 @@ class PluginInfo(dict):
         self.plugin_class = plugin_class
         self.instance = None
 
-        if self.name in plugins:
+        if self.name in plugins and not isinstance(plugins[self.name], LazyPluginInfo):
             PluginInfo.dupe_counter += 1
             log.critical('Error while registering plugin %s. '
                          'A plugin with the same name is already registered', self.name)
@@ -347,6 +352,69 @@ class PluginInfo(dict):
     __repr__ = __str__
 
 
+class LazyPluginInfo(PluginInfo):
+    """
+    Stands in for a plugin listed in the plugin manifest until the module providing it is imported.
+
+    Name, interfaces, schema and phase handler priorities are known from the manifest. The module is imported
+    when the plugin instance, class or one of the phase handlers is first used, after which this object
+    mirrors the real :class:`PluginInfo`.
+    """
+
+    def __init__(self, module, name, api_ver, interfaces, debug, category, schema, phases):
+        dict.__init__(self)
+        self.module = module
+        self.api_ver = api_ver
+        self.name = name
+        self.interfaces = interfaces
+        self.builtin = False
+        self.debug = debug
+        self.category = category
+        self.schema = schema
+        if schema is not None:
+            config_schema.register_schema('/schema/plugin/%s' % name, schema)
+        self.phase_handlers = dict((phase, self._lazy_handler(phase, handler_prio))
+                                   for phase, handler_prio in phases.items() if phase in phase_methods)
+        plugins[name] = self
+
+    def _lazy_handler(self, phase, handler_prio):
+        def lazy_handler(*args, **kwargs):
+            return self.load().phase_handlers[phase](*args, **kwargs)
+
+        event = Event('plugin.%s.%s' % (self.name, phase), lazy_handler, handler_prio)
+        event.plugin = self
+        return event
+
+    def initialize(self):
+        # Initialized when loaded
+        pass
+
+    def load(self):
+        """
+        Import the module providing this plugin.
+
+        :return: The real :class:`PluginInfo` of the plugin.
+        :raises DependencyError: If the module did not register the plugin.
+        """
+        _load_lazy_module(self.module)
+        plugin = plugins.get(self.name)
+        if plugin is None or isinstance(plugin, LazyPluginInfo):
+            raise DependencyError(issued_by=self.name, missing=self.module,
+                                  message='Plugin `%s` could not be loaded from `%s`' % (self.name, self.module))
+        self.update(plugin)
+        return plugin
+
+    def __getattr__(self, attr):
+        if attr in ('instance', 'plugin_class') and attr not in self:
+            self.load()
+        return super(LazyPluginInfo, self).__getattr__(attr)
+
+    def __str__(self):
+        return '<LazyPluginInfo(name=%s)>' % self.name
+
+    __repr__ = __str__
+
+
 register = PluginInfo
 
 
@@ -376,15 +444,39 @@ def _check_phase_queue():
                       'point (before, after). Plugin is not working properly.', args[0], phase)
 
 
-def _load_plugins_from_dirs(dirs):
+def _import_plugin_module(module_name, source=None):
     """
-    :param list dirs: Directories from where plugins are loaded from
+    Import a plugin module, logging the failure when it cannot be imported.
+
+    :return: True if the module was imported.
     """
+    try:
+        __import__(module_name)
+    except DependencyError as e:
+        if e.has_message():
+            msg = e.message
+        else:
+            msg = 'Plugin `%s` requires `%s` to load.', e.issued_by or module_name, e.missing or 'N/A'
+        if not e.silent:
+            log.warning(msg)
+        else:
+            log.debug(msg)
+    except ImportError:
+        log.critical('Plugin `%s` failed to import dependencies', module_name, exc_info=True)
+    except ValueError as e:
+        # Debugging #2755
+        log.error('ValueError attempting to import `%s` (from %s): %s', module_name, source, e)
+    except Exception:
+        log.critical('Exception while loading plugin %s', module_name, exc_info=True)
+        raise
+    else:
+        log.trace('Loaded module %s from %s', module_name, source)
+        return True
+    return False
 
-    log.debug('Trying to load plugins from: %s', dirs)
-    dirs = [Path(d) for d in dirs if os.path.isdir(d)]
-    # add all dirs to plugins_pkg load path so that imports work properly from any of the plugin dirs
-    plugins_pkg.__path__ = list(map(_strip_trailing_sep, dirs))
+
+def _iter_plugin_modules(dirs):
+    """Yields (module name, path) for every plugin module in `dirs`."""
     for plugins_dir in dirs:
         for plugin_path in plugins_dir.walkfiles('*.py'):
             if plugin_path.name == '__init__.py':
@@ -392,35 +484,42 @@ def _load_plugins_from_dirs(dirs):
             # Split the relative path from the plugins dir to current file's parent dir to find subpackage names
             plugin_subpackages = [_f for _f in plugin_path.relpath(plugins_dir).parent.splitall() if _f]
             module_name = '.'.join([plugins_pkg.__name__] + plugin_subpackages + [plugin_path.namebase])
-            try:
-                __import__(module_name)
-            except DependencyError as e:
-                if e.has_message():
-                    msg = e.message
-                else:
-                    msg = 'Plugin `%s` requires `%s` to load.', e.issued_by or module_name, e.missing or 'N/A'
-                if not e.silent:
-                    log.warning(msg)
-                else:
-                    log.debug(msg)
-            except ImportError:
-                log.critical('Plugin `%s` failed to import dependencies', module_name, exc_info=True)
-            except ValueError as e:
-                # Debugging #2755
-                log.error('ValueError attempting to import `%s` (from %s): %s', module_name, plugin_path, e)
-            except Exception:
-                log.critical('Exception while loading plugin %s', module_name, exc_info=True)
-                raise
-            else:
-                log.trace('Loaded module %s from %s', module_name, plugin_path)
+            yield module_name, plugin_path
+
+
+def _set_plugin_dirs(dirs):
+    dirs = [Path(d) for d in dirs if os.path.isdir(d)]
+    # add all dirs to plugins_pkg load path so that imports work properly from any of the plugin dirs
+    plugins_pkg.__path__ = list(map(_strip_trailing_sep, dirs))
+    return dirs
+
+
+def _load_plugins_from_dirs(dirs, builder=None):
+    """
+    :param list dirs: Directories from where plugins are loaded from
+    :param builder: Optional :class:`ManifestBuilder` recording the imports
+    """
+
+    log.debug('Trying to load plugins from: %s', dirs)
+    for module_name, plugin_path in _iter_plugin_modules(_set_plugin_dirs(dirs)):
+        if builder is not None:
+            builder.import_module(module_name, plugin_path)
+        else:
+            _import_plugin_module(module_name, plugin_path)
     _check_phase_queue()
 
 
-def _load_plugins_from_packages():
+def _load_plugins_from_packages(builder=None):
     """Load plugins installed via PIP"""
     for entrypoint in pkg_resources.iter_entry_points('FlexGet.plugins'):
+        if builder is not None and entrypoint.module_name in sys.modules:
+            continue
         try:
-            plugin_module = entrypoint.load()
+            if builder is not None:
+                with builder.track(entrypoint.module_name):
+                    plugin_module = entrypoint.load()
+            else:
+                plugin_module = entrypoint.load()
         except DependencyError as e:
             if e.has_message():
                 msg = e.message
@@ -437,13 +536,215 @@ def _load_plugins_from_packages():
             raise
         else:
             log.trace('Loaded packaged module %s from %s', entrypoint.module_name, plugin_module.__file__)
+        finally:
+            if builder is not None:
+                builder.add_module(entrypoint.module_name, entrypoint.module_name in sys.modules)
+    _check_phase_queue()
+
+
+# Guards importing plugin modules on demand, tasks may run in parallel
+_lazy_lock = threading.RLock()
+_lazy_loaded = set()
+
+MANIFEST_VERSION = 1
+
+
+def _side_effects():
+    """
+    Snapshot of the global registries a plugin module may alter besides registering plugins.
+    Modules which alter any of them are always imported at startup.
+    """
+    from flexget import db_schema
+    from flexget.event import _events
+    from flexget.manager import Base
+
+    handlers = set((name, e.func) for name, events in _events.items() if not name.startswith('plugin.')
+                   for e in events)
+    schemas = set(path for path in config_schema.schema_paths if not path.startswith('/schema/plugin/'))
+    return (handlers, set(Base.metadata.tables), set(db_schema.plugin_schemas), tuple(task_phases),
+            set(_new_phase_queue), schemas)
+
+
+def _manifest_key(dirs):
+    """Everything the manifest depends on. It is rebuilt when any of the plugin sources change."""
+    sources = {}
+    for _, plugin_path in _iter_plugin_modules(dirs):
+        sources[plugin_path] = plugin_path.getmtime()
+    for entrypoint in pkg_resources.iter_entry_points('FlexGet.plugins'):
+        sources[str(entrypoint)] = entrypoint.dist.version if entrypoint.dist else None
+    return {'version': MANIFEST_VERSION, 'flexget': __version__, 'python': sys.version, 'sources': sources}
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+class ManifestBuilder(object):
+    """
+    Records which plugins each module registers and whether importing it has other side effects, while all
+    plugins are loaded normally. The result is saved as the plugin manifest used by later startups.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        # Plugin modules in import order
+        self.modules = []
+        # Maps every module imported while loading plugins to the plugin module which pulled it in
+        self.owners = {}
+        # Plugin modules which must always be imported
+        self.eager = set()
+        # Plugin names registered by each plugin module
+        self.registered = {}
+
+    @contextmanager
+    def track(self, module_name):
+        """Attribute all imports and side effects within the block to plugin module `module_name`."""
+        modules = set(sys.modules)
+        effects = _side_effects()
+        try:
+            yield
+        finally:
+            for name in set(sys.modules) - modules:
+                self.owners.setdefault(name, module_name)
+            if _side_effects() != effects:
+                self.eager.add(module_name)
+
+    def add_module(self, module_name, imported):
+        self.modules.append(module_name)
+        if not imported:
+            # Retry on every startup, so that missing dependencies are reported like before
+            self.eager.add(module_name)
+
+    def import_module(self, module_name, source=None):
+        if module_name in sys.modules:
+            # Already imported by another plugin module
+            return
+        with self.track(module_name):
+            imported = _import_plugin_module(module_name, source)
+        self.add_module(module_name, imported)
+
+    def register(self):
+        """Fire plugin.register handlers one by one, recording which module registered which plugins."""
+        try:
+            handlers = list(get_events('plugin.register'))
+        except KeyError:
+            return
+        for handler in handlers:
+            module_name = getattr(handler.func, '__module__', None)
+            owner = self.owners.get(module_name, module_name)
+            names = set(plugins)
+            with self.track(owner):
+                handler()
+            self.registered.setdefault(owner, []).extend(set(plugins) - names)
+
+    def initialize(self):
+        owners = dict((name, owner) for owner, names in self.registered.items() for name in names)
+        for plugin in list(plugins.values()):
+            with self.track(owners.get(plugin.name)):
+                plugin.initialize()
+
+    def manifest(self):
+        lazy = {}
+        for module_name in self.modules:
+            infos = [plugins[name] for name in self.registered.get(module_name, []) if name in plugins]
+            if module_name in self.eager or any(p.builtin or not _jsonable(p.schema) for p in infos):
+                self.eager.add(module_name)
+                continue
+            lazy[module_name] = [{'name': p.name,
+                                  'api_ver': p.api_ver,
+                                  'interfaces': p.interfaces,
+                                  'debug': p.debug,
+                                  'category': p.category,
+                                  'schema': p.schema,
+                                  'phases': dict((phase, handler.priority)
+                                                 for phase, handler in p.phase_handlers.items())}
+                                 for p in infos]
+        return {'key': self.key,
+                'eager': [module_name for module_name in self.modules if module_name in self.eager],
+                'lazy': lazy}
+
+    def save(self, path):
+        manifest = self.manifest()
+        log.debug('Saving plugin manifest to %s, %s modules are loaded on demand', path, len(manifest['lazy']))
+        try:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f)
+            os.rename(tmp_path, path)
+        except (IOError, OSError) as e:
+            log.warning('Could not save plugin manifest %s: %s', path, e)
+
+
+def _read_manifest(path, key):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (IOError, OSError):
+        return None
+    except ValueError as e:
+        log.warning('Ignoring invalid plugin manifest %s: %s', path, e)
+        return None
+    if manifest.get('key') != key:
+        log.debug('Plugin manifest %s is outdated', path)
+        return None
+    return manifest
+
+
+def _load_plugins_from_manifest(manifest):
+    """Import only the modules which must always be imported, and placeholders for the rest of the plugins."""
+    for module_name in manifest['eager']:
+        if module_name not in sys.modules:
+            _import_plugin_module(module_name)
     _check_phase_queue()
+    fire_event('plugin.register')
+    remove_event_handlers('plugin.register')
+    for module_name, infos in manifest['lazy'].items():
+        for info in infos:
+            # Eager modules may have pulled in the module already
+            if info['name'] not in plugins:
+                LazyPluginInfo(module_name, **info)
+
+
+def _load_lazy_module(module_name):
+    """Import a plugin module listed in the manifest, registering and initializing its plugins."""
+    with _lazy_lock:
+        if module_name in _lazy_loaded:
+            return
+        _lazy_loaded.add(module_name)
+        log.debug('Loading plugin module %s on demand', module_name)
+        _import_plugin_module(module_name)
+        _check_phase_queue()
+        fire_event('plugin.register')
+        remove_event_handlers('plugin.register')
+        for plugin in list(plugins.values()):
+            plugin.initialize()
+
+
+def load_config_plugins(config):
+    """
+    Import the modules of plugins configured in `config`, which have not been loaded yet.
+
+    :param dict config: Task config
+    """
+    for name in config:
+        plugin = plugins.get(name)
+        if isinstance(plugin, LazyPluginInfo):
+            try:
+                plugin.load()
+            except DependencyError as e:
+                log.error(e.message)
 
 
-def load_plugins(extra_dirs=None):
+def load_plugins(extra_dirs=None, manifest=None):
     """
     Load plugins from the standard plugin paths.
     :param list extra_dirs: Extra directories from where plugins are loaded.
+    :param string manifest: Path of the plugin manifest. When given, plugin modules which only register plugins
+        are not imported until the plugins are used. The manifest is rebuilt whenever plugin files change.
     """
     global plugins_loaded
 
@@ -454,16 +755,39 @@ def load_plugins(extra_dirs=None):
     extra_dirs.extend(_get_standard_plugins_path())
 
     start_time = time.time()
+    builder = None
+    if manifest and not plugins_loaded:
+        dirs = _set_plugin_dirs(extra_dirs)
+        key = _manifest_key(dirs)
+        loaded_manifest = _read_manifest(manifest, key)
+        if loaded_manifest is not None:
+            _load_plugins_from_manifest(loaded_manifest)
+            for plugin in list(plugins.values()):
+                plugin.initialize()
+            took = time.time() - start_time
+            plugins_loaded = True
+            log.debug('Plugins took %.2f seconds to load from manifest. %s plugins in registry.', took,
+                      len(plugins.keys()))
+            return
+        builder = ManifestBuilder(key)
+
     # Import all the plugins
-    _load_plugins_from_dirs(extra_dirs)
-    _load_plugins_from_packages()
-    # Register them
-    fire_event('plugin.register')
+    _load_plugins_from_dirs(extra_dirs, builder)
+    _load_plugins_from_packages(builder)
+    if builder is not None:
+        builder.register()
+    else:
+        # Register them
+        fire_event('plugin.register')
     # Plugins should only be registered once, remove their handlers after
     remove_event_handlers('plugin.register')
     # After they have all been registered, instantiate them
-    for plugin in list(plugins.values()):
-        plugin.initialize()
+    if builder is not None:
+        builder.initialize()
+        builder.save(manifest)
+    else:
+        for plugin in list(plugins.values()):
+            plugin.initialize()
     took = time.time() - start_time
     plugins_loaded = True
     log.debug('Plugins took %.2f seconds to load. %s plugins in registry.', took, len(plugins.keys()))
@@ -7,8 +7,7 @@ from argparse import SUPPRESS
 
 from flexget import options
 from flexget.event import event, add_event_handler, remove_event_handler
-
-from sqlalchemy.engine import Connection
+from flexget.utils import metrics
 
 log = logging.getLogger('performance')
 
@@ -16,24 +15,21 @@ performance = {}
 
 _start = {}
 
-query_count = 0
-orig_execute = None
-
 
 def log_query_count(name_point):
     """Debugging purposes, allows logging number of executed queries at :name_point:"""
-    log.info('At point named `%s` total of %s queries were ran' % (name_point, query_count))
+    log.info('At point named `%s` total of %s queries were ran' % (name_point, metrics.current_counters().queries))
 
 
 def before_plugin(task, keyword):
     fd = _start.setdefault(task.name, {})
     fd.setdefault('time', {})[keyword] = time.time()
-    fd.setdefault('queries', {})[keyword] = query_count
+    fd.setdefault('queries', {})[keyword] = metrics.current_counters().queries
 
 
 def after_plugin(task, keyword):
     took = time.time() - _start[task.name]['time'][keyword]
-    queries = query_count - _start[task.name]['queries'][keyword]
+    queries = metrics.current_counters().queries - _start[task.name]['queries'][keyword]
     # Store results, increases previous values
     pd = performance.setdefault(task.name, {})
     data = pd.setdefault(keyword, {})
@@ -47,22 +43,6 @@ def startup(manager, options):
         return
 
     log.info('Enabling plugin and SQLAlchemy performance debugging')
-    global query_count, orig_execute
-    query_count = 0
-
-    # Monkeypatch query counter for SQLAlchemy
-    if hasattr(Connection, 'execute'):
-        orig_execute = Connection.execute
-
-        def monkeypatched(*args, **kwargs):
-            global query_count
-            query_count += 1
-            return orig_execute(*args, **kwargs)
-
-        Connection.execute = monkeypatched
-    else:
-        log.critical('Unable to monkeypatch sqlalchemy')
-
     add_event_handler('task.execute.before_plugin', before_plugin)
     add_event_handler('task.execute.after_plugin', after_plugin)
 
@@ -82,8 +62,6 @@ def cleanup(manager, options):
                 log.info('%-15s took %0.2f sec (%s queries)' % (keyword, took, queries))
 
     # Deregister our hooks
-    if hasattr(Connection, 'execute') and orig_execute:
-        Connection.execute = orig_execute
     remove_event_handler('task.execute.before_plugin', before_plugin)
     remove_event_handler('task.execute.after_plugin', after_plugin)
 
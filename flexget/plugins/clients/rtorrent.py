@@ -648,7 +648,7 @@ class RTorrentOutputPlugin(RTorrentPluginBase):
                 return
 
             try:
-                Torrent(torrent_raw)
+                Torrent(torrent_raw, metadata_only=True)
             except SyntaxError as e:
                 entry.fail('Strange, unable to decode torrent, raise a BUG: %s' % str(e))
                 return
@@ -8,7 +8,9 @@ import os
 import logging
 import base64
 import re
+import threading
 import time
+from contextlib import contextmanager
 from datetime import datetime
 from datetime import timedelta
 from netrc import netrc, NetrcParseError
@@ -33,11 +35,24 @@ except ImportError:
 
 log = logging.getLogger('transmission')
 
+# Clients are kept between tasks, for each host, port and credentials, instead of negotiating a new RPC session
+_clients = {}
+_client_locks = {}
+_clients_lock = threading.Lock()
+
+# Fields requested by torrent-get, rather than all of them
+TORRENT_INFO_FIELDS = ['id', 'totalSize', 'downloadDir', 'files', 'priorities', 'wanted']
+SEED_LIMITS_FIELDS = ['seedRatioMode', 'seedRatioLimit', 'uploadRatio', 'seedIdleMode', 'seedIdleLimit',
+                      'activityDate']
+INPUT_FIELDS = ['id', 'name', 'status', 'hashString', 'torrentFile', 'totalSize', 'comment', 'downloadDir',
+                'isFinished', 'isPrivate', 'trackers'] + SEED_LIMITS_FIELDS
+CLEAN_FIELDS = ['id', 'name', 'status', 'uploadRatio', 'addedDate', 'doneDate', 'downloadDir',
+                'trackers'] + SEED_LIMITS_FIELDS
+
 
 class TransmissionBase(object):
 
     def __init__(self):
-        self.client = None
         self.opener = None
 
     def _validator(self, advanced):
@@ -68,7 +83,35 @@ class TransmissionBase(object):
                 log.error('netrc: %s, file: %s, line: %s' % (e.msg, e.filename, e.lineno))
         return config
 
-    def create_rpc_client(self, config):
+    def _client_lock(self, config):
+        """Returns the key of the transmission in `config` and the lock its client is used under."""
+        key = (config['host'], config['port'], config.get('username'), config.get('password'))
+        with _clients_lock:
+            return key, _client_locks.setdefault(key, threading.RLock())
+
+    @contextmanager
+    def rpc_client(self, config):
+        """
+        Holds the client for the transmission in `config`, connected by a previous task if there was one.
+
+        transmissionrpc clients are not thread safe, so tasks running at once take turns with the shared client.
+        """
+        key, lock = self._client_lock(config)
+        with lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = self._connect(config)
+            else:
+                log.debug('Reusing the connection to transmission at %s:%s', config['host'], config['port'])
+            yield client
+
+    def forget_rpc_client(self, config):
+        """Makes the next :meth:`rpc_client` for the transmission in `config` connect again."""
+        key, lock = self._client_lock(config)
+        with lock:
+            _clients.pop(key, None)
+
+    def _connect(self, config):
         user, password = config.get('username'), config.get('password')
 
         try:
@@ -87,6 +130,16 @@ class TransmissionBase(object):
                 raise plugin.PluginError("Error connecting to transmission: %s" % e.message)
         return cli
 
+    def get_torrents_info(self, client, torrents):
+        """
+        Returns the torrents of `torrents` which still exist by id, with the fields :meth:`torrent_info` needs.
+        """
+        if not torrents:
+            # No ids would get all torrents
+            return {}
+        return dict((torrent.id, torrent) for torrent in
+                    client.get_torrents([torrent.id for torrent in torrents], TORRENT_INFO_FIELDS))
+
     def torrent_info(self, torrent, config):
         done = torrent.totalSize > 0
         vloc = None
@@ -121,6 +174,10 @@ class TransmissionBase(object):
 
         return seed_limit_ok, idle_limit_ok
 
+    def on_task_abort(self, task, config):
+        # Maybe because of the connection, the next task connects again
+        self.forget_rpc_client(self.prepare_config(config))
+
     def on_task_start(self, task, config):
         try:
             import transmissionrpc
@@ -131,18 +188,16 @@ class TransmissionBase(object):
         if [int(part) for part in transmissionrpc.__version__.split('.')] < [0, 11]:
             raise plugin.PluginError('Transmissionrpc module version 0.11 or higher required, please upgrade', log)
 
-        # Mark rpc client for garbage collector so every task can start
-        # a fresh new according its own config - fix to bug #2804
-        self.client = None
+        # Every task gets the client for its own config - fix to bug #2804
         config = self.prepare_config(config)
         if config['enabled']:
             if task.options.test:
                 log.info('Trying to connect to transmission...')
-                self.client = self.create_rpc_client(config)
-                if self.client:
-                    log.info('Successfully connected to transmission.')
-                else:
-                    log.error('It looks like there was a problem connecting to transmission.')
+                with self.rpc_client(config) as client:
+                    if client:
+                        log.info('Successfully connected to transmission.')
+                    else:
+                        log.error('It looks like there was a problem connecting to transmission.')
 
 
 class PluginTransmissionInput(TransmissionBase):
@@ -166,26 +221,36 @@ class PluginTransmissionInput(TransmissionBase):
         if not config['enabled']:
             return
 
-        if not self.client:
-            self.client = self.create_rpc_client(config)
+        with self.rpc_client(config) as client:
+            return self._get_entries(client, config)
+
+    def _get_entries(self, client, config):
         entries = []
 
         # Hack/Workaround for http://flexget.com/ticket/2002
         # TODO: Proper fix
         if 'username' in config and 'password' in config:
-            self.client.http_handler.set_authentication(self.client.url, config['username'], config['password'])
-
-        session = self.client.get_session()
-
-        for torrent in self.client.get_torrents():
-            downloaded, bigfella = self.torrent_info(torrent, config)
-            seed_ratio_ok, idle_limit_ok = self.check_seed_limits(torrent, session)
-            if not config['onlycomplete'] or (downloaded and
-                                              ((
-                                                  torrent.status == 'stopped' and
-                                                  seed_ratio_ok is None and
-                                                  idle_limit_ok is None) or
-                                               (seed_ratio_ok is True or idle_limit_ok is True))):
+            client.http_handler.set_authentication(client.url, config['username'], config['password'])
+
+        session = client.get_session()
+
+        torrents = client.get_torrents(arguments=INPUT_FIELDS)
+        if config['onlycomplete']:
+            # Files are only requested for torrents which may be complete
+            candidates = []
+            for torrent in torrents:
+                seed_ratio_ok, idle_limit_ok = self.check_seed_limits(torrent, session)
+                if ((torrent.status == 'stopped' and seed_ratio_ok is None and idle_limit_ok is None) or
+                        (seed_ratio_ok is True or idle_limit_ok is True)):
+                    candidates.append(torrent)
+            torrents = candidates
+        torrents_info = self.get_torrents_info(client, torrents)
+
+        for torrent in torrents:
+            if torrent.id not in torrents_info:
+                continue
+            downloaded, bigfella = self.torrent_info(torrents_info[torrent.id], config)
+            if not config['onlycomplete'] or downloaded:
                 entry = Entry(title=torrent.name,
                               url='file://%s' % torrent.torrentFile,
                               torrent_info_hash=torrent.hashString,
@@ -293,14 +358,13 @@ class PluginTransmission(TransmissionBase):
         # Do not run if there is nothing to do
         if not task.accepted:
             return
-        if self.client is None:
-            self.client = self.create_rpc_client(config)
-            if self.client:
+        with self.rpc_client(config) as client:
+            if client:
                 log.debug('Successfully connected to transmission.')
             else:
                 raise plugin.PluginError("Couldn't connect to transmission.")
-        if task.accepted:
-            self.add_to_transmission(self.client, task, config)
+            if task.accepted:
+                self.add_to_transmission(client, task, config)
 
     def _make_torrent_options_dict(self, config, entry):
 
@@ -384,6 +448,7 @@ class PluginTransmission(TransmissionBase):
 
     def add_to_transmission(self, cli, task, config):
         """Adds accepted entries to transmission """
+        added = []
         for entry in task.accepted:
             if task.options.test:
                 log.info('Would add %s to transmission' % entry['url'])
@@ -414,179 +479,239 @@ class PluginTransmission(TransmissionBase):
                     # we need to set paused to false so the magnetization begins immediately
                     options['add']['paused'] = False
                     r = cli.add_torrent(entry['url'], timeout=30, **options['add'])
+            except TransmissionError as e:
+                self._fail_entry(entry, options, e)
+                continue
+
+            log.info('"%s" torrent added to transmission', entry['title'])
+            added.append((entry, options, r.id, downloaded))
 
-                log.info('"%s" torrent added to transmission', entry['title'])
-
-                total_size = cli.get_torrent(r.id, ['id', 'totalSize']).totalSize
-
-                def _filter_list(list):
-                    for item in list:
-                        if not isinstance(item, basestring):
-                            list.remove(item)
-                    return list
-
-                def _find_matches(name, list):
-                    for mask in list:
-                        if fnmatch(name, mask):
-                            return True
-                    return False
-
-                def _wait_for_files(cli, r, timeout):
-                    from time import sleep
-                    while timeout > 0:
-                        sleep(1)
-                        fl = cli.get_files(r.id)
-                        if len(fl[r.id]) > 0:
-                            return fl
-                        else:
-                            timeout -= 1
-                    return fl
-
-                skip_files = False
-                # Filter list because "set" plugin doesn't validate based on schema
-                # Skip files only used if we have no main file
-                if 'skip_files' in options['post']:
-                    skip_files = True
-                    options['post']['skip_files'] = _filter_list(options['post']['skip_files'])
-
-                main_id = None
-                find_main_file = options['post'].get('main_file_only') or 'content_filename' in options['post']
-                # We need to index the files if any of the following are defined
-                if find_main_file or skip_files:
-                    fl = cli.get_files(r.id)
-
-                    if ('magnetization_timeout' in options['post'] and
-                        options['post']['magnetization_timeout'] > 0 and
-                            not downloaded and
-                            len(fl[r.id]) == 0):
-                        log.debug('Waiting %d seconds for "%s" to magnetize', options['post']['magnetization_timeout'],
-                                  entry['title'])
-                        fl = _wait_for_files(cli, r, options['post']['magnetization_timeout'])
-                        if len(fl[r.id]) == 0:
-                            log.warning('"%s" did not magnetize before the timeout elapsed, '
-                                        'file list unavailable for processing.', entry['title'])
-                        else:
-                            total_size = cli.get_torrent(r.id, ['id', 'totalSize']).totalSize
-
-                    # Find files based on config
-                    dl_list = []
-                    skip_list = []
-                    main_list = []
-                    full_list = []
-                    ext_list = ['*.srt', '*.sub', '*.idx', '*.ssa', '*.ass']
-
-                    main_ratio = config['main_file_ratio']
-                    if 'main_file_ratio' in options['post']:
-                        main_ratio = options['post']['main_file_ratio']
-
-                    if 'include_files' in options['post']:
-                        options['post']['include_files'] = _filter_list(options['post']['include_files'])
-
-                    for f in fl[r.id]:
-                        full_list.append(f)
-                        # No need to set main_id if we're not going to need it
-                        if find_main_file and fl[r.id][f]['size'] > total_size * main_ratio:
-                            main_id = f
-
-                        if 'include_files' in options['post']:
-                            if _find_matches(fl[r.id][f]['name'], options['post']['include_files']):
-                                dl_list.append(f)
-                            elif options['post'].get('include_subs') and _find_matches(fl[r.id][f]['name'], ext_list):
-                                dl_list.append(f)
-
-                        if skip_files:
-                            if _find_matches(fl[r.id][f]['name'], options['post']['skip_files']):
-                                skip_list.append(f)
-
-                    if main_id is not None:
-
-                        # Look for files matching main ID title but with a different extension
-                        if options['post'].get('rename_like_files'):
-                            for f in fl[r.id]:
-                                # if this filename matches main filename we want to rename it as well
-                                fs = os.path.splitext(fl[r.id][f]['name'])
-                                if fs[0] == os.path.splitext(fl[r.id][main_id]['name'])[0]:
-                                    main_list.append(f)
-                        else:
-                            main_list = [main_id]
-
-                        if main_id not in dl_list:
-                            dl_list.append(main_id)
-                    elif find_main_file:
-                        log.warning('No files in "%s" are > %d%% of content size, no files renamed.',
-                            entry['title'], main_ratio * 100)
-
-                    # If we have a main file and want to rename it and associated files
-                    if 'content_filename' in options['post'] and main_id is not None:
-                        if 'download_dir' not in options['add']:
-                            download_dir = cli.get_session().download_dir
-                        else:
-                            download_dir = options['add']['download_dir']
-
-                        # Get new filename without ext
-                        file_ext = os.path.splitext(fl[r.id][main_id]['name'])[1]
-                        file_path = os.path.dirname(os.path.join(download_dir, fl[r.id][main_id]['name']))
-                        filename = options['post']['content_filename']
-                        if config['host'] == 'localhost' or config['host'] == '127.0.0.1':
-                            counter = 1
-                            while os.path.exists(os.path.join(file_path, filename + file_ext)):
-                                # Try appending a (#) suffix till a unique filename is found
-                                filename = '%s(%s)' % (options['post']['content_filename'], counter)
-                                counter += 1
-                        else:
-                            log.debug('Cannot ensure content_filename is unique '
-                                      'when adding to a remote transmission daemon.')
-
-                        for index in main_list:
-                            file_ext = os.path.splitext(fl[r.id][index]['name'])[1]
-                            log.debug('File %s renamed to %s' % (fl[r.id][index]['name'], filename + file_ext))
-                            # change to below when set_files will allow setting name, more efficient to have one call
-                            # fl[r.id][index]['name'] = os.path.basename(pathscrub(filename + file_ext).encode('utf-8'))
-                            try:
-                                cli.rename_torrent_path(r.id, fl[r.id][index]['name'],
-                                                        os.path.basename(str(pathscrub(filename + file_ext))))
-                            except TransmissionError:
-                                log.error('content_filename only supported with transmission 2.8+')
-
-                    if options['post'].get('main_file_only') and main_id is not None:
-                        # Set Unwanted Files
-                        options['change']['files_unwanted'] = [x for x in full_list if x not in dl_list]
-                        options['change']['files_wanted'] = dl_list
-                        log.debug('Downloading %s of %s files in torrent.',
-                                  len(options['change']['files_wanted']), len(full_list))
-                    elif (not options['post'].get('main_file_only') or main_id is None) and skip_files:
-                        # If no main file and we want to skip files
-
-                        if len(skip_list) >= len(full_list):
-                            log.debug('skip_files filter would cause no files to be downloaded; '
-                                      'including all files in torrent.')
-                        else:
-                            options['change']['files_unwanted'] = skip_list
-                            options['change']['files_wanted'] = [x for x in full_list if x not in skip_list]
-                            log.debug('Downloading %s of %s files in torrent.',
-                                      len(options['change']['files_wanted']), len(full_list))
-
-                # Set any changed file properties
-                if list(options['change'].keys()):
-                    cli.change_torrent(r.id, 30, **options['change'])
+        if not added:
+            return
+        # Follow-up requests are made once for all the added torrents. Beware that transmissionrpc requests all
+        # torrents when given no ids.
+        try:
+            session = cli.get_session()
+            total_sizes = dict((torrent.id, torrent.totalSize) for torrent in
+                               cli.get_torrents([torrent_id for _, _, torrent_id, _ in added], ['id', 'totalSize']))
+            files_ids = [torrent_id for _, options, torrent_id, _ in added if self._needs_files(options)]
+            files = cli.get_files(files_ids) if files_ids else {}
+        except TransmissionError as e:
+            for entry, options, _, _ in added:
+                self._fail_entry(entry, options, e)
+            return
 
+        changes = {}
+        for entry, options, torrent_id, downloaded in added:
+            if self._needs_files(options):
+                try:
+                    self._select_files(cli, config, session, entry, options, torrent_id, downloaded,
+                                       total_sizes.get(torrent_id, 0), files.get(torrent_id, {}))
+                except TransmissionError as e:
+                    self._fail_entry(entry, options, e)
+                    continue
+            # Torrents with the same changes are changed by a single request
+            key = repr(sorted(options['change'].items()))
+            changes.setdefault(key, (options['change'], []))[1].append((entry, options, torrent_id))
+
+        start, stop = [], []
+        for change, torrents in changes.values():
+            # Set any changed file properties
+            if change:
+                try:
+                    cli.change_torrent([torrent_id for _, _, torrent_id in torrents], 30, **change)
+                except TransmissionError as e:
+                    for entry, options, _ in torrents:
+                        self._fail_entry(entry, options, e)
+                    continue
+            for entry, options, torrent_id in torrents:
                 # if addpaused was defined and set to False start the torrent;
                 # prevents downloading data before we set what files we want
                 if ('paused' in options['post'] and not options['post']['paused'] or
-                        'paused' not in options['post'] and cli.get_session().start_added_torrents):
-                    cli.start_torrent(r.id)
+                        'paused' not in options['post'] and session.start_added_torrents):
+                    start.append((entry, options, torrent_id))
                 elif options['post'].get('paused'):
-                    log.debug('sleeping 5s to stop the torrent...')
-                    time.sleep(5)
-                    cli.stop_torrent(r.id)
-                    log.info('Torrent "%s" stopped because of addpaused=yes', entry['title'])
+                    stop.append((entry, options, torrent_id))
 
+        if start:
+            try:
+                cli.start_torrent([torrent_id for _, _, torrent_id in start])
             except TransmissionError as e:
-                log.debug('TransmissionError', exc_info=True)
-                log.debug('Failed options dict: %s', options)
-                msg = 'TransmissionError: %s' % e.message or 'N/A'
-                log.error(msg)
-                entry.fail(msg)
+                for entry, options, _ in start:
+                    self._fail_entry(entry, options, e)
+        if stop:
+            log.debug('sleeping 5s to stop the torrents...')
+            time.sleep(5)
+            try:
+                cli.stop_torrent([torrent_id for _, _, torrent_id in stop])
+            except TransmissionError as e:
+                for entry, options, _ in stop:
+                    self._fail_entry(entry, options, e)
+            else:
+                for entry, _, _ in stop:
+                    log.info('Torrent "%s" stopped because of addpaused=yes', entry['title'])
+
+    def _fail_entry(self, entry, options, error):
+        log.debug('TransmissionError', exc_info=True)
+        log.debug('Failed options dict: %s', options)
+        msg = 'TransmissionError: %s' % error.message or 'N/A'
+        log.error(msg)
+        entry.fail(msg)
+
+    def _needs_files(self, options):
+        """Whether the files of a torrent need to be indexed to apply `options`."""
+        return bool(options['post'].get('main_file_only') or 'content_filename' in options['post'] or
+                    'skip_files' in options['post'])
+
+    def _select_files(self, cli, config, session, entry, options, torrent_id, downloaded, total_size, torrent_files):
+        """
+        Selects the files to download and renames the main file of an added torrent according to `options`, changes
+        to make to the torrent are added to `options['change']`.
+        """
+
+        def _filter_list(list):
+            for item in list:
+                if not isinstance(item, basestring):
+                    list.remove(item)
+            return list
+
+        def _find_matches(name, list):
+            for mask in list:
+                if fnmatch(name, mask):
+                    return True
+            return False
+
+        def _wait_for_files(cli, torrent_id, timeout):
+            from time import sleep
+            while timeout > 0:
+                sleep(1)
+                fl = cli.get_files(torrent_id)
+                if len(fl[torrent_id]) > 0:
+                    return fl[torrent_id]
+                else:
+                    timeout -= 1
+            return fl[torrent_id]
+
+        skip_files = False
+        # Filter list because "set" plugin doesn't validate based on schema
+        # Skip files only used if we have no main file
+        if 'skip_files' in options['post']:
+            skip_files = True
+            options['post']['skip_files'] = _filter_list(options['post']['skip_files'])
+
+        main_id = None
+        find_main_file = options['post'].get('main_file_only') or 'content_filename' in options['post']
+
+        if ('magnetization_timeout' in options['post'] and
+            options['post']['magnetization_timeout'] > 0 and
+                not downloaded and
+                len(torrent_files) == 0):
+            log.debug('Waiting %d seconds for "%s" to magnetize', options['post']['magnetization_timeout'],
+                      entry['title'])
+            torrent_files = _wait_for_files(cli, torrent_id, options['post']['magnetization_timeout'])
+            if len(torrent_files) == 0:
+                log.warning('"%s" did not magnetize before the timeout elapsed, '
+                            'file list unavailable for processing.', entry['title'])
+            else:
+                total_size = cli.get_torrent(torrent_id, ['id', 'totalSize']).totalSize
+
+        # Find files based on config
+        dl_list = []
+        skip_list = []
+        main_list = []
+        full_list = []
+        ext_list = ['*.srt', '*.sub', '*.idx', '*.ssa', '*.ass']
+
+        main_ratio = config['main_file_ratio']
+        if 'main_file_ratio' in options['post']:
+            main_ratio = options['post']['main_file_ratio']
+
+        if 'include_files' in options['post']:
+            options['post']['include_files'] = _filter_list(options['post']['include_files'])
+
+        for f in torrent_files:
+            full_list.append(f)
+            # No need to set main_id if we're not going to need it
+            if find_main_file and torrent_files[f]['size'] > total_size * main_ratio:
+                main_id = f
+
+            if 'include_files' in options['post']:
+                if _find_matches(torrent_files[f]['name'], options['post']['include_files']):
+                    dl_list.append(f)
+                elif options['post'].get('include_subs') and _find_matches(torrent_files[f]['name'], ext_list):
+                    dl_list.append(f)
+
+            if skip_files:
+                if _find_matches(torrent_files[f]['name'], options['post']['skip_files']):
+                    skip_list.append(f)
+
+        if main_id is not None:
+
+            # Look for files matching main ID title but with a different extension
+            if options['post'].get('rename_like_files'):
+                for f in torrent_files:
+                    # if this filename matches main filename we want to rename it as well
+                    fs = os.path.splitext(torrent_files[f]['name'])
+                    if fs[0] == os.path.splitext(torrent_files[main_id]['name'])[0]:
+                        main_list.append(f)
+            else:
+                main_list = [main_id]
+
+            if main_id not in dl_list:
+                dl_list.append(main_id)
+        elif find_main_file:
+            log.warning('No files in "%s" are > %d%% of content size, no files renamed.',
+                        entry['title'], main_ratio * 100)
+
+        # If we have a main file and want to rename it and associated files
+        if 'content_filename' in options['post'] and main_id is not None:
+            if 'download_dir' not in options['add']:
+                download_dir = session.download_dir
+            else:
+                download_dir = options['add']['download_dir']
+
+            # Get new filename without ext
+            file_ext = os.path.splitext(torrent_files[main_id]['name'])[1]
+            file_path = os.path.dirname(os.path.join(download_dir, torrent_files[main_id]['name']))
+            filename = options['post']['content_filename']
+            if config['host'] == 'localhost' or config['host'] == '127.0.0.1':
+                counter = 1
+                while os.path.exists(os.path.join(file_path, filename + file_ext)):
+                    # Try appending a (#) suffix till a unique filename is found
+                    filename = '%s(%s)' % (options['post']['content_filename'], counter)
+                    counter += 1
+            else:
+                log.debug('Cannot ensure content_filename is unique '
+                          'when adding to a remote transmission daemon.')
+
+            for index in main_list:
+                file_ext = os.path.splitext(torrent_files[index]['name'])[1]
+                log.debug('File %s renamed to %s' % (torrent_files[index]['name'], filename + file_ext))
+                # change to below when set_files will allow setting name, more efficient to have one call
+                # fl[r.id][index]['name'] = os.path.basename(pathscrub(filename + file_ext).encode('utf-8'))
+                try:
+                    cli.rename_torrent_path(torrent_id, torrent_files[index]['name'],
+                                            os.path.basename(str(pathscrub(filename + file_ext))))
+                except TransmissionError:
+                    log.error('content_filename only supported with transmission 2.8+')
+
+        if options['post'].get('main_file_only') and main_id is not None:
+            # Set Unwanted Files
+            options['change']['files_unwanted'] = [x for x in full_list if x not in dl_list]
+            options['change']['files_wanted'] = dl_list
+            log.debug('Downloading %s of %s files in torrent.',
+                      len(options['change']['files_wanted']), len(full_list))
+        elif (not options['post'].get('main_file_only') or main_id is None) and skip_files:
+            # If no main file and we want to skip files
+
+            if len(skip_list) >= len(full_list):
+                log.debug('skip_files filter would cause no files to be downloaded; '
+                          'including all files in torrent.')
+            else:
+                options['change']['files_unwanted'] = skip_list
+                options['change']['files_wanted'] = [x for x in full_list if x not in skip_list]
+                log.debug('Downloading %s of %s files in torrent.',
+                          len(options['change']['files_wanted']), len(full_list))
 
     def on_task_learn(self, task, config):
         """ Make sure all temp files are cleaned up when entries are learned """
@@ -595,7 +720,9 @@ class PluginTransmission(TransmissionBase):
             download = plugin.get_plugin_by_name('download')
             download.instance.cleanup_temp_files(task)
 
-    on_task_abort = on_task_learn
+    def on_task_abort(self, task, config):
+        TransmissionBase.on_task_abort(self, task, config)
+        self.on_task_learn(task, config)
 
 
 class PluginTransmissionClean(TransmissionBase):
@@ -647,8 +774,10 @@ class PluginTransmissionClean(TransmissionBase):
         config = self.prepare_config(config)
         if not config['enabled'] or task.options.learn:
             return
-        if not self.client:
-            self.client = self.create_rpc_client(config)
+        with self.rpc_client(config) as client:
+            self._clean(task, client, config)
+
+    def _clean(self, task, client, config):
         nrat = float(config['min_ratio']) if 'min_ratio' in config else None
         nfor = parse_timedelta(config['finished_for']) if 'finished_for' in config else None
         delete_files = bool(config['delete_files']) if 'delete_files' in config else False
@@ -657,13 +786,12 @@ class PluginTransmissionClean(TransmissionBase):
         preserve_tracker_re = re.compile(config['preserve_tracker'], re.IGNORECASE) if 'preserve_tracker' in config else None
         directories_re = config.get('directories')
 
-        session = self.client.get_session()
+        session = client.get_session()
 
-        remove_ids = []
-        for torrent in self.client.get_torrents():
+        candidates = []
+        for torrent in client.get_torrents(arguments=CLEAN_FIELDS):
             log.verbose('Torrent "%s": status: "%s" - ratio: %s -  date added: %s - date done: %s' %
                         (torrent.name, torrent.status, torrent.ratio, torrent.date_added, torrent.date_done))
-            downloaded, dummy = self.torrent_info(torrent, config)
             seed_ratio_ok, idle_limit_ok = self.check_seed_limits(torrent, session)
             tracker_hosts = (urlparse(tracker['announce']).hostname for tracker in torrent.trackers)
             is_clean_all = nrat is None and nfor is None and trans_checks is False
@@ -680,21 +808,31 @@ class PluginTransmissionClean(TransmissionBase):
                 is_preserve_tracker_matching = any(preserve_tracker_re.search(host) for host in tracker_hosts)
             is_directories_matching = not directories_re or any(
                 re.compile(directory, re.IGNORECASE).search(torrent.downloadDir) for directory in directories_re)
-            if (downloaded and (is_clean_all or
-                                is_transmission_seedlimit_unset or
-                                is_transmission_seedlimit_reached or
-                                is_transmission_idlelimit_reached or
-                                is_minratio_reached or
-                                (is_torrent_seed_only and is_torrent_idlelimit_since_added_reached) or
-                                (not is_torrent_seed_only and is_torrent_idlelimit_since_finished_reached)) and
+            if ((is_clean_all or
+                 is_transmission_seedlimit_unset or
+                 is_transmission_seedlimit_reached or
+                 is_transmission_idlelimit_reached or
+                 is_minratio_reached or
+                 (is_torrent_seed_only and is_torrent_idlelimit_since_added_reached) or
+                 (not is_torrent_seed_only and is_torrent_idlelimit_since_finished_reached)) and
                     is_directories_matching and (not is_preserve_tracker_matching and is_tracker_matching)):
+                candidates.append(torrent)
+
+        # Files are only requested for the torrents which would be removed once downloaded
+        torrents_info = self.get_torrents_info(client, candidates)
+        remove_ids = []
+        for torrent in candidates:
+            if torrent.id not in torrents_info:
+                continue
+            downloaded, dummy = self.torrent_info(torrents_info[torrent.id], config)
+            if downloaded:
                 if task.options.test:
                     log.info('Would remove finished torrent `%s` from transmission', torrent.name)
                     continue
                 log.info('Removing finished torrent `%s` from transmission', torrent.name)
                 remove_ids.append(torrent.id)
         if remove_ids:
-            self.client.remove_torrent(remove_ids, delete_files)
+            client.remove_torrent(remove_ids, delete_files)
 
 
 @event('plugin.register')
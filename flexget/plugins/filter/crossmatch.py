@@ -2,6 +2,9 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+from collections import defaultdict
+
+from past.builtins import basestring
 
 from flexget import plugin
 from flexget.event import event
@@ -44,19 +47,30 @@ class CrossMatch(object):
         fields = config['fields']
         action = config['action']
         all_fields = config['all_fields']
+        exact = config.get('exact')
 
         match_entries = aggregate_inputs(task, config['from'])
+        index = CrossMatchIndex(match_entries, fields, exact)
 
         # perform action on intersecting entries
         for entry in task.entries:
-            for generated_entry in match_entries:
+            # Only the generated entries sharing a value with the entry need to be checked, in their original order
+            candidates = sorted(index.candidates(entry))
+            position = 0
+            while position < len(candidates):
+                generated_entry = match_entries[candidates[position]]
+                position += 1
                 log.trace('checking if %s matches %s', entry['title'], generated_entry['title'])
-                common = self.entry_intersects(entry, generated_entry, fields, config.get('exact'))
+                common = self.entry_intersects(entry, generated_entry, fields, exact)
                 if common and (not all_fields or len(common) == len(fields)):
                     msg = 'intersects with %s on field(s) %s' % (generated_entry['title'], ', '.join(common))
-                    for key in generated_entry:
-                        if key not in entry:
-                            entry[key] = generated_entry[key]
+                    copied = [key for key in generated_entry if key not in entry]
+                    for key in copied:
+                        entry[key] = generated_entry[key]
+                    if any(key in fields for key in copied):
+                        # Entry has new values for matched fields, look for more candidates after this one
+                        candidates = candidates[:position] + sorted(i for i in index.candidates(entry)
+                                                                    if i > candidates[position - 1])
                     if action == 'reject':
                         entry.reject(msg)
                     if action == 'accept':
@@ -96,6 +110,88 @@ class CrossMatch(object):
         return common_fields
 
 
+class CrossMatchIndex(object):
+    """
+    Index of entries by the values of `fields`, finds the entries which may intersect with another entry without
+    comparing it to all of them.
+
+    With `exact` values are hashed. Otherwise string values are indexed by their trigrams: values containing a value
+    have all of its trigrams, and values contained in a value have their rarest trigram in it. Values which can't be
+    indexed (short or non-string values) are always returned as candidates.
+    """
+
+    gram_size = 3
+
+    def __init__(self, entries, fields, exact=True):
+        self.exact = exact
+        # Per field, maps values (exact) or trigrams (non-exact) to sets of entry positions
+        self.index = dict((field, defaultdict(set)) for field in fields)
+        # Per field, maps the rarest trigram of each value to sets of entry positions
+        self.rarest = dict((field, defaultdict(set)) for field in fields)
+        # Per field, positions of entries with values which could not be indexed
+        self.unindexed = dict((field, set()) for field in fields)
+        # Per field, positions of all entries having the field
+        self.having = dict((field, set()) for field in fields)
+        value_grams = []
+        for position, entry in enumerate(entries):
+            for field in fields:
+                if field not in entry:
+                    continue
+                self.having[field].add(position)
+                value = entry[field]
+                if exact:
+                    try:
+                        self.index[field][value].add(position)
+                    except TypeError:
+                        # unhashable
+                        self.unindexed[field].add(position)
+                elif isinstance(value, basestring) and len(value) >= self.gram_size:
+                    grams = self.grams(value)
+                    value_grams.append((field, position, grams))
+                    for gram in grams:
+                        self.index[field][gram].add(position)
+                else:
+                    self.unindexed[field].add(position)
+        for field, position, grams in value_grams:
+            index = self.index[field]
+            self.rarest[field][min(grams, key=lambda gram: len(index[gram]))].add(position)
+
+    def grams(self, value):
+        return set(value[i:i + self.gram_size] for i in range(len(value) - self.gram_size + 1))
+
+    def candidates(self, entry):
+        """
+        :param entry: Entry to find candidates for
+        :return: Set of positions of the indexed entries which may intersect with `entry`
+        """
+        found = set()
+        for field, index in self.index.items():
+            if field not in entry:
+                continue
+            value = entry[field]
+            found.update(self.unindexed[field])
+            if self.exact:
+                try:
+                    found.update(index.get(value, ()))
+                except TypeError:
+                    # unhashable, could be equal to anything
+                    found.update(self.having[field])
+                continue
+            if not isinstance(value, basestring) or len(value) < self.gram_size:
+                # May be contained in anything
+                found.update(self.having[field])
+                continue
+            grams = self.grams(value)
+            # Values containing this value
+            postings = sorted((index.get(gram, set()) for gram in grams), key=len)
+            found.update(set.intersection(*postings))
+            # Values contained in this value
+            rarest = self.rarest[field]
+            for gram in grams:
+                found.update(rarest.get(gram, ()))
+        return found
+
+
 @event('plugin.register')
 def register_plugin():
     plugin.register(CrossMatch, 'crossmatch', api_ver=2)
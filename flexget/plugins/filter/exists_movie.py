@@ -11,14 +11,15 @@ from flexget import plugin
 from flexget.config_schema import one_or_more
 from flexget.event import event
 from flexget.plugin import get_plugin_by_name
-from flexget.utils.tools import TimedDict
+from flexget.utils import library_index
 
 log = logging.getLogger('exists_movie')
 
 
 class FilterExistsMovie(object):
     """
-    Reject existing movies.
+    Reject existing movies. Contents of the paths are kept in a persistent index, so only directories which changed
+    since the previous run are scanned again.
 
     Syntax:
 
@@ -49,9 +50,6 @@ class FilterExistsMovie(object):
     dir_pattern = re.compile('\b(cd.\d|subs?|samples?)\b', re.IGNORECASE)
     file_pattern = re.compile('\.(avi|mkv|mp4|mpg|webm)$', re.IGNORECASE)
 
-    def __init__(self):
-        self.cache = TimedDict(cache_time='1 hour')
-
     def prepare_config(self, config):
         # if config is not a dict, assign value to 'path' key
         if not isinstance(config, dict):
@@ -79,44 +77,34 @@ class FilterExistsMovie(object):
         count_entries = 0
         count_files = 0
 
-        # list of imdb ids gathered from paths / cache
+        # list of imdb ids gathered from paths
         qualities = {}
 
         for folder in config['path']:
             folder = Path(folder).expanduser()
-            # see if this path has already been scanned
-            cached_qualities = self.cache.get(folder, None)
-            if cached_qualities:
-                log.verbose('Using cached scan for %s ...' % folder)
-                qualities.update(cached_qualities)
-                continue
-
-            path_ids = {}
-
             if not folder.isdir():
                 log.critical('Path %s does not exist' % folder)
                 continue
 
-            log.verbose('Scanning path %s ...' % folder)
+            path_ids = {}
 
-            # Help debugging by removing a lot of noise
-            # logging.getLogger('movieparser').setLevel(logging.WARNING)
-            # logging.getLogger('imdb_lookup').setLevel(logging.WARNING)
+            log.verbose('Scanning path %s ...' % folder)
+            library_index.refresh(folder, session=task.session)
 
             # scan through
             items = []
             if config.get('type') == 'dirs':
-                for d in folder.walkdirs(errors='ignore'):
+                for d in library_index.entries(folder, files=False, session=task.session):
                     if self.dir_pattern.search(d.name):
                         continue
                     log.debug('detected dir with name %s, adding to check list' % d.name)
-                    items.append(d.name)
+                    items.append(d)
             elif config.get('type') == 'files':
-                for f in folder.walkfiles(errors='ignore'):
+                for f in library_index.entries(folder, dirs=False, session=task.session):
                     if not self.file_pattern.search(f.name):
                         continue
                     log.debug('detected file with name %s, adding to check list' % f.name)
-                    items.append(f.name)
+                    items.append(f)
 
             if not items:
                 log.verbose('No items with type %s were found in %s' % (config.get('type'), folder))
@@ -125,29 +113,30 @@ class FilterExistsMovie(object):
             for item in items:
                 count_files += 1
 
-                movie = get_plugin_by_name('parsing').instance.parse_movie(item)
+                movie_name, movie_year, movie_quality = library_index.parse_movie(item)
 
                 if config.get('lookup') == 'imdb':
-                    try:
-                        imdb_id = imdb_lookup.imdb_id_lookup(movie_title=movie.name,
-                                                             movie_year=movie.year,
-                                                             raw_title=item,
-                                                             session=task.session)
-                        if imdb_id in path_ids:
-                            log.trace('duplicate %s' % item)
+                    if not item.imdb_checked:
+                        try:
+                            item.imdb_id = imdb_lookup.imdb_id_lookup(movie_title=movie_name,
+                                                                      movie_year=movie_year,
+                                                                      raw_title=item.name,
+                                                                      session=task.session)
+                            item.imdb_checked = True
+                        except plugin.PluginError as e:
+                            log.trace('%s lookup failed (%s)' % (item.name, e.value))
+                            incompatible_files += 1
                             continue
-                        if imdb_id is not None:
-                            log.trace('adding: %s' % imdb_id)
-                            path_ids[imdb_id] = movie.quality
-                    except plugin.PluginError as e:
-                        log.trace('%s lookup failed (%s)' % (item, e.value))
-                        incompatible_files += 1
+                    if item.imdb_id in path_ids:
+                        log.trace('duplicate %s' % item.name)
+                        continue
+                    if item.imdb_id is not None:
+                        log.trace('adding: %s' % item.imdb_id)
+                        path_ids[item.imdb_id] = movie_quality
                 else:
-                    path_ids[movie.name] = movie.quality
-                    log.trace('adding: %s' % movie.name)
+                    path_ids[movie_name] = movie_quality
+                    log.trace('adding: %s' % movie_name)
 
-            # store to cache and extend to found list
-            self.cache[folder] = path_ids
             qualities.update(path_ids)
 
         log.debug('-- Start filtering entries ----------------------------------')
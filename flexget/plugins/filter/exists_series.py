@@ -9,17 +9,16 @@ from path import Path
 from flexget import plugin
 from flexget.event import event
 from flexget.config_schema import one_or_more
-from flexget.utils.log import log_once
+from flexget.utils import library_index
 from flexget.utils.template import RenderError
-from flexget.plugins.parsers import ParseWarning
-from flexget.plugin import get_plugin_by_name
 
 log = logging.getLogger('exists_series')
 
 
 class FilterExistsSeries(object):
     """
-    Intelligent series aware exists rejecting.
+    Intelligent series aware exists rejecting. Contents of the paths are kept in a persistent index, so only
+    directories which changed since the previous run are scanned again.
 
     Example::
 
@@ -73,52 +72,45 @@ class FilterExistsSeries(object):
             log.warning('No accepted entries have series information. exists_series cannot filter them')
             return
 
-        # scan through
+        # Index each path once, then look for episodes of each series in the index
         # For speed, only test accepted entries since our priority should be after everything is accepted.
+        folders = []
+        for folder in paths:
+            folder = Path(folder).expanduser()
+            if not folder.isdir():
+                log.warning('Directory %s does not exist', folder)
+                continue
+            folders.append(library_index.refresh(folder, session=task.session))
+
         for series in accepted_series:
-            # make new parser from parser in entry
             series_parser = accepted_series[series][0]['series_parser']
-            for folder in paths:
-                folder = Path(folder).expanduser()
-                if not folder.isdir():
-                    log.warning('Directory %s does not exist', folder)
-                    continue
-
-                for filename in folder.walk(errors='ignore'):
-                    # run parser on filename data
-                    try:
-                        disk_parser = get_plugin_by_name('parsing').instance.parse_series(data=filename.name,
-                                                                                          name=series_parser.name)
-                    except ParseWarning as pw:
-                        disk_parser = pw.parsed
-                        log_once(pw.value, logger=log)
-                    if disk_parser.valid:
-                        log.debug('name %s is same series as %s', filename.name, series)
-                        log.debug('disk_parser.identifier = %s', disk_parser.identifier)
-                        log.debug('disk_parser.quality = %s', disk_parser.quality)
-                        log.debug('disk_parser.proper_count = %s', disk_parser.proper_count)
-
-                        for entry in accepted_series[series]:
-                            log.debug('series_parser.identifier = %s', entry['series_parser'].identifier)
-                            if disk_parser.identifier != entry['series_parser'].identifier:
-                                log.trace('wrong identifier')
-                                continue
-                            log.debug('series_parser.quality = %s', entry['series_parser'].quality)
-                            if config.get('allow_different_qualities') == 'better':
-                                if entry['series_parser'].quality > disk_parser.quality:
-                                    log.trace('better quality')
-                                    continue
-                            elif config.get('allow_different_qualities'):
-                                if disk_parser.quality != entry['series_parser'].quality:
-                                    log.trace('wrong quality')
-                                    continue
-                            log.debug('entry parser.proper_count = %s', entry['series_parser'].proper_count)
-                            if disk_parser.proper_count >= entry['series_parser'].proper_count:
-                                entry.reject('proper already exists')
+            for folder in folders:
+                episodes = library_index.series_episodes(folder, series_parser.name, session=task.session)
+                for identifier, quality, proper_count in episodes:
+                    log.debug('found %s %s in %s (quality %s, proper count %s)',
+                              series, identifier, folder, quality, proper_count)
+
+                    for entry in accepted_series[series]:
+                        log.debug('series_parser.identifier = %s', entry['series_parser'].identifier)
+                        if identifier != entry['series_parser'].identifier:
+                            log.trace('wrong identifier')
+                            continue
+                        log.debug('series_parser.quality = %s', entry['series_parser'].quality)
+                        if config.get('allow_different_qualities') == 'better':
+                            if entry['series_parser'].quality > quality:
+                                log.trace('better quality')
                                 continue
-                            else:
-                                log.trace('new one is better proper, allowing')
+                        elif config.get('allow_different_qualities'):
+                            if quality != entry['series_parser'].quality:
+                                log.trace('wrong quality')
                                 continue
+                        log.debug('entry parser.proper_count = %s', entry['series_parser'].proper_count)
+                        if proper_count >= entry['series_parser'].proper_count:
+                            entry.reject('proper already exists')
+                            continue
+                        else:
+                            log.trace('new one is better proper, allowing')
+                            continue
 
 
 @event('plugin.register')
@@ -4,7 +4,6 @@ from future.moves import builtins
 
 import logging
 import datetime
-from copy import copy
 
 from jinja2 import UndefinedError
 
@@ -12,7 +11,7 @@ from flexget import plugin
 from flexget.event import event
 from flexget.task import Task
 from flexget.entry import Entry
-from flexget.utils.template import evaluate_expression
+from flexget.utils.template import evaluate_expression, RenderContext
 
 log = logging.getLogger('if')
 
@@ -38,12 +37,11 @@ class FilterIf(object):
     def check_condition(self, condition, entry):
         """Checks if a given `entry` passes `condition`"""
         # Make entry fields and other utilities available in the eval namespace
-        # We need our namespace to be an Entry instance for lazy loading to work
-        eval_locals = copy(entry)
-        eval_locals.update({'has_field': lambda f: f in entry,
-                            'timedelta': datetime.timedelta,
-                            'utcnow': datetime.datetime.utcnow(),
-                            'now': datetime.datetime.now()})
+        # Entry fields are not copied, lazy ones are only looked up if the condition uses them
+        eval_locals = RenderContext(entry.store, {'has_field': lambda f: f in entry,
+                                                  'timedelta': datetime.timedelta,
+                                                  'utcnow': datetime.datetime.utcnow(),
+                                                  'now': datetime.datetime.now()})
         try:
             # Restrict eval namespace to have no globals and locals only from eval_locals
             passed = evaluate_expression(condition, eval_locals)
@@ -93,8 +91,11 @@ class FilterIf(object):
                         if method:
                             methods[method] = (fake_task, plugin_config)
                     # Run the methods in priority order
-                    for method in sorted(methods, reverse=True):
-                        method(*methods[method])
+                    try:
+                        for method in sorted(methods, reverse=True):
+                            method(*methods[method])
+                    finally:
+                        fake_task.session = None
 
         handle_phase.priority = 80
         return handle_phase
@@ -9,6 +9,7 @@ from flexget import plugin
 from flexget.config_schema import one_or_more
 from flexget.entry import Entry
 from flexget.event import event
+from flexget.utils.tools import RegexpMatcher
 
 from future.moves.urllib.parse import unquote
 
@@ -162,6 +163,24 @@ class FilterRegexp(object):
                 log.debug('Rest method %s for %s' % (config['rest'], entry['title']))
                 rest_method(entry, 'regexp `rest`')
 
+    def field_values(self, entry, field, eval_lazy):
+        """
+        :param entry: Entry instance
+        :param field: Name of the field
+        :param eval_lazy: Whether lazy fields should be evaluated
+        :return: List of strings in `field` to search from, empty if the field is not set
+        """
+        if not entry.get(field, eval_lazy=eval_lazy):
+            return []
+        # Make all fields into lists for search purposes
+        values = entry[field]
+        if not isinstance(values, list):
+            values = [values]
+        values = [value if isinstance(value, basestring) else str(value) for value in values]
+        if field in ['url']:
+            values = [unquote(value) for value in values]
+        return values
+
     def matches(self, entry, regexp, find_from=None, not_regexps=None):
         """
         Check if :entry: has any string fields or strings in a list field that match :regexp:
@@ -172,21 +191,9 @@ class FilterRegexp(object):
         :param not_regexps: None or list of regexps that can NOT match
         :return: Field matching
         """
-        unquote_fields = ['url']
         for field in find_from or ['title', 'description']:
             # Only evaluate lazy fields if find_from has been explicitly specified
-            if not entry.get(field, eval_lazy=find_from):
-                continue
-            # Make all fields into lists for search purposes
-            values = entry[field]
-            if not isinstance(values, list):
-                values = [values]
-            for value in values:
-                if not isinstance(value, basestring):
-                    value = str(value)
-                if field in unquote_fields:
-                    value = unquote(value)
-                    # If none of the not_regexps match
+            for value in self.field_values(entry, field, bool(find_from)):
                 if regexp.search(value):
                     # Make sure the not_regexps do not match for this field
                     for not_regexp in not_regexps or []:
@@ -208,13 +215,44 @@ class FilterRegexp(object):
         rest = []
         method = Entry.accept if 'accept' in operation else Entry.reject
         match_mode = 'excluding' not in operation
+        regexps = [list(regexp_opts.items())[0] for regexp_opts in regexps]
+        # Regexps searching from the same fields share a matcher, which tests a value against all of them at once
+        groups = {}
+        for position, (regexp, opts) in enumerate(regexps):
+            groups.setdefault(tuple(opts.get('from') or ()), []).append(position)
+        matchers = dict((find_from, RegexpMatcher(regexps[position][0] for position in positions))
+                        for find_from, positions in groups.items())
+        # And the `not` regexps of each regexp
+        not_matchers = dict((position, RegexpMatcher(opts['not']))
+                            for position, (regexp, opts) in enumerate(regexps) if opts.get('not'))
         for entry in task.entries:
             log.trace('testing %i regexps to %s' % (len(regexps), entry['title']))
-            for regexp_opts in regexps:
-                regexp, opts = list(regexp_opts.items())[0]
+            # Values and matching regexps per (from, field), only read and searched for once needed
+            values = {}
+            hits = {}
+
+            def matched_field(position):
+                regexp, opts = regexps[position]
+                find_from = tuple(opts.get('from') or ())
+                for field in find_from or ('title', 'description'):
+                    key = find_from, field
+                    if key not in hits:
+                        # Only evaluate lazy fields if find_from has been explicitly specified
+                        values[key] = self.field_values(entry, field, bool(find_from))
+                        positions = groups[find_from]
+                        hits[key] = set(positions[i] for i in matchers[find_from].matching(values[key]))
+                    if position not in hits[key]:
+                        continue
+                    # Make sure the not_regexps do not match for this field
+                    not_matched = not_matchers[position].matching(values[key]) if position in not_matchers else []
+                    if not_matched:
+                        entry.trace('Configured not_regexp %s matched, ignored' % opts['not'][not_matched[0]])
+                        continue
+                    return field
 
+            for position, (regexp, opts) in enumerate(regexps):
                 # check if entry matches given regexp configuration
-                field = self.matches(entry, regexp, opts.get('from'), opts.get('not'))
+                field = matched_field(position)
 
                 # Run if we are in match mode and have a hit, or are in non-match mode and don't have a hit
                 if match_mode == bool(field):
@@ -228,8 +266,8 @@ class FilterRegexp(object):
                     if opts.get('set'):
                         # invoke set plugin with given configuration
                         log.debug('adding set: info to entry:"%s" %s' % (entry['title'], opts['set']))
-                        set = plugin.get_plugin_by_name('set')
-                        set.instance.modify(entry, opts['set'])
+                        set_plugin = plugin.get_plugin_by_name('set')
+                        set_plugin.instance.modify(entry, opts['set'])
                     method(entry, matchtext)
                     # We had a match so break out of the regexp loop.
                     break
@@ -6,17 +6,17 @@ from past.builtins import basestring
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import Column, Integer, String, Unicode, DateTime, ForeignKey, and_, Index
+from sqlalchemy import Column, Integer, String, Unicode, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relation
 
 from flexget import db_schema, plugin
 from flexget.event import event
 from flexget.manager import Session
-from flexget.utils.sqlalchemy_utils import table_columns, table_add_column
-from flexget.utils.tools import parse_timedelta
+from flexget.utils.sqlalchemy_utils import table_columns, table_add_column, create_index
+from flexget.utils.tools import parse_timedelta, chunked
 
 log = logging.getLogger('remember_rej')
-Base = db_schema.versioned_base('remember_rejected', 3)
+Base = db_schema.versioned_base('remember_rejected', 4)
 
 
 @db_schema.upgrade('remember_rejected')
@@ -38,6 +38,11 @@ def upgrade(ver, session):
         log.info('Adding expires column to remember_rejected_entry table.')
         table_add_column('remember_rejected_entry', 'expires', DateTime, session)
         ver = 3
+    if ver == 3:
+        log.info('Creating indexes on remember_rejected_entry table.')
+        create_index('remember_rejected_entry', session, 'added')
+        create_index('remember_rejected_entry', session, 'expires')
+        ver = 4
     return ver
 
 
@@ -54,8 +59,8 @@ class RememberEntry(Base):
     __tablename__ = 'remember_rejected_entry'
 
     id = Column(Integer, primary_key=True)
-    added = Column(DateTime, default=datetime.now)
-    expires = Column(DateTime)
+    added = Column(DateTime, default=datetime.now, index=True)
+    expires = Column(DateTime, index=True)
     title = Column(Unicode)
     url = Column(String)
     rejected_by = Column(String)
@@ -106,20 +111,26 @@ class FilterRememberRejected(object):
     @plugin.priority(255)
     def on_task_filter(self, task, config):
         """Reject any remembered entries from previous runs"""
+        # We don't record or reject any entries without url
+        entries = [entry for entry in task.entries if entry.get('url')]
+        if not entries:
+            return
         with Session() as session:
             (task_id,) = session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
-            reject_entries = session.query(RememberEntry).filter(RememberEntry.task_id == task_id)
-            if reject_entries.count():
-                # Reject all the remembered entries
-                for entry in task.entries:
-                    if not entry.get('url'):
-                        # We don't record or reject any entries without url
-                        continue
-                    reject_entry = reject_entries.filter(and_(RememberEntry.title == entry['title'],
-                                                              RememberEntry.url == entry['original_url'])).first()
-                    if reject_entry:
-                        entry.reject('Rejected on behalf of %s plugin: %s' %
-                                     (reject_entry.rejected_by, reject_entry.reason))
+            # Load the remembered entries matching titles in the task at once, and match urls in memory
+            remembered = {}
+            titles = list(set(entry['title'] for entry in entries))
+            for chunk in chunked(titles):
+                query = session.query(RememberEntry.title, RememberEntry.url, RememberEntry.rejected_by,
+                                      RememberEntry.reason). \
+                    filter(RememberEntry.task_id == task_id).filter(RememberEntry.title.in_(chunk))
+                for title, url, rejected_by, reason in query:
+                    remembered.setdefault((title, url), (rejected_by, reason))
+        # Reject all the remembered entries
+        for entry in entries:
+            reject_entry = remembered.get((entry['title'], entry['original_url']))
+            if reject_entry:
+                entry.reject('Rejected on behalf of %s plugin: %s' % reject_entry)
 
     def on_entry_reject(self, entry, remember=None, remember_time=None, **kwargs):
         # We only remember rejections that specify the remember keyword argument
@@ -139,15 +150,16 @@ class FilterRememberRejected(object):
 
     @plugin.priority(-255)
     def on_task_learn(self, task, config):
+        remember_entries = [entry for entry in task.all_entries if entry.get('remember_rejected')]
+        if not remember_entries:
+            return
         with Session() as session:
-            for entry in task.all_entries:
-                if not entry.get('remember_rejected'):
-                    continue
+            (remember_task_id,) = session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
+            for entry in remember_entries:
                 expires = None
                 if isinstance(entry['remember_rejected'], timedelta):
                     expires = datetime.now() + entry['remember_rejected']
 
-                (remember_task_id,) = session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
                 session.add(RememberEntry(title=entry['title'], url=entry['original_url'], task_id=remember_task_id,
                                           rejected_by=entry.get('rejected_by'), reason=entry.get('reason'),
                                           expires=expires))
@@ -155,8 +167,9 @@ class FilterRememberRejected(object):
 
 @event('manager.db_cleanup')
 def db_cleanup(manager, session):
-    # Remove entries older than 30 days
-    result = session.query(RememberEntry).filter(RememberEntry.added < datetime.now() - timedelta(days=30)).delete()
+    # Remove expired entries, and entries older than 30 days. Both columns are indexed.
+    result = session.query(RememberEntry).filter(RememberEntry.expires < datetime.now()).delete()
+    result += session.query(RememberEntry).filter(RememberEntry.added < datetime.now() - timedelta(days=30)).delete()
     if result:
         log.verbose('Removed %d entries from remember rejected table.' % result)
 
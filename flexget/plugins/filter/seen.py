@@ -12,9 +12,10 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from past.builtins import basestring
 
 import logging
+import threading
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, Index
+from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, Index, func
 from sqlalchemy.orm import relation
 from sqlalchemy.schema import ForeignKey
 
@@ -24,6 +25,7 @@ from flexget.manager import Session
 from flexget.utils.database import with_session
 from flexget.utils.imdb import extract_id
 from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
+from flexget.utils.tools import chunked, BloomFilter
 
 log = logging.getLogger('seen')
 Base = db_schema.versioned_base('seen', 4)
@@ -189,6 +191,90 @@ def search_by_field_values(field_value_list, task_name, local=False, session=Non
     return found.first()
 
 
+@with_session
+def search_by_field_values_many(field_values, task_name, local=False, session=None):
+    """
+    Bulk version of :func:`search_by_field_values`, looks up many values with a few queries.
+
+    :param field_values: Iterable of field values to match
+    :param task_name: Name of task to compare to in case local flag is sent
+    :param local: Local flag
+    :param session: Current session
+    :return: Dict mapping found values to (SeenField, SeenEntry) tuples
+    """
+    found = {}
+    for chunk in chunked(list(set(field_values))):
+        query = session.query(SeenField, SeenEntry).join(SeenEntry).filter(SeenField.value.in_(chunk))
+        if local:
+            query = query.filter(SeenEntry.task == task_name)
+        else:
+            # Entries added from CLI were having local marked as None rather than False for a while gh#879
+            query = query.filter(or_(SeenEntry.local == False, SeenEntry.local == None))
+        for seen_field, seen_entry in query:
+            found.setdefault(seen_field.value, (seen_field, seen_entry))
+    return found
+
+
+class SeenPrefilter(object):
+    """
+    Bloom filter of all remembered field values, values it doesn't contain have never been seen and don't need to be
+    looked up from the database. Kept for the lifetime of the process. Rows added to the database since the last
+    update, by any means, are picked up incrementally by their id. Forgotten values stay in the filter until it is
+    rebuilt, which only costs a database lookup.
+    """
+
+    error_rate = 0.01
+
+    def __init__(self):
+        self.bloom = None
+        self.lock = threading.Lock()
+        # Database the filter was built from, and the last row added to the filter
+        self.bind = None
+        self.max_id = 0
+        self.max_value = None
+
+    def update(self, session):
+        with self.lock:
+            last_value = session.query(SeenField.value).filter(SeenField.id == self.max_id).scalar()
+            if self.bloom is None or session.get_bind() is not self.bind or last_value != self.max_value:
+                # First use, or table has been modified other than by adding rows (ie. reset) since
+                self.rebuild(session)
+                return
+            new_values = session.query(SeenField.id, SeenField.value).filter(SeenField.id > self.max_id). \
+                order_by(SeenField.id)
+            for field_id, value in new_values.yield_per(10000):
+                self.add(field_id, value)
+            if len(self.bloom) > self.bloom.capacity:
+                # Too many values for the size of the filter, false positives would become frequent
+                self.rebuild(session)
+
+    def rebuild(self, session):
+        count = session.query(func.count(SeenField.id)).scalar()
+        log.debug('building seen prefilter for %s values', count)
+        self.bloom = BloomFilter(capacity=max(10000, count * 2), error_rate=self.error_rate)
+        self.bind = session.get_bind()
+        self.max_id = 0
+        self.max_value = None
+        for field_id, value in session.query(SeenField.id, SeenField.value).order_by(SeenField.id).yield_per(10000):
+            self.add(field_id, value)
+
+    def add(self, field_id, value):
+        self.bloom.add(value)
+        self.max_id = field_id
+        self.max_value = value
+
+    def filter(self, values, session):
+        """
+        :param values: Iterable of field values
+        :return: List of the values which may have been seen
+        """
+        self.update(session)
+        return [value for value in values if value in self.bloom]
+
+
+prefilter = SeenPrefilter()
+
+
 class FilterSeen(object):
     """
         Remembers previously downloaded content and rejects them in
@@ -208,7 +294,8 @@ class FilterSeen(object):
                  'fields': {'type': 'array',
                             'items': {'type': 'string'},
                             "minItems": 1,
-                            "uniqueItems": True}
+                            "uniqueItems": True},
+                 'bloom_filter': {'type': 'boolean'}
              }}
         ]
     }
@@ -244,8 +331,9 @@ class FilterSeen(object):
         fields = config.get('fields')
         local = config.get('local')
 
+        # construct lists of values looked for each entry, and look them all up at once
+        entry_values = []
         for entry in task.entries:
-            # construct list of values looked
             values = []
             for field in fields:
                 if field not in entry:
@@ -253,16 +341,24 @@ class FilterSeen(object):
                 if entry[field] not in values and entry[field]:
                     values.append(str(entry[field]))
             if values:
-                log.trace('querying for: %s' % ', '.join(values))
-                # check if SeenField.value is any of the values
-                found = search_by_field_values(field_value_list=values, task_name=task.name, local=local,
-                                               session=task.session)
-                if found:
+                entry_values.append((entry, values))
+        all_values = set(value for _, values in entry_values for value in values)
+        if config.get('bloom_filter'):
+            all_values = prefilter.filter(all_values, task.session)
+        log.trace('querying for %s values', len(all_values))
+        # check if SeenField.value is any of the values
+        found_values = search_by_field_values_many(all_values, task_name=task.name, local=local,
+                                                   session=task.session)
+
+        for entry, values in entry_values:
+            for value in values:
+                if value in found_values:
+                    found, se = found_values[value]
                     log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], found.value))
-                    se = task.session.query(SeenEntry).filter(SeenEntry.id == found.seen_entry_id).one()
                     entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
                                  (found.field, found.value, se.task, se.added.strftime('%Y-%m-%d %H:%M')),
                                  remember=remember_rejected)
+                    break
 
     def on_task_learn(self, task, config):
         """Remember succeeded entries"""
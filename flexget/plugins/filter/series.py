@@ -18,6 +18,7 @@ from sqlalchemy import (
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.hybrid import Comparator, hybrid_property
 from sqlalchemy.orm import relation, backref, object_session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from flexget import db_schema, options, plugin
 from flexget.config_schema import one_or_more
@@ -25,6 +26,7 @@ from flexget.event import event, fire_event
 from flexget.manager import Session
 from flexget.plugin import get_plugin_by_name
 from flexget.plugins.parsers import SERIES_ID_TYPES
+from flexget.plugins.parsers.parser_common import default_ignore_prefixes
 from flexget.utils import qualities
 from flexget.utils.database import quality_property, with_session
 from flexget.utils.log import log_once
@@ -32,7 +34,8 @@ from flexget.utils.sqlalchemy_utils import (
     table_columns, table_exists, drop_tables, table_schema, table_add_column, create_index
 )
 from flexget.utils.tools import (
-    merge_dict_from_to, parse_timedelta, parse_episode_identifier, get_config_as_array, chunked
+    merge_dict_from_to, parse_timedelta, parse_episode_identifier, get_config_as_array, chunked, get_config_hash,
+    ReList, LRUCache
 )
 
 SCHEMA_VER = 14
@@ -998,6 +1001,92 @@ def store_parser(session, parser, series=None, quality=None):
     return releases
 
 
+def store_parsers(session, items):
+    """
+    Batched version of :func:`store_parser`. Pushes releases of many series into database with a few queries.
+
+    :param session: Database session to use
+    :param items: List of (series, parser, quality) tuples. Series must already have an id, quality may be None
+        to use the quality from the series parser.
+    :return: List with the list of releases for each item
+    """
+    # Load existing episodes and seasons, with their releases, for all items at once
+    entities = {}
+    for table, season_pack in ((Episode, False), (Season, True)):
+        series_ids = set()
+        identifiers = set()
+        for series, parser, _ in items:
+            if bool(parser.season_pack) == season_pack:
+                series_ids.add(series.id)
+                identifiers.update(parser.identifiers)
+        for series_chunk in chunked(list(series_ids)):
+            for identifier_chunk in chunked(list(identifiers)):
+                query = session.query(table).filter(table.series_id.in_(series_chunk)). \
+                    filter(table.identifier.in_(identifier_chunk)).options(joinedload('releases'))
+                for entity in query.all():
+                    key = (season_pack, entity.series_id, entity.identifier, entity.season if season_pack else None)
+                    entities.setdefault(key, entity)
+                    # Populate the reverse side of the relation, so accessing it later doesn't need a query
+                    for release in entity.releases:
+                        set_committed_value(release, 'season' if season_pack else 'episode', entity)
+
+    result = []
+    for series, parser, quality in items:
+        if quality is None:
+            quality = parser.quality
+        releases = []
+        for ix, identifier in enumerate(parser.identifiers):
+            key = (bool(parser.season_pack), series.id, identifier, parser.season if parser.season_pack else None)
+            entity = entities.get(key)
+            if parser.season_pack:
+                table = SeasonRelease
+                if not entity:
+                    log.debug('adding season `%s` into series `%s`', identifier, parser.name)
+                    entity = Season()
+                    entity.identifier = identifier
+                    entity.identified_by = parser.id_type
+                    entity.season = parser.season
+                    entity.series = series
+                    session.add(entity)
+                    log.debug('-> added season `%s`', entity)
+            else:
+                table = EpisodeRelease
+                if not entity:
+                    log.debug('adding episode `%s` into series `%s`', identifier, parser.name)
+                    entity = Episode()
+                    entity.identifier = identifier
+                    entity.identified_by = parser.id_type
+                    # if episodic format
+                    if parser.id_type == 'ep':
+                        entity.season = parser.season
+                        entity.number = parser.episode + ix
+                    elif parser.id_type == 'sequence':
+                        entity.season = 0
+                        entity.number = parser.id + ix
+                    entity.series = series
+                    session.add(entity)
+                    log.debug('-> added `%s`', entity)
+            entities[key] = entity
+
+            # if release does not exists in episode or season, add new
+            for release in entity.releases:
+                if release.title == parser.data and release.quality == quality and \
+                        release.proper_count == parser.proper_count:
+                    break
+            else:
+                log.debug('adding release `%s`', parser)
+                release = table()
+                release.quality = quality
+                release.proper_count = parser.proper_count
+                release.title = parser.data
+                entity.releases.append(release)
+                log.debug('-> added `%s`', release)
+            releases.append(release)
+        result.append(releases)
+    session.flush()  # Make sure autonumber ids are populated
+    return result
+
+
 def set_series_begin(series, ep_id):
     """
     Set beginning for series
@@ -1343,6 +1432,82 @@ def populate_entry_fields(entry, parser, config):
             set.instance.modify(entry, config.get('set'))
 
 
+class SeriesMatcher(object):
+    """
+    Finds the configured series an entry title could belong to, in a single pass over the title.
+
+    Series names and alternate names are matched like the series parsers match them (at the start of the title,
+    after an optional ignored prefix), but with all separator characters removed. The result is a superset of the
+    series the parser would accept, candidates still need to be parsed. Series using `name_regexp` are matched with
+    their own regexps.
+    """
+
+    blank = re.compile(r'(?:[^\w&]|_)+', re.UNICODE)
+    ignore_prefix = re.compile('|'.join(default_ignore_prefixes), re.IGNORECASE | re.UNICODE)
+
+    def __init__(self, config):
+        """
+        :param list config: Prepared series config, list of {series_name: series_config} items.
+        """
+        # Character trie of normalized names, the indexes of series ending at a node are stored under the `None` key
+        self.trie = {}
+        # Series which would match any title
+        self.match_all = set()
+        # List of (series index, ReList of name regexps)
+        self.regexps = []
+        for index, series_item in enumerate(config):
+            series_name, series_config = list(series_item.items())[0]
+            name_regexps = get_config_as_array(series_config, 'name_regexp')
+            if name_regexps:
+                self.regexps.append((index, ReList(name_regexps)))
+                continue
+            for name in [str(series_name)] + get_config_as_array(series_config, 'alternate_name'):
+                for key in self.name_keys(str(name)):
+                    if not key:
+                        self.match_all.add(index)
+                        continue
+                    node = self.trie
+                    for char in key:
+                        node = node.setdefault(char, {})
+                    node.setdefault(None, set()).add(index)
+
+    def name_keys(self, name):
+        """Returns the normalized forms of `name`, following the rules of `name_to_re`."""
+        if name.endswith(')'):
+            p_start = name.rfind('(')
+            if p_start != -1:
+                # The parenthetical part is optional when matching
+                name = name[:p_start - 1]
+        keys = ['']
+        for token in self.blank.split(name):
+            # accept either '&' or 'and'
+            options = ['and', '&'] if token.lower() in ('and', '&') else [token.lower()]
+            keys = [key + option for key in keys for option in options]
+        return set(keys)
+
+    def candidates(self, title):
+        """
+        :param title: Entry title
+        :return: Set of indexes (in series config) of series which may match `title`.
+        """
+        found = set(self.match_all)
+        keys = [self.blank.sub('', title).lower()]
+        prefix = self.ignore_prefix.match(title)
+        if prefix:
+            keys.append(self.blank.sub('', title[prefix.end():]).lower())
+        for key in keys:
+            node = self.trie
+            for char in key:
+                node = node.get(char)
+                if node is None:
+                    break
+                found.update(node.get(None, ()))
+        for index, regexps in self.regexps:
+            if index not in found and any(regexp.search(title) for regexp in regexps):
+                found.add(index)
+        return found
+
+
 class FilterSeriesBase(object):
     """
     Class that contains helper methods for both filter.series as well as plugins that configure it,
@@ -1571,6 +1736,8 @@ class FilterSeries(FilterSeriesBase):
         }
 
     def __init__(self):
+        # Maps config hashes to SeriesMatcher instances, tasks usually have their own series configs
+        self._matchers = LRUCache(maxsize=100)
         try:
             self.backlog = plugin.get_plugin_by_name('backlog')
         except plugin.DependencyError:
@@ -1600,21 +1767,14 @@ class FilterSeries(FilterSeriesBase):
         config = self.prepare_config(config)
         self.auto_exact(config)
 
-        parser = get_plugin_by_name('parsing').instance
-
         start_time = time.clock()
 
-        # Sort Entries into data model similar to https://en.wikipedia.org/wiki/Trie
-        # Only process series if both the entry title and series title first letter match
-        entries_map = defaultdict(list)
+        # Route entries to the series they may belong to, so that only plausible pairs are sent to the parser
+        matcher = self.get_matcher(config)
+        series_entries = defaultdict(list)
         for entry in task.entries:
-            parsed = parser.parse_series(entry['title'])
-            if parsed.name:
-                entries_map[parsed.name[:1].lower()].append(entry)
-            else:
-                # If parsing failed, use first char of each word in the entry title
-                for word in entry['title'].replace(' ', '.').split('.'):
-                    entries_map[word[:1].lower()].append(entry)
+            for index in matcher.candidates(entry['title']):
+                series_entries[index].append(entry)
 
         with Session() as session:
             # Preload series
@@ -1633,19 +1793,24 @@ class FilterSeries(FilterSeriesBase):
 
             existing_db_series = {s.name_normalized: s for s in existing_db_series}
 
-            for series_item in config:
+            for index, series_item in enumerate(config):
                 series_name, series_config = list(series_item.items())[0]
-                alt_names = get_config_as_array(series_config, 'alternate_name')
                 db_series = existing_db_series.get(normalize_series_name(series_name))
                 db_identified_by = db_series.identified_by if db_series else None
-                letters = set([series_name[:1].lower()] + [normalize_series_name(series_name)[:1].lower()] +
-                              [alt[:1].lower() for alt in alt_names])
-                entries = set([entry for letter in letters for entry in entries_map.get(letter, [])])
+                entries = series_entries.get(index)
                 if entries:
                     self.parse_series(entries, series_name, series_config, db_identified_by)
 
         log.debug('series on_task_metainfo took %s to parse', time.clock() - start_time)
 
+    def get_matcher(self, config):
+        """Returns a :class:`SeriesMatcher` for `config`, only built again when the config changes."""
+        config_hash = get_config_hash(config)
+        matcher = self._matchers.get(config_hash)
+        if matcher is None:
+            matcher = self._matchers[config_hash] = SeriesMatcher(config)
+        return matcher
+
     def on_task_filter(self, task, config):
         """Filter series"""
         # Parsing was done in metainfo phase, create the dicts to pass to process_series from the task entries
@@ -1658,20 +1823,22 @@ class FilterSeries(FilterSeriesBase):
             if entry.get('series_name') and entry.get('series_id') is not None and entry.get('series_parser'):
                 found_series.setdefault(entry['series_name'], []).append(entry)
 
-        # Prefetch series
+        start_time = time.clock()
+        # Everything is done in a single transaction, all needed rows are loaded with a few bulk queries
         with Session() as session:
             # str() added to make sure number shows (e.g. 24) are turned into strings
             series_names = [str(list(s.keys())[0]) for s in config]
-            existing_series = session.query(Series) \
-                .filter(Series.name.in_(series_names)) \
-                .options(joinedload('alternate_names')).all()
-            existing_series_map = dict([(s.name_normalized, s) for s in existing_series])
-            # Expunge so we can work on de-attached while processing the series to minimize db locks
-            session.expunge_all()
-
-        start_time = time.clock()
-        for series_item in config:
-            with Session() as session:
+            existing_series_map = {}
+            for chunk in chunked(series_names):
+                existing_series = session.query(Series) \
+                    .filter(Series.name.in_(chunk)) \
+                    .options(joinedload('alternate_names')).all()
+                existing_series_map.update((s.name_normalized, s) for s in existing_series)
+
+            # List of (series_name, series_config, db_series) to process
+            process = []
+            new_series = []
+            for series_item in config:
                 series_name, series_config = list(series_item.items())[0]
 
                 if series_config.get('parse_only'):
@@ -1688,33 +1855,35 @@ class FilterSeries(FilterSeriesBase):
                     db_series.identified_by = series_config.get('identified_by', 'auto')
                     session.add(db_series)
                     log.debug('-> added `%s`', db_series)
-                    session.flush()  # Flush to get an id on series before adding alternate names.
+                    new_series.append((series_name, series_config, db_series))
+                    existing_series_map[db_series.name_normalized] = db_series
+                process.append((series_name, series_config, db_series))
+
+            if new_series:
+                session.flush()  # Flush to get an id on series before adding alternate names.
+                for series_name, series_config, db_series in new_series:
                     alts = series_config.get('alternate_name', [])
                     if not isinstance(alts, list):
                         alts = [alts]
                     for alt in alts:
                         _add_alt_name(alt, db_series, series_name, session)
-                    existing_series_map[db_series.name_normalized] = db_series
-                else:
-                    # Add existing series back to session
-                    session.add(db_series)
-
-                # Skip if series not within entries
-                if series_name not in found_series:
-                    continue
 
-                series_entries = {}
-                for entry in found_series[series_name]:
-                    # store found episodes into database and save reference for later use
-                    releases = store_parser(session, entry['series_parser'], series=db_series,
-                                            quality=entry.get('quality'))
-                    entry['series_releases'] = [r.id for r in releases]
-                    if hasattr(releases[0], 'episode'):
-                        entity = releases[0].episode
-                    else:
-                        entity = releases[0].season
-                    series_entries.setdefault(entity, []).append(entry)
+            # store found episodes into database and save reference for later use
+            found_entries = [(db_series, entry) for series_name, _, db_series in process
+                             for entry in found_series.get(series_name, [])]
+            stored = store_parsers(session, [(db_series, entry['series_parser'], entry.get('quality'))
+                                             for db_series, entry in found_entries])
+            series_entries_map = {}
+            for (db_series, entry), releases in zip(found_entries, stored):
+                entry['series_releases'] = [r.id for r in releases]
+                if hasattr(releases[0], 'episode'):
+                    entity = releases[0].episode
+                else:
+                    entity = releases[0].season
+                series_entries_map.setdefault(db_series, {}).setdefault(entity, []).append(entry)
 
+            for series_name, series_config, db_series in process:
+                series_entries = series_entries_map.get(db_series)
                 # If we didn't find any episodes for this series, continue
                 if not series_entries:
                     log.trace('No entries found for `%s` this run.', series_name)
@@ -1763,14 +1932,13 @@ class FilterSeries(FilterSeriesBase):
             params[id_type + '_regexps'] = get_config_as_array(config, id_type + '_regexp')
 
         parser = get_plugin_by_name('parsing').instance
-        for entry in entries:
-            # skip processed entries
-            if (entry.get('series_parser') and entry['series_parser'].valid and
-                    entry['series_parser'].name.lower() != series_name.lower()):
-                continue
-
+        # skip processed entries
+        entries = [entry for entry in entries if not (
+            entry.get('series_parser') and entry['series_parser'].valid and
+            entry['series_parser'].name.lower() != series_name.lower())]
+        parsed_entries = parser.parse_series_many([entry['title'] for entry in entries], name=series_name, **params)
+        for entry, parsed in zip(entries, parsed_entries):
             # Quality field may have been manipulated by e.g. assume_quality. Use quality field from entry if available.
-            parsed = parser.parse_series(entry['title'], name=series_name, **params)
             if not parsed.valid:
                 continue
             parsed.field = 'title'
@@ -1787,6 +1955,8 @@ class FilterSeries(FilterSeriesBase):
         :param config: Series configuration
         """
         accepted_seasons = []
+        # Latest downloaded entity of the series, looked up when first needed
+        latest = []
 
         # sort for season packs first, order by season number ascending. Uses -1 in case entity does not return a
         # season number or sort will crash
@@ -1906,8 +2076,11 @@ class FilterSeries(FilterSeriesBase):
                     log.debug('-' * 20 + ' tracking -->')
                     # Grace is number of distinct eps in the task for this series + 2
                     backfill = config.get('tracking') == 'backfill'
+                    # Downloaded releases don't change during filtering, only look up the latest one once
+                    if not latest:
+                        latest.append(get_latest_release(entity.series))
                     if self.process_entity_tracking(entity, entries, grace=len(series_entries) + 2, backfill=backfill,
-                                                    threshold=ep_threshold):
+                                                    threshold=ep_threshold, latest=latest[0]):
                         continue
 
             # quality
@@ -2028,7 +2201,7 @@ class FilterSeries(FilterSeriesBase):
             log.debug('no quality meets requirements')
         return result
 
-    def process_entity_tracking(self, entity, entries, grace, threshold, backfill=False):
+    def process_entity_tracking(self, entity, entries, grace, threshold, backfill=False, latest=None):
         """
         Rejects all entity that are too old or new, return True when this happens.
 
@@ -2037,9 +2210,9 @@ class FilterSeries(FilterSeriesBase):
         :param int grace: Number of episodes before or after latest download that are allowed.
         :param bool backfill: If this is True, previous episodes will be allowed,
             but forward advancement will still be restricted.
+        :param latest: Latest downloaded entity of the series, as returned by :func:`get_latest_release`.
         """
 
-        latest = get_latest_release(entity.series)
         if entity.series.begin and (not latest or entity.series.begin > latest):
             latest = entity.series.begin
         log.debug('latest download: %s', latest)
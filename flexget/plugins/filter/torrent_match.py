@@ -6,6 +6,7 @@ import os
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils import library_index
 from flexget.utils.tools import aggregate_inputs
 
 log = logging.getLogger('torrent_match')
@@ -36,7 +37,6 @@ class TorrentMatch(object):
     }
 
     def get_local_files(self, config, task):
-        cwd = os.getcwd()  # save the current working directory
         entries = aggregate_inputs(task, config['what'])
         for entry in entries:
             location = entry.get('location')
@@ -50,19 +50,11 @@ class TorrentMatch(object):
             if os.path.isfile(location):
                 entry['files'].append(TorrentMatchFile(location, os.path.getsize(location)))
             else:
-                # change working dir to make things simpler
-                os.chdir(location)
-                # traverse the file tree
-                for root, _, files in os.walk('.'):
-                    # we only need to iterate over files
-                    for f in files:
-                        file_path = os.path.join(root, f)
-                        # We need normpath to strip out the dot
-                        abs_file_path = os.path.normpath(os.path.join(location, file_path))
-                        entry['files'].append(TorrentMatchFile(abs_file_path, os.path.getsize(file_path)))
-
-        # restore the working directory
-        os.chdir(cwd)
+                # Unchanged directories are not listed again, their files come from the index
+                root = library_index.refresh(location, check_files=True)
+                for item in library_index.entries(root, dirs=False):
+                    path = os.path.normpath(os.path.join(location, os.path.relpath(item.path, root)))
+                    entry['files'].append(TorrentMatchFile(path, item.size))
 
         return entries
 
@@ -109,6 +109,9 @@ class InputBacklog(object):
 
     schema = {'type': 'string', 'format': 'interval'}
 
+    # Snapshots the entries of every run
+    replay_input = False
+
     @plugin.priority(-255)
     def on_task_input(self, task, config):
         # Get a list of entries to inject
@@ -4,6 +4,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 import datetime
 import logging
 import random
+import threading
 
 from sqlalchemy import Column, Integer, DateTime, Unicode, Index
 
@@ -12,7 +13,7 @@ from flexget import db_schema
 from flexget.event import event
 from flexget.manager import Session
 from flexget.plugin import get_plugin_by_name, PluginError, PluginWarning
-from flexget.utils.tools import parse_timedelta, multiply_timedelta, aggregate_inputs
+from flexget.utils.tools import parse_timedelta, multiply_timedelta, aggregate_inputs, parallel_map
 
 log = logging.getLogger('discover')
 Base = db_schema.versioned_base('discover', 0)
@@ -59,6 +60,10 @@ class Discover(object):
           - piratebay
         interval: [1 hours|days|weeks]
         release_estimations: [strict|loose|ignore]
+        max_parallel_searches: [number of searches to run at once, default 1]
+
+    Search plugins are never run concurrently with themselves unless they define a `max_parallel_searches`
+    attribute allowing it. Domain limiters of the sites are respected between concurrent searches.
     """
 
     schema = {
@@ -83,12 +88,16 @@ class Discover(object):
                     }
                 ]
             },
-            'limit': {'type': 'integer', 'minimum': 1}
+            'limit': {'type': 'integer', 'minimum': 1},
+            'max_parallel_searches': {'type': 'integer', 'minimum': 1, 'default': 1}
         },
         'required': ['what', 'from'],
         'additionalProperties': False
     }
 
+    # Inputs under `what` may emit different entries to search for on reruns
+    replay_input = False
+
     def execute_searches(self, config, entries, task):
         """
         :param config: Discover plugin config
@@ -97,40 +106,35 @@ class Discover(object):
         :return: List of entries found from search engines listed under `from` configuration
         """
 
+        searches = []
+        semaphores = {}
+        for item in config['from']:
+            if isinstance(item, dict):
+                plugin_name, plugin_config = list(item.items())[0]
+            else:
+                plugin_name, plugin_config = item, None
+            search = get_plugin_by_name(plugin_name).instance
+            if not callable(getattr(search, 'search')):
+                log.critical('Search plugin %s does not implement search method', plugin_name)
+                continue
+            # Search plugins may declare how many searches their site can handle at once, by default one at a time
+            semaphores.setdefault(plugin_name, threading.Semaphore(getattr(search, 'max_parallel_searches', 1)))
+            searches.append((plugin_name, plugin_config, search))
+
+        def run_search(job):
+            index, entry, (plugin_name, plugin_config, search) = job
+            with semaphores[plugin_name]:
+                return self.search_entry(config, task, entry, index, len(entries), plugin_name, plugin_config, search)
+
+        jobs = [(index, entry, search) for index, entry in enumerate(entries) for search in searches]
+        job_results = iter(parallel_map(run_search, jobs, max_workers=config.get('max_parallel_searches', 1)))
+
+        # Combine results in the same order as they would be searched sequentially, so sorting stays stable
         result = []
-        for index, entry in enumerate(entries):
+        for entry in entries:
             entry_results = []
-            for item in config['from']:
-                if isinstance(item, dict):
-                    plugin_name, plugin_config = list(item.items())[0]
-                else:
-                    plugin_name, plugin_config = item, None
-                search = get_plugin_by_name(plugin_name).instance
-                if not callable(getattr(search, 'search')):
-                    log.critical('Search plugin %s does not implement search method', plugin_name)
-                    continue
-                log.verbose('Searching for `%s` with plugin `%s` (%i of %i)', entry['title'], plugin_name, index + 1,
-                            len(entries))
-                try:
-                    search_results = search.search(task=task, entry=entry, config=plugin_config)
-                    if not search_results:
-                        log.debug('No results from %s', plugin_name)
-                        continue
-                    log.debug('Discovered %s entries from %s', len(search_results), plugin_name)
-                    if config.get('limit'):
-                        search_results = sorted(search_results, reverse=True,
-                                                key=lambda x: x.get('search_sort', ''))[:config['limit']]
-                    for e in search_results:
-                        e['discovered_from'] = entry['title']
-                        e['discovered_with'] = plugin_name
-                        e.on_complete(self.entry_complete, query=entry, search_results=search_results)
-
-                    entry_results.extend(search_results)
-
-                except PluginWarning as e:
-                    log.verbose('No results from %s: %s', plugin_name, e)
-                except PluginError as e:
-                    log.error('Error searching with %s: %s', plugin_name, e)
+            for _ in searches:
+                entry_results.extend(next(job_results))
             if not entry_results:
                 log.verbose('No search results for `%s`', entry['title'])
                 entry.complete()
@@ -139,6 +143,33 @@ class Discover(object):
 
         return sorted(result, reverse=True, key=lambda x: x.get('search_sort', -1))
 
+    def search_entry(self, config, task, entry, index, total, plugin_name, plugin_config, search):
+        """
+        Searches for a single entry with a single search plugin.
+
+        :return: List of entries found, empty list on error
+        """
+        log.verbose('Searching for `%s` with plugin `%s` (%i of %i)', entry['title'], plugin_name, index + 1, total)
+        try:
+            search_results = search.search(task=task, entry=entry, config=plugin_config)
+            if not search_results:
+                log.debug('No results from %s', plugin_name)
+                return []
+            log.debug('Discovered %s entries from %s', len(search_results), plugin_name)
+            if config.get('limit'):
+                search_results = sorted(search_results, reverse=True,
+                                        key=lambda x: x.get('search_sort', ''))[:config['limit']]
+            for e in search_results:
+                e['discovered_from'] = entry['title']
+                e['discovered_with'] = plugin_name
+                e.on_complete(self.entry_complete, query=entry, search_results=search_results)
+            return list(search_results)
+        except PluginWarning as e:
+            log.verbose('No results from %s: %s', plugin_name, e)
+        except PluginError as e:
+            log.error('Error searching with %s: %s', plugin_name, e)
+        return []
+
     def entry_complete(self, entry, query=None, search_results=None, **kwargs):
         """Callback for Entry"""
         if entry.accepted:
@@ -3,6 +3,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.utils import PY2
 
 import logging
+import os
 import re
 import sys
 from datetime import datetime
@@ -13,6 +14,7 @@ from flexget import plugin
 from flexget.config_schema import one_or_more
 from flexget.event import event
 from flexget.entry import Entry
+from flexget.utils import library_index
 
 log = logging.getLogger('filesystem')
 
@@ -62,6 +64,16 @@ class Filesystem(object):
           - files
           - dirs
 
+    Example 6::
+
+      filesystem:
+        path: /storage/downloads/
+        recursive: yes
+        incremental: yes  # Only files and dirs added or changed since the previous run
+
+    Incremental mode keeps an index of the paths in the database, only directories which changed since the previous
+    run are listed again. In daemon mode, with inotify_simple installed, the paths are watched between runs and nothing
+    is listed when nothing changed. Directories are followed through symlinks, but not twice through a symlink loop.
     """
     retrieval_options = ['files', 'dirs', 'symlinks']
     paths = one_or_more({'type': 'string', 'format': 'path'}, unique_items=True)
@@ -75,12 +87,17 @@ class Filesystem(object):
                  'mask': {'type': 'string'},
                  'regexp': {'type': 'string', 'format': 'regex'},
                  'recursive': {'oneOf': [{'type': 'integer', 'minimum': 2}, {'type': 'boolean'}]},
-                 'retrieve': one_or_more({'type': 'string', 'enum': retrieval_options}, unique_items=True)
+                 'retrieve': one_or_more({'type': 'string', 'enum': retrieval_options}, unique_items=True),
+                 'incremental': {'type': 'boolean'}
              },
              'required': ['path'],
              'additionalProperties': False}]
     }
 
+    def __init__(self):
+        # Index positions of the changes emitted by each task, saved once the task completes
+        self.positions = {}
+
     def prepare_config(self, config):
         from fnmatch import translate
         config = config
@@ -99,6 +116,7 @@ class Filesystem(object):
         config.setdefault('regexp', '.')
         # Sets the default retrieval option to files
         config.setdefault('retrieve', self.retrieval_options)
+        config.setdefault('incremental', False)
 
         return config
 
@@ -189,6 +207,35 @@ class Filesystem(object):
 
         return entries
 
+    def get_changed_entries(self, task, path_list, match, recursion, test_mode, get_files, get_dirs, get_symlinks):
+        entries = []
+        positions = self.positions[task.name] = []
+        max_depth = self.get_max_depth(recursion, 0)
+
+        for folder in path_list:
+            folder = Path(folder).expanduser()
+            if task.manager.is_daemon:
+                library_index.watch(folder)
+            root = library_index.refresh(folder, check_files=True,
+                                         max_depth=None if max_depth == float('inf') else max_depth)
+            changed, position = library_index.changes(root, task.name)
+            positions.append((root, position))
+            log.verbose('%s paths added or changed in %s since the previous run.' % (len(changed), folder))
+            for item in changed:
+                relative_path = os.path.relpath(item.path, root)
+                if len(relative_path.split(os.sep)) > max_depth:
+                    continue
+                path_object = folder / relative_path
+                if not match(path_object):
+                    continue
+                if (item.is_dir and get_dirs) or (item.is_link and get_symlinks) or (
+                        not item.is_dir and not item.is_link and get_files):
+                    entry = self.create_entry(path_object, test_mode)
+                    if entry and entry not in entries:
+                        entries.append(entry)
+
+        return entries
+
     def on_task_input(self, task, config):
         config = self.prepare_config(config)
 
@@ -200,9 +247,19 @@ class Filesystem(object):
         get_dirs = 'dirs' in config['retrieve']
         get_symlinks = 'symlinks' in config['retrieve']
 
+        if config['incremental']:
+            return self.get_changed_entries(task, path_list, match, recursive, test_mode, get_files, get_dirs,
+                                            get_symlinks)
         log.verbose('Starting to scan folders.')
         return self.get_entries_from_path(path_list, match, recursive, test_mode, get_files, get_dirs, get_symlinks)
 
+    def on_task_learn(self, task, config):
+        for root, position in self.positions.pop(task.name, []):
+            library_index.seen(root, task.name, position)
+
+    def on_task_abort(self, task, config):
+        self.positions.pop(task.name, None)
+
 
 @event('plugin.register')
 def register_plugin():
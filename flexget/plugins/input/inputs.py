@@ -5,6 +5,7 @@ import logging
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import run_inputs
 
 log = logging.getLogger('inputs')
 
@@ -35,40 +36,39 @@ class PluginInputs(object):
         }
     }
 
+    def replay_input(self, task, config):
+        # Only replay if every configured input can be replayed
+        return all(task.replays_input(plugin.get_plugin_by_name(input_name), input_config)
+                   for item in config for input_name, input_config in item.items())
+
     def on_task_input(self, task, config):
+        items = [i for item in config for i in item.items()]
+        results = run_inputs(task, items)
+
         entries = []
         entry_titles = set()
         entry_urls = set()
-        for item in config:
-            for input_name, input_config in item.items():
-                input = plugin.get_plugin_by_name(input_name)
-                if input.api_ver == 1:
-                    raise plugin.PluginError('Plugin %s does not support API v2' % input_name)
-
-                method = input.phase_handlers['input']
-                try:
-                    result = method(task, input_config)
-                except plugin.PluginError as e:
-                    log.warning('Error during input plugin %s: %s' % (input_name, e))
+        for (input_name, _), (succeeded, result) in zip(items, results):
+            if not succeeded:
+                continue
+            if not result:
+                msg = 'Input %s did not return anything' % input_name
+                if getattr(task, 'no_entries_ok', False):
+                    log.verbose(msg)
+                else:
+                    log.warning(msg)
+                continue
+            for entry in result:
+                if entry['title'] in entry_titles:
+                    log.debug('Title `%s` already in entry list, skipping.' % entry['title'])
                     continue
-                if not result:
-                    msg = 'Input %s did not return anything' % input_name
-                    if getattr(task, 'no_entries_ok', False):
-                        log.verbose(msg)
-                    else:
-                        log.warning(msg)
+                urls = ([entry['url']] if entry.get('url') else []) + entry.get('urls', [])
+                if any(url in entry_urls for url in urls):
+                    log.debug('URL for `%s` already in entry list, skipping.' % entry['title'])
                     continue
-                for entry in result:
-                    if entry['title'] in entry_titles:
-                        log.debug('Title `%s` already in entry list, skipping.' % entry['title'])
-                        continue
-                    urls = ([entry['url']] if entry.get('url') else []) + entry.get('urls', [])
-                    if any(url in entry_urls for url in urls):
-                        log.debug('URL for `%s` already in entry list, skipping.' % entry['title'])
-                        continue
-                    entries.append(entry)
-                    entry_titles.add(entry['title'])
-                    entry_urls.update(urls)
+                entries.append(entry)
+                entry_titles.add(entry['title'])
+                entry_urls.update(urls)
         return entries
 
 
@@ -36,6 +36,9 @@ class NextSeriesEpisodes(object):
         ]
     }
 
+    # Reruns look for the episodes following the ones accepted on previous run
+    replay_input = False
+
     def __init__(self):
         self.rerun_entries = []
 
@@ -39,6 +39,9 @@ class NextSeriesSeasons(object):
         ]
     }
 
+    # Reruns look for the seasons following the ones accepted on previous run
+    replay_input = False
+
     def __init__(self):
         self.rerun_entries = []
 
@@ -2,9 +2,11 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+import threading
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import parallel_map
 
 log = logging.getLogger('urlrewriter')
 
@@ -20,28 +22,76 @@ class UrlRewritingError(Exception):
 class PluginUrlRewriting(object):
     """
     Provides URL rewriting framework
+
+    Url rewriters are never run concurrently with themselves unless they define a `max_parallel_rewrites` attribute,
+    in which case that many entries are rewritten with them at once. Other rewriters run in the task's own thread.
     """
 
     def __init__(self):
-        self.disabled_rewriters = []
+        # Names of the rewriters disabled with `disable_urlrewriters`, by task name
+        self.disabled_rewriters = {}
+        self.semaphores = {}
+        self.semaphores_lock = threading.Lock()
+
+    def enabled_rewriters(self, task, parallel_only=False):
+        disabled = self.disabled_rewriters.get(task.name, ())
+        for urlrewriter in plugin.get_plugins(interface='urlrewriter'):
+            if urlrewriter.name in disabled:
+                log.trace('Skipping rewriter %s since it\'s disabled', urlrewriter.name)
+                continue
+            if parallel_only and getattr(urlrewriter.instance, 'max_parallel_rewrites', 1) <= 1:
+                continue
+            yield urlrewriter
+
+    def rewriter_semaphore(self, urlrewriter):
+        """Returns the semaphore limiting how many entries `urlrewriter` works on at once."""
+        with self.semaphores_lock:
+            if urlrewriter.name not in self.semaphores:
+                limit = getattr(urlrewriter.instance, 'max_parallel_rewrites', 1)
+                self.semaphores[urlrewriter.name] = threading.Semaphore(limit)
+            return self.semaphores[urlrewriter.name]
+
+    @plugin.priority(255)
+    def on_task_start(self, task, config):
+        # Kept through reruns, which may be requested during the exit phase
+        self.disabled_rewriters.pop(task.name, None)
 
     def on_task_urlrewrite(self, task, config):
         log.debug('Checking %s entries', len(task.accepted))
-        # try to urlrewrite all accepted
-        for entry in task.accepted:
+
+        def rewrite(entry, parallel_only=False):
             try:
-                self.url_rewrite(task, entry)
+                self.url_rewrite(task, entry, parallel_only=parallel_only)
             except UrlRewritingError as e:
                 log.warning(e.value)
                 entry.fail()
 
+        # Entries which a rewriter allowing it is the first to handle are rewritten several at once, with as many
+        # workers as those rewriters allow
+        entries = []
+        max_workers = 1
+        if task.manager.threadsafe_database:
+            for entry in task.accepted:
+                urlrewriter = next((urlrewriter for urlrewriter in self.enabled_rewriters(task)
+                                    if urlrewriter.instance.url_rewritable(task, entry)), None)
+                limit = getattr(urlrewriter and urlrewriter.instance, 'max_parallel_rewrites', 1)
+                if limit > 1:
+                    entries.append(entry)
+                    max_workers = max(max_workers, limit)
+        if entries:
+            parallel_map(lambda entry: rewrite(entry, parallel_only=True), entries, max_workers=max_workers)
+        # Everything left is rewritten one entry at a time in this thread
+        for entry in list(task.accepted):
+            rewrite(entry)
+
     # API method
-    def url_rewritable(self, task, entry):
-        """Return True if entry is urlrewritable by registered rewriter."""
-        for urlrewriter in plugin.get_plugins(interface='urlrewriter'):
-            if urlrewriter.name in self.disabled_rewriters:
-                log.trace('Skipping rewriter %s since it\'s disabled', urlrewriter.name)
-                continue
+    def url_rewritable(self, task, entry, parallel_only=False):
+        """
+        Return True if entry is urlrewritable by registered rewriter.
+
+        :param bool parallel_only: Only consider rewriters which allow rewriting several entries at once.
+        """
+        for urlrewriter in self.enabled_rewriters(task, parallel_only):
             log.trace('checking urlrewriter %s', urlrewriter.name)
             if urlrewriter.instance.url_rewritable(task, entry):
                 return True
@@ -49,24 +99,26 @@ class PluginUrlRewriting(object):
 
     # API method - why priority though?
     @plugin.priority(255)
-    def url_rewrite(self, task, entry):
-        """Rewrites given entry url. Raises UrlRewritingError if failed."""
+    def url_rewrite(self, task, entry, parallel_only=False):
+        """
+        Rewrites given entry url. Raises UrlRewritingError if failed.
+
+        :param bool parallel_only: Only use rewriters which allow rewriting several entries at once.
+        """
         tries = 0
-        while self.url_rewritable(task, entry) and entry.accepted:
+        while self.url_rewritable(task, entry, parallel_only) and entry.accepted:
             tries += 1
             if tries > 20:
                 raise UrlRewritingError('URL rewriting was left in infinite loop while rewriting url for %s, '
                                         'some rewriter is returning always True' % entry)
-            for urlrewriter in plugin.get_plugins(interface='urlrewriter'):
+            for urlrewriter in self.enabled_rewriters(task, parallel_only):
                 name = urlrewriter.name
-                if name in self.disabled_rewriters:
-                    log.trace('Skipping rewriter %s since it\'s disabled', name)
-                    continue
                 try:
                     if urlrewriter.instance.url_rewritable(task, entry):
                         old_url = entry['url']
                         log.debug('Url rewriting %s' % entry['url'])
-                        urlrewriter.instance.url_rewrite(task, entry)
+                        with self.rewriter_semaphore(urlrewriter):
+                            urlrewriter.instance.url_rewrite(task, entry)
                         if entry['url'] != old_url:
                             if entry.get('urls') and old_url in entry.get('urls'):
                                 entry['urls'][entry['urls'].index(old_url)] = entry['url']
@@ -90,6 +142,7 @@ class DisableUrlRewriter(object):
 
     def on_task_start(self, task, config):
         urlrewrite = plugin.get_plugin_by_name('urlrewriting')['instance']
+        disabled = urlrewrite.disabled_rewriters[task.name] = set()
         for disable in config:
             try:
                 plugin.get_plugin_by_name(disable)
@@ -97,18 +150,7 @@ class DisableUrlRewriter(object):
                 log.critical('Unknown url-rewriter %s', disable)
                 continue
             log.debug('Disabling url rewriter %s', disable)
-            urlrewrite.disabled_rewriters.append(disable)
-
-    def on_task_exit(self, task, config):
-        urlrewrite = plugin.get_plugin_by_name('urlrewriting')['instance']
-        for disable in config:
-            log.debug('Enabling url rewriter %s', disable)
-            try:
-                urlrewrite.disabled_rewriters.remove(disable)
-            except ValueError:
-                log.debug('%s does not exists', disable)
-
-    on_task_abort = on_task_exit
+            disabled.add(disable)
 
 
 @event('plugin.register')
@@ -14,6 +14,7 @@ from flexget.manager import Session
 from flexget.db_schema import versioned_base, with_session
 from flexget.entry import Entry
 from flexget.event import event
+from flexget.utils.tools import RegexpMatcher
 
 log = logging.getLogger('regexp_list')
 Base = versioned_base('regexp_list', 1)
@@ -74,6 +75,7 @@ class RegexpList(MutableSet):
     @with_session
     def __init__(self, config, session=None):
         self.config = config
+        self._matcher = None
         db_list = self._db_list(session)
         if not db_list:
             session.add(RegexpListList(name=self.config))
@@ -116,14 +118,23 @@ class RegexpList(MutableSet):
         """Finds `SubtitleListFile` corresponding to this entry, if it exists."""
         res = None
         if match_regexp:
-            for regexp in self._db_list(session).regexps:
-                if re.search(regexp.regexp, entry['title'], re.IGNORECASE):
-                    res = regexp
+            regexps = self._db_list(session).regexps.all()
+            matching = self._get_matcher(regexps).matching([entry['title']])
+            if matching:
+                # Last matching regexp wins
+                res = regexps[matching[-1]]
         else:
             res = self._db_list(session).regexps.filter(RegexListRegexp.regexp ==
                                                         entry.get('regexp', entry['title'])).first()
         return res
 
+    def _get_matcher(self, regexps):
+        """Returns a matcher for `regexps`, reused for as long as the list contents do not change."""
+        patterns = tuple(regexp.regexp for regexp in regexps)
+        if self._matcher is None or self._matcher[0] != patterns:
+            self._matcher = (patterns, RegexpMatcher(re.compile(pattern, re.IGNORECASE) for pattern in patterns))
+        return self._matcher[1]
+
     @property
     def immutable(self):
         return False
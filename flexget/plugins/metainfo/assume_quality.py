@@ -41,6 +41,10 @@ class AssumeQuality(object):
         ]
     }
 
+    def __init__(self):
+        # Assumptions of each task, by task name. They are replaced when the task starts again.
+        self.assumptions = {}
+
     def precision(self, qualityreq):
         p = 0
         for component in qualityreq.components:
@@ -77,7 +81,7 @@ class AssumeQuality(object):
         if isinstance(config, basestring):
             config = {'any': config}
         assume = namedtuple('assume', ['target', 'quality'])
-        self.assumptions = []
+        assumptions = self.assumptions[task.name] = []
         for target, quality in list(config.items()):
             log.verbose('New assumption: %s is %s' % (target, quality))
             try:
@@ -88,16 +92,16 @@ class AssumeQuality(object):
                 quality = qualities.get(quality)
             except ValueError:
                 raise plugin.PluginError('%s is not a valid quality. Forgetting assumption.' % quality)
-            self.assumptions.append(assume(target, quality))
-        self.assumptions.sort(key=lambda assumption: self.precision(assumption.target), reverse=True)
-        for assumption in self.assumptions:
+            assumptions.append(assume(target, quality))
+        assumptions.sort(key=lambda assumption: self.precision(assumption.target), reverse=True)
+        for assumption in assumptions:
             log.debug('Target %s - Priority %s' % (assumption.target, self.precision(assumption.target)))
 
     @plugin.priority(100)  # run after other plugins which fill quality (series, quality)
     def on_task_metainfo(self, task, config):
         for entry in task.entries:
             log.verbose('%s' % entry.get('title'))
-            for assumption in self.assumptions:
+            for assumption in self.assumptions.get(task.name, []):
                 log.debug('Trying %s - %s' % (assumption.target, assumption.quality))
                 if assumption.target.allows(entry.get('quality')):
                     log.debug('Match: %s' % assumption.target)
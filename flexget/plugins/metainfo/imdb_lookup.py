@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+import threading
 from datetime import datetime, timedelta
 
 from sqlalchemy import Table, Column, Integer, Float, String, Unicode, Boolean, DateTime
@@ -15,6 +16,7 @@ from flexget.entry import Entry
 from flexget.utils.log import log_once
 from flexget.utils.imdb import ImdbSearch, ImdbParser, extract_id, make_url
 from flexget.utils.database import with_session
+from flexget.utils.tools import chunked
 
 SCHEMA_VER = 8
 
@@ -190,6 +192,10 @@ class SearchResult(Base):
 
 log = logging.getLogger('imdb_lookup')
 
+# Lookups may run concurrently, the cache is written by one of them at a time. Movies share genres, languages and
+# people, which are only added when they are not stored yet.
+_cache_lock = threading.Lock()
+
 
 @db_schema.upgrade('imdb_lookup')
 def upgrade(ver, session):
@@ -233,6 +239,9 @@ class ImdbLookup(object):
         'movie_name': 'title',
         'movie_year': 'year'}
 
+    # Lazy lookups of all entries are done together, this many at once. See prefetch_lazy for cached movies.
+    max_parallel_lookups = 4
+
     schema = {'type': 'boolean'}
 
     @plugin.priority(130)
@@ -252,6 +261,33 @@ class ImdbLookup(object):
         except plugin.PluginError as e:
             log_once(str(e.value).capitalize(), logger=log)
 
+    @with_session
+    def prefetch_lazy(self, entries, session=None):
+        """
+        Populates fields of those `entries` whose movie is cached, with a couple of queries for all of them.
+        The rest are left for :meth:`lazy_loader`.
+        """
+        urls = {}
+        titles = {}
+        for entry in entries:
+            imdb_id = entry.get('imdb_id', eval_lazy=False) or extract_id(entry.get('imdb_url', eval_lazy=False))
+            if imdb_id:
+                urls.setdefault(make_url(imdb_id), []).append(entry)
+            elif entry.get('title', eval_lazy=False):
+                titles.setdefault(entry['title'], []).append(entry)
+        for chunk in chunked(list(titles)):
+            for result in session.query(SearchResult).filter(SearchResult.title.in_(chunk)):
+                # Like lookup, only the first result of a title counts
+                title_entries = titles.pop(result.title, None)
+                if title_entries and result.url and not result.fails:
+                    urls.setdefault(result.url, []).extend(title_entries)
+        for chunk in chunked(list(urls)):
+            for movie in session.query(Movie).filter(Movie.url.in_(chunk)):
+                if movie.expired:
+                    continue
+                for entry in urls[movie.url]:
+                    entry.update_using_map(self.field_map, movie)
+
     @with_session
     def imdb_id_lookup(self, movie_title=None, movie_year=None, raw_title=None, session=None):
         """
@@ -353,16 +389,18 @@ class ImdbLookup(object):
                 entry['imdb_url'] = search_result['url']
                 # store url for this movie, so we don't have to search on every run
                 result = SearchResult(entry['title'], entry['imdb_url'])
-                session.add(result)
-                session.commit()
+                with _cache_lock:
+                    session.add(result)
+                    session.commit()
                 log.verbose('Found %s' % (entry['imdb_url']))
             else:
                 log_once('IMDB lookup failed for %s' % entry['title'], log, logging.WARN, session=session)
                 # store FAIL for this title
                 result = SearchResult(entry['title'])
                 result.fails = True
-                session.add(result)
-                session.commit()
+                with _cache_lock:
+                    session.add(result)
+                    session.commit()
                 raise plugin.PluginError('Title `%s` lookup failed' % entry['title'])
 
         # check if this imdb page has been parsed & cached
@@ -378,9 +416,10 @@ class ImdbLookup(object):
             if movie.expired:
                 log.verbose('Movie `%s` details expired, refreshing ...' % movie.title)
             # Remove the old movie, we'll store another one later.
-            session.query(MovieLanguage).filter(MovieLanguage.movie_id == movie.id).delete()
-            session.query(Movie).filter(Movie.url == entry['imdb_url']).delete()
-            session.commit()
+            with _cache_lock:
+                session.query(MovieLanguage).filter(MovieLanguage.movie_id == movie.id).delete()
+                session.query(Movie).filter(Movie.url == entry['imdb_url']).delete()
+                session.commit()
 
         # search and store to cache
         if 'title' in entry:
@@ -395,8 +434,9 @@ class ImdbLookup(object):
             # store cache so this will not be tried again
             movie = Movie()
             movie.url = entry['imdb_url']
-            session.add(movie)
-            session.commit()
+            with _cache_lock:
+                session.add(movie)
+                session.commit()
             raise plugin.PluginError('UnicodeDecodeError')
         except ValueError as e:
             # TODO: might be a little too broad catch, what was this for anyway? ;P
@@ -416,11 +456,20 @@ class ImdbLookup(object):
         Get Movie object by parsing imdb page and save movie into the database.
 
         :param imdb_url: IMDB url
-        :param session: Session to be used
-        :return: Newly added Movie
+        :param session: Session to be used, it is committed
+        :return: Newly added Movie, or the one another lookup added meanwhile
         """
         parser = ImdbParser()
         parser.parse(imdb_url)
+        with _cache_lock:
+            movie = session.query(Movie).filter(Movie.url == imdb_url).first()
+            if movie and not movie.expired:
+                return movie
+            movie = self._store_movie(imdb_url, parser, session)
+            session.commit()
+        return movie
+
+    def _store_movie(self, imdb_url, parser, session):
         # store to database
         movie = Movie()
         movie.photo = parser.photo
@@ -43,6 +43,9 @@ class PluginTmdbLookup(object):
         'movie_name': 'name',
         'movie_year': 'year'}
 
+    # Lazy lookups of all entries are done together, this many at once
+    max_parallel_lookups = 4
+
     schema = {'oneOf': [
         {'type': 'boolean'},
         {'type': 'object',
@@ -10,6 +10,7 @@ import yaml
 from flexget import plugin
 from flexget.config_schema import one_or_more, process_config
 from flexget.event import event
+from flexget.task import task_config_schema
 from flexget.utils.tools import MergeException
 
 plugin_name = 'include'
@@ -45,7 +46,7 @@ class PluginInclude(object):
             with io.open(file, encoding='utf-8') as inc_file:
                 include = yaml.load(inc_file)
                 inc_file.flush()
-            errors = process_config(include, plugin.plugin_schemas(interface='task'))
+            errors = process_config(include, task_config_schema())
             if errors:
                 log.error('Included file %s has invalid config:', file)
                 for error in errors:
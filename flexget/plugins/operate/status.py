@@ -101,7 +101,8 @@ class Status(object):
     schema = {'type': 'boolean'}
 
     def __init__(self):
-        self.execution = None
+        # Latest execution of each task, by task name. Several tasks may be running at once.
+        self.executions = {}
 
     def on_task_start(self, task, config):
         with Session() as session:
@@ -112,29 +113,32 @@ class Status(object):
                 st.name = task.name
                 session.add(st)
 
-        self.execution = TaskExecution()
-        self.execution.start = datetime.datetime.now()
-        self.execution.task = st
+        execution = self.executions[task.name] = TaskExecution()
+        execution.start = datetime.datetime.now()
+        execution.task = st
 
     @plugin.priority(-255)
     def on_task_input(self, task, config):
-        self.execution.produced = len(task.entries)
+        self.executions[task.name].produced = len(task.entries)
 
     @plugin.priority(-255)
     def on_task_output(self, task, config):
-        self.execution.accepted = len(task.accepted)
-        self.execution.rejected = len(task.rejected)
-        self.execution.failed = len(task.failed)
+        execution = self.executions[task.name]
+        execution.accepted = len(task.accepted)
+        execution.rejected = len(task.rejected)
+        execution.failed = len(task.failed)
 
     def on_task_exit(self, task, config):
+        # Kept until the task starts again, in case a rerun is requested during the exit phase
+        execution = self.executions.get(task.name)
+        if execution is None:
+            return
         with Session() as session:
-            if self.execution is None:
-                return
             if task.aborted:
-                self.execution.succeeded = False
-                self.execution.abort_reason = task.abort_reason
-            self.execution.end = datetime.datetime.now()
-            session.merge(self.execution)
+                execution.succeeded = False
+                execution.abort_reason = task.abort_reason
+            execution.end = datetime.datetime.now()
+            session.merge(execution)
 
     on_task_abort = on_task_exit
 
@@ -6,6 +6,7 @@ import logging
 from flexget import options, plugin
 from flexget.config_schema import register_config_key
 from flexget.event import event
+from flexget.task import task_config_schema
 from flexget.utils.tools import MergeException
 
 plugin_name = 'template'
@@ -125,7 +126,7 @@ def register_plugin():
 def register_config():
     root_config_schema = {
         'type': 'object',
-        'additionalProperties': plugin.plugin_schemas(interface='task')
+        'additionalProperties': task_config_schema()
     }
     register_config_key('templates', root_config_schema)
 
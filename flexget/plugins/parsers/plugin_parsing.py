@@ -1,10 +1,16 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import copy
+import datetime
 import logging
+from numbers import Number
+
+from past.builtins import basestring
 
 from flexget import plugin
 from flexget.event import event
+from flexget.utils.tools import LRUCache
 
 log = logging.getLogger('parsing')
 PARSER_TYPES = ['movie', 'series']
@@ -15,6 +21,30 @@ parsers = {}
 default_parsers = {}
 selected_parsers = {}
 
+# Parse results keyed by (parser type, parser name, data, parser arguments). The same titles get parsed many times
+# during a task (and across tasks), by several plugins. Cached results are never handed out, callers get a copy.
+parse_cache = LRUCache(maxsize=10000)
+
+
+def _freeze(value):
+    """Turns parser arguments into something hashable to be used in cache keys."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+def _copy_result(result):
+    """Copies a cached parse result, along with its mutable members (e.g. quality)."""
+    result = copy.copy(result)
+    for name, value in vars(result).items():
+        if not (value is None or isinstance(value, (basestring, Number, tuple, frozenset, datetime.date))):
+            setattr(result, name, copy.deepcopy(value))
+    return result
+
 
 # We need to wait until manager startup to access other plugin instances, to make sure they have all been loaded
 @event('manager.startup')
@@ -60,6 +90,32 @@ class PluginParsing(object):
 
     on_task_abort = on_task_exit
 
+    def selected_parser(self, parser_type):
+        """Returns the name of the parser currently used for `parser_type`."""
+        return selected_parsers.get(parser_type) or default_parsers[parser_type]
+
+    def _parse(self, parser_type, parser_name, data_list, kwargs):
+        """Parses each item in `data_list` with given parser, using cached results when possible."""
+        parser = parsers[parser_type][parser_name]
+        parse_method = getattr(parser, 'parse_' + parser_type)
+        try:
+            frozen_kwargs = _freeze(kwargs)
+            hash(frozen_kwargs)
+        except TypeError:
+            # Arguments we cannot build a key from, do not cache
+            return [parse_method(data, **kwargs) for data in data_list]
+        results = []
+        for data in data_list:
+            key = (parser_type, parser_name, data, frozen_kwargs)
+            try:
+                result = parse_cache[key]
+            except KeyError:
+                result = parse_method(data, **kwargs)
+                parse_cache[key] = result
+            # Callers are allowed to modify their results, make sure the cached one stays intact
+            results.append(_copy_result(result))
+        return results
+
     def parse_series(self, data, name=None, **kwargs):
         """
         Use the selected series parser to parse series information from `data`
@@ -70,8 +126,17 @@ class PluginParsing(object):
 
         :returns: An object containing the parsed information. The `valid` attribute will be set depending on success.
         """
-        parser = parsers['series'][selected_parsers.get('series', default_parsers.get('series'))]
-        return parser.parse_series(data, name=name, **kwargs)
+        return self.parse_series_many([data], name=name, **kwargs)[0]
+
+    def parse_series_many(self, data_list, name=None, **kwargs):
+        """
+        Like :meth:`parse_series`, but parses a list of strings with the same arguments.
+
+        :param data_list: List of raw strings to parse information from.
+        :returns: List of parse results, in the same order as `data_list`.
+        """
+        kwargs['name'] = name
+        return self._parse('series', self.selected_parser('series'), data_list, kwargs)
 
     def parse_movie(self, data, **kwargs):
         """
@@ -81,8 +146,7 @@ class PluginParsing(object):
 
         :returns: An object containing the parsed information. The `valid` attribute will be set depending on success.
         """
-        parser = parsers['movie'][selected_parsers.get('movie') or default_parsers['movie']]
-        return parser.parse_movie(data, **kwargs)
+        return self._parse('movie', self.selected_parser('movie'), [data], kwargs)[0]
 
 
 @event('plugin.register')
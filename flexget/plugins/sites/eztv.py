@@ -23,6 +23,9 @@ EZTV_MIRRORS = [
 class UrlRewriteEztv(object):
     """Eztv url rewriter."""
 
+    # Rewriting only fetches the page of the entry
+    max_parallel_rewrites = 4
+
     def url_rewritable(self, task, entry):
         return urlparse(entry['url']).netloc == 'eztv.ch'
 
@@ -58,16 +58,19 @@ class Limetorrents(object):
 
         entries = set()
 
+        urls = []
         for search_string in entry.get('search_strings', [entry['title']]):
 
             query = 'search/{0}/{1}/{2}'.format(category, quote(search_string.encode('utf8')), order_by)
             log.debug('Using search: %s; category: %s; ordering: %s', search_string, category, order_by or 'default')
-            try:
-                page = task.requests.get(self.base_url + query)
-                log.debug('requesting: %s', page.url)
-            except RequestException as e:
-                log.error('Limetorrents request failed: %s', e)
+            urls.append(self.base_url + query)
+
+        # Search for all the search strings at once
+        for page in task.requests.fetch_all(urls):
+            if isinstance(page, RequestException):
+                log.error('Limetorrents request failed: %s', page)
                 continue
+            log.debug('requesting: %s', page.url)
 
             soup = get_soup(page.content)
             if soup.find('a', attrs={'class': 'csprite_dl14'}) is not None:
@@ -63,6 +63,8 @@ class UrlRewritePirateBay(object):
     }
 
     url = None
+    # Rewriting only fetches a download or search page per entry
+    max_parallel_rewrites = 4
 
     def __init__(self):
         self.set_urls(URL)
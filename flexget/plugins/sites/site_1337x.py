@@ -38,6 +38,8 @@ class Site1337x(object):
 
     base_url = 'http://1337x.to/'
     errors = False
+    # Rewriting only fetches the details page of the entry
+    max_parallel_rewrites = 4
 
     # urlrewriter API
     def url_rewritable(self, task, entry):
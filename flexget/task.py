@@ -1,6 +1,7 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import contextlib
 import copy
 import itertools
 import logging
@@ -12,22 +13,34 @@ from functools import wraps, total_ordering
 from sqlalchemy import Column, Integer, String, Unicode
 
 from flexget import config_schema, db_schema
-from flexget.entry import EntryUnicodeError
+from flexget.entry import Entry, EntrySnapshot, EntryUnicodeError
 from flexget.event import event, fire_event
 from flexget.logger import capture_output
 from flexget.manager import Session
 from flexget.plugin import plugins as all_plugins
 from flexget.plugin import (
-    DependencyError, get_plugins, phase_methods, plugin_schemas, PluginError, PluginWarning, task_phases)
-from flexget.utils import requests
+    DependencyError, get_plugins, load_config_plugins, phase_methods, plugin_schemas, PluginError, PluginWarning,
+    task_phases)
+from flexget.utils import metrics, requests
 from flexget.utils.database import with_session
 from flexget.utils.simple_persistence import SimpleTaskPersistence
-from flexget.utils.tools import get_config_hash, MergeException, merge_dict_from_to
+from flexget.utils.tools import get_config_hash, MergeException, merge_dict_from_to, parallel_map
 from flexget.utils.template import render_from_task, FlexGetTemplate
 
 log = logging.getLogger('task')
 Base = db_schema.versioned_base('feed', 0)
 
+# The plugin the current thread is running for a task and the database session it was given, by task id. Input
+# plugins of a task may be running concurrently, each of them sees its own.
+_plugin_context = threading.local()
+
+# Task config keys which are settings of the task itself rather than plugins
+task_settings_schema = {
+    # Allows input plugins of a task (and sub-inputs of `inputs`, `discover` etc.) to be run concurrently, up to given
+    # amount at a time. Entries are still added to the task in the order the inputs would normally run.
+    'max_parallel_inputs': {'type': 'integer', 'minimum': 1}
+}
+
 
 class TaskConfigHash(Base):
     """Stores the config hash for tasks so that we can tell if the config has changed since last run."""
@@ -59,6 +72,25 @@ def config_changed(task=None, session=None):
     task_hash.delete()
 
 
+def get_plugin_context():
+    """Returns the running plugin (and its database session) of each task on the current thread."""
+    return getattr(_plugin_context, 'tasks', {})
+
+
+@contextlib.contextmanager
+def use_plugin_context(context):
+    """
+    Context manager which applies a plugin context obtained with :func:`get_plugin_context` to the current thread.
+    Used for work done in another thread on behalf of a running plugin.
+    """
+    old_context = get_plugin_context()
+    _plugin_context.tasks = context
+    try:
+        yield
+    finally:
+        _plugin_context.tasks = old_context
+
+
 def use_task_logging(func):
     @wraps(func)
     def wrapper(self, *args, **kw):
@@ -245,19 +277,55 @@ class Task(object):
         self.abort_reason = None
         self.silent_abort = False
 
-        self.session = None
-
         self.requests = requests.Session()
 
         # List of all entries in the task
         self._all_entries = EntryContainer()
         self._rerun = False
+        # Entries returned by input plugins on first run, by plugin name
+        self._input_snapshots = {}
 
         self.disabled_phases = []
+        # Names of builtin plugins which are not run for this task, see the `disable` plugin
+        self.disabled_builtins = set()
 
         # current state
         self.current_phase = None
-        self.current_plugin = None
+        self.__set_plugin_context(plugin=None, session=None)
+        self._reported_plugin = None
+
+    def __set_plugin_context(self, **values):
+        # Contexts may be shared with other threads, they are replaced rather than modified
+        context = dict(get_plugin_context())
+        state = dict(context.get(id(self), {}), **values)
+        if any(value is not None for value in state.values()):
+            context[id(self)] = state
+        else:
+            context.pop(id(self), None)
+        _plugin_context.tasks = context
+
+    @property
+    def current_plugin(self):
+        """Name of the plugin running on the current thread."""
+        return get_plugin_context().get(id(self), {}).get('plugin')
+
+    @current_plugin.setter
+    def current_plugin(self, value):
+        self.__set_plugin_context(plugin=value)
+
+    @property
+    def reported_plugin(self):
+        """Name of the plugin the task has last started running, for reporting progress from other threads."""
+        return self._reported_plugin
+
+    @property
+    def session(self):
+        """Database session of the plugin running on the current thread."""
+        return get_plugin_context().get(id(self), {}).get('session')
+
+    @session.setter
+    def session(self, value):
+        self.__set_plugin_context(session=value)
 
     @property
     def max_reruns(self):
@@ -286,6 +354,11 @@ class Task(object):
     def reruns_locked(self):
         return self._reruns_locked
 
+    @property
+    def max_parallel_inputs(self):
+        """How many input plugins (or sub-inputs of `inputs`) may run concurrently, set by `max_parallel_inputs`"""
+        return self.config.get('max_parallel_inputs') or 1
+
     @property
     def is_rerun(self):
         return bool(self._rerun_count)
@@ -400,7 +473,8 @@ class Task(object):
             plugins = sorted(get_plugins(phase=phase), key=lambda p: p.phase_handlers[phase], reverse=True)
         else:
             plugins = iter(all_plugins.values())
-        return (p for p in plugins if p.name in self.config or p.builtin)
+        return (p for p in plugins
+                if p.name in self.config or (p.builtin and p.name not in self.disabled_builtins))
 
     def __run_task_phase(self, phase):
         """Executes task phase, ie. call all enabled plugins on the task.
@@ -429,39 +503,124 @@ class Task(object):
                         else:
                             log.warning('Task doesn\'t have any %s plugins, you should add (at least) one!' % phase)
 
-        for plugin in self.plugins(phase):
+        for plugins in self.__plugin_batches(phase):
             # Abort this phase if one of the plugins disables it
             if phase in self.disabled_phases:
                 return
-            # store execute info, except during entry events
-            self.current_phase = phase
-            self.current_plugin = plugin.name
-
-            if plugin.api_ver == 1:
-                # backwards compatibility
-                # pass method only task (old behaviour)
-                args = (self,)
+            if len(plugins) == 1:
+                responses = [self.__run_phase_plugin(plugins[0], phase)]
             else:
-                # pass method task, copy of config (so plugin cannot modify it)
-                args = (self, copy.copy(self.config.get(plugin.name)))
+                log.debug('running %s plugins %s concurrently', phase, ', '.join(p.name for p in plugins))
+                responses = parallel_map(lambda p: self.__run_phase_plugin(p, phase), plugins,
+                                         max_workers=self.max_parallel_inputs)
+            if phase == 'input':
+                for response in responses:
+                    if response:
+                        # add entries returned by input to self.all_entries
+                        for e in response:
+                            e.task = self
+                        self.all_entries.extend(response)
+        # check config hash for changes at the end of 'prepare' phase
+        if phase == 'prepare':
+            self.check_config_hash()
 
+    def __plugin_batches(self, phase):
+        """
+        Groups enabled plugins of `phase` into batches which are run concurrently. Only configured input plugins
+        with the same handler priority are batched, and only if `max_parallel_inputs` allows it.
+        Everything else is yielded as a batch of one.
+        """
+        batch = []
+        for plugin in self.plugins(phase):
+            parallel = phase == 'input' and self.max_parallel_inputs > 1 and not plugin.builtin
+            priority = plugin.phase_handlers[phase].priority
+            if batch and (not parallel or priority != batch[0].phase_handlers[phase].priority):
+                yield batch
+                batch = []
+            if parallel:
+                batch.append(plugin)
+            else:
+                yield [plugin]
+        if batch:
+            yield batch
+
+    def __run_phase_plugin(self, plugin, phase):
+        """
+        Runs a single plugin of the current phase with its own database session, returns the plugin response.
+        """
+        if phase == 'input' and plugin.name in self._input_snapshots:
+            response = self.__replay_input(plugin)
+            if self._rerun_count < self.max_reruns:
+                self.__snapshot_input(plugin, response)
+            return response
+
+        # store execute info, except during entry events
+        self.current_phase = phase
+        self.current_plugin = plugin.name
+        self._reported_plugin = plugin.name
+
+        if plugin.api_ver == 1:
+            # backwards compatibility
+            # pass method only task (old behaviour)
+            args = (self,)
+        else:
+            # pass method task, copy of config (so plugin cannot modify it)
+            args = (self, copy.copy(self.config.get(plugin.name)))
+
+        with metrics.Measurement(self.name, plugin.name, phase, len(self.entries)) as measurement:
             # Hack to make task.session only active for a single plugin
             with Session() as session:
                 self.session = session
                 try:
                     fire_event('task.execute.before_plugin', self, plugin.name)
                     response = self.__run_plugin(plugin, phase, args)
-                    if phase == 'input' and response:
-                        # add entries returned by input to self.all_entries
-                        for e in response:
-                            e.task = self
-                        self.all_entries.extend(response)
+                    if phase == 'input' and response is not None:
+                        # Lazy inputs do their work when consumed, make sure it is accounted to them
+                        response = list(response)
                 finally:
                     fire_event('task.execute.after_plugin', self, plugin.name)
-                self.session = None
-        # check config hash for changes at the end of 'prepare' phase
-        if phase == 'prepare':
-            self.check_config_hash()
+                    self.session = None
+            measurement.entries_out = len(response or []) if phase == 'input' else len(self.entries)
+        if phase == 'input' and response is not None and self._rerun_count < self.max_reruns:
+            if self.replays_input(plugin, self.config.get(plugin.name)):
+                self.__snapshot_input(plugin, response)
+        return response
+
+    def replays_input(self, plugin, config):
+        """
+        Whether entries returned by input `plugin` can be replayed on reruns instead of running it again.
+        Plugins opt out with a `replay_input` attribute, which may also be a method taking task and config.
+
+        :param PluginInfo plugin: Input plugin
+        :param config: Config of the plugin
+        """
+        replay = getattr(plugin.instance, 'replay_input', True)
+        if callable(replay):
+            return replay(self, config)
+        return replay
+
+    def __snapshot_input(self, plugin, entries):
+        """
+        Takes snapshots of the entries `plugin` returned from input phase, for replaying them on reruns.
+        Snapshots only keep copies of fields once they are changed.
+        """
+        if not all(isinstance(entry, Entry) for entry in entries):
+            log.debug('%s input did not return entries, it will run again on reruns', plugin.name)
+            return
+        snapshots = []
+        for entry in entries:
+            snapshot = entry.snapshots['replay_input'] = EntrySnapshot(entry, 'replay_input')
+            if snapshot.changed_fields():
+                # Fields which could not be copied are missing from the snapshot
+                log.debug('Unable to take snapshot of %s input, it will run again on reruns', plugin.name)
+                return
+            snapshots.append(snapshot)
+        self._input_snapshots[plugin.name] = snapshots
+
+    def __replay_input(self, plugin):
+        snapshots = self._input_snapshots.pop(plugin.name)
+        log.debug('replaying %s entries from %s input', len(snapshots), plugin.name)
+        return [snapshot.copy_entry() for snapshot in snapshots]
 
     def __run_plugin(self, plugin, phase, args=None, kwargs=None):
         """
@@ -578,6 +737,8 @@ class Task(object):
             return
 
         log.debug('executing %s' % self.name)
+        # Import plugins configured for this task up front, instead of during the phases
+        load_config_plugins(self.config)
 
         # Handle keyword args
         if self.options.learn:
@@ -647,8 +808,7 @@ class Task(object):
                 if self._rerun and self._rerun_count < self.max_reruns and self._rerun_count < Task.RERUN_MAX:
                     log.info('Rerunning the task in case better resolution can be achieved.')
                     self._rerun_count += 1
-                    # TODO: Potential optimization is to take snapshots (maybe make the ones backlog uses built in
-                    # instead of taking another one) after input and just inject the same entries for the rerun
+                    # Input plugins which allow it are not run again, the entries they returned are replayed
                     self._all_entries = EntryContainer()
                     self._rerun = False
                     continue
@@ -657,11 +817,13 @@ class Task(object):
                 break
             fire_event('task.execute.completed', self)
         finally:
+            self.current_plugin = None
+            self._reported_plugin = None
             self.finished_event.set()
 
     @staticmethod
     def validate_config(config):
-        schema = plugin_schemas(interface='task')
+        schema = task_config_schema()
         # Don't validate commented out plugins
         schema['patternProperties'] = {'^_': {}}
         return config_schema.process_config(config, schema)
@@ -693,11 +855,18 @@ class Task(object):
         return render_from_task(template, self)
 
 
+def task_config_schema():
+    """Returns schema for the config of a single task, its plugins and the settings in `task_settings_schema`."""
+    schema = plugin_schemas(interface='task')
+    schema['properties'].update(task_settings_schema)
+    return schema
+
+
 @event('config.register')
 def register_config_key():
-    task_config_schema = {
+    tasks_config_schema = {
         'type': 'object',
-        'additionalProperties': plugin_schemas(interface='task')
+        'additionalProperties': task_config_schema()
     }
 
-    config_schema.register_config_key('tasks', task_config_schema, required=True)
+    config_schema.register_config_key('tasks', tasks_config_schema, required=True)
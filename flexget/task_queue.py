@@ -9,61 +9,233 @@ import time
 
 from sqlalchemy.exc import ProgrammingError, OperationalError
 
+from flexget import plugin
+from flexget.config_schema import register_config_key
+from flexget.event import event
 from flexget.task import TaskAbort
 
 log = logging.getLogger('task_queue')
 
+# Plugins which make a task hold a lock while it executes. Tasks holding the same lock are never run concurrently,
+# regardless of the number of workers. Plugins working against the same database tables, or keeping the state of the
+# running task on their shared instance, share a lock name.
+DEFAULT_PLUGIN_LOCKS = {
+    'series': 'series',
+    'configure_series': 'series',
+    'all_series': 'series',
+    'series_premiere': 'series',
+    'next_series_episodes': 'series',
+    'next_series_seasons': 'series',
+    'series_begin': 'series',
+    'series_forget': 'series',
+    'deluge': 'deluge',
+    'from_deluge': 'deluge',
+    'qbittorrent': 'qbittorrent',
+    'gazelle': 'gazelle',
+    'gazellemusic': 'gazelle',
+    'redacted': 'gazelle',
+    'notwhatcd': 'gazelle',
+    'ftp_list': 'ftp_list',
+    'from_imdb': 'from_imdb',
+    'twitterfeed': 'twitterfeed',
+    'gen_series_data': 'gen_series_data',
+    'rottentomatoes_lookup': 'rottentomatoes_lookup',
+    'regex_extract': 'regex_extract',
+    'manipulate': 'manipulate',
+    'max_reruns': 'max_reruns',
+    'myepisodes': 'myepisodes',
+    'periscope': 'periscope',
+    'notify': 'notify',
+    'redirect_url': 'redirect_url',
+    'serienjunkies': 'serienjunkies',
+    'rmz': 'rmz',
+    'rlsbb': 'rlsbb',
+}
+
+# Plugins which change state used by every task (e.g. plugin or quality priorities, the selected parsers) while a
+# task is running. Tasks using them are run on their own.
+EXCLUSIVE_PLUGINS = ('plugin_priority', 'reorder_quality', 'parsing')
+# Lock held by tasks using one of the EXCLUSIVE_PLUGINS, it conflicts with every other lock
+EXCLUSIVE_LOCK = '*'
+
+task_queue_schema = {
+    'type': 'object',
+    'properties': {
+        'workers': {'type': 'integer', 'minimum': 1, 'default': 1},
+        'locks': {
+            'type': 'array',
+            'items': {'type': 'string'},
+            'description': 'Additional plugins which may only be used by one running task at a time.'
+        }
+    },
+    'additionalProperties': False
+}
+
 
 class TaskQueue(object):
     """
     Task processing thread.
-    Only executes one task at a time, if more are requested they are queued up and run in turn.
+    Executes up to `workers` tasks at a time, if more are requested they are queued up and run in turn.
+    Tasks which use plugins sharing a lock (see :data:`DEFAULT_PLUGIN_LOCKS`) are never run concurrently, neither are
+    two executions of the same task.
     """
 
-    def __init__(self):
+    def __init__(self, config=None):
         self.run_queue = queue.PriorityQueue()
         self._shutdown_now = False
         self._shutdown_when_finished = False
 
-        self.current_task = None
+        self.workers = 1
+        self.plugin_locks = dict(DEFAULT_PLUGIN_LOCKS)
+        self.configure(config or {})
+
+        # Tasks currently executing, in the order they were started
+        self.running_tasks = []
+        # Tasks taken from the run queue which are waiting for a lock held by a running task
+        self._waiting_tasks = []
+        self._held_locks = set()
+        self._condition = threading.Condition()
+        self._workers = []
 
         # We don't override `threading.Thread` because debugging this seems unsafe with pydevd.
         # Overriding __len__(self) seems to cause a debugger deadlock.
         self._thread = threading.Thread(target=self.run, name='task_queue')
         self._thread.daemon = True
 
+    def configure(self, config):
+        """
+        Apply `task_queue` configuration. Takes effect for tasks started after this call.
+
+        :param dict config: Validated `task_queue` config section.
+        """
+        self.workers = config.get('workers', 1)
+        self.plugin_locks = dict(DEFAULT_PLUGIN_LOCKS)
+        for plugin_name in config.get('locks', []):
+            self.plugin_locks.setdefault(plugin_name, plugin_name)
+
+    @property
+    def current_task(self):
+        """The longest running task currently executing, if any."""
+        with self._condition:
+            return self.running_tasks[0] if self.running_tasks else None
+
+    @property
+    def waiting_tasks(self):
+        """Tasks which have been taken from the queue, but are waiting for a lock to be released."""
+        with self._condition:
+            return sorted(self._waiting_tasks)
+
+    def task_locks(self, task):
+        """
+        :param task: Task instance
+        :return: Set of lock names `task` must hold while it is executing.
+        """
+        plugin_names = set(key for key in task.config if not key.startswith('_'))
+        # Templates are merged into the task config during prepare phase, include their plugins already
+        templates = task.config.get('template', [])
+        if templates is False:
+            templates = []
+        elif not isinstance(templates, list):
+            templates = [templates] if isinstance(templates, str) else []
+        if 'no_global' not in templates:
+            templates = templates + ['global']
+        toplevel_templates = task.manager.config.get('templates') or {}
+        for template in templates:
+            plugin_names.update(toplevel_templates.get(template) or {})
+        # Builtin plugins run on every task, unless disabled for it
+        disabled = task.config.get('disable') or []
+        if not isinstance(disabled, list):
+            disabled = [disabled]
+        if 'builtins' not in disabled:
+            plugin_names.update(p.name for p in plugin.plugins.values() if p.builtin and p.name not in disabled)
+        locks = set(self.plugin_locks[name] for name in plugin_names if name in self.plugin_locks)
+        if plugin_names.intersection(EXCLUSIVE_PLUGINS):
+            locks.add(EXCLUSIVE_LOCK)
+        # Plugins keep the state of a running task by its name
+        locks.add('task %s' % task.name)
+        return locks
+
+    def _conflicting_locks(self, locks):
+        """Locks held by running tasks which prevent a task needing `locks` from starting."""
+        if EXCLUSIVE_LOCK in locks or EXCLUSIVE_LOCK in self._held_locks:
+            return set(self._held_locks)
+        return locks & self._held_locks
+
     def start(self):
         self._thread.start()
 
     def run(self):
         while not self._shutdown_now:
-            # Grab the first job from the run queue and do it
-            try:
-                self.current_task = self.run_queue.get(timeout=0.5)
-            except queue.Empty:
-                if self._shutdown_when_finished:
+            task = self._next_task()
+            if task is None:
+                if self._shutdown_when_finished and not self._has_work():
                     self._shutdown_now = True
                 continue
-            try:
-                self.current_task.execute()
-            except TaskAbort as e:
-                log.debug('task %s aborted: %r' % (self.current_task.name, e))
-            except (ProgrammingError, OperationalError):
-                log.critical('Database error while running a task. Attempting to recover.')
-                self.current_task.manager.crash_report()
-            except Exception:
-                log.critical('BUG: Unhandled exception during task queue run loop.')
-                self.current_task.manager.crash_report()
-            finally:
-                self.run_queue.task_done()
-                self.current_task = None
-
-        remaining_jobs = self.run_queue.qsize()
+            locks = self.task_locks(task)
+            with self._condition:
+                conflicts = self._conflicting_locks(locks)
+                if conflicts:
+                    log.debug('task %s waiting for locks %s held by other tasks', task.name,
+                              ', '.join(sorted(conflicts)))
+                    self._waiting_tasks.append(task)
+                    continue
+                self._held_locks.update(locks)
+                self.running_tasks.append(task)
+            worker = threading.Thread(target=self._execute, args=(task, locks), name='task_queue_%s' % task.name)
+            worker.daemon = True
+            self._workers = [w for w in self._workers if w.is_alive()] + [worker]
+            worker.start()
+
+        # Let running tasks finish before the queue is considered shut down
+        for worker in self._workers:
+            worker.join()
+
+        remaining_jobs = len(self)
         if remaining_jobs:
             log.warning('task queue shut down with %s tasks remaining in the queue to run.' % remaining_jobs)
         else:
             log.debug('task queue shut down')
 
+    def _has_work(self):
+        with self._condition:
+            return bool(self.running_tasks or self._waiting_tasks or self.run_queue.qsize())
+
+    def _next_task(self):
+        """
+        Returns the next task which should be started, or None if there is no free worker or no task is ready to run.
+        Tasks waiting for a lock are retried first, in priority order.
+        """
+        with self._condition:
+            if len(self.running_tasks) >= self.workers:
+                self._condition.wait(0.5)
+                return None
+            for task in sorted(self._waiting_tasks):
+                if not self._conflicting_locks(self.task_locks(task)):
+                    self._waiting_tasks.remove(task)
+                    return task
+        try:
+            return self.run_queue.get(timeout=0.5)
+        except queue.Empty:
+            return None
+
+    def _execute(self, task, locks):
+        try:
+            task.execute()
+        except TaskAbort as e:
+            log.debug('task %s aborted: %r' % (task.name, e))
+        except (ProgrammingError, OperationalError):
+            log.critical('Database error while running a task. Attempting to recover.')
+            task.manager.crash_report()
+        except Exception:
+            log.critical('BUG: Unhandled exception during task queue run loop.')
+            task.manager.crash_report()
+        finally:
+            with self._condition:
+                self.running_tasks.remove(task)
+                self._held_locks.difference_update(locks)
+                self._condition.notify_all()
+            self.run_queue.task_done()
+
     def is_alive(self):
         return self._thread.is_alive()
 
@@ -72,7 +244,7 @@ class TaskQueue(object):
         self.run_queue.put(task)
 
     def __len__(self):
-        return self.run_queue.qsize()
+        return self.run_queue.qsize() + len(self._waiting_tasks)
 
     def shutdown(self, finish_queue=True):
         """
@@ -83,9 +255,9 @@ class TaskQueue(object):
         log.debug('task queue shutdown requested')
         if finish_queue:
             self._shutdown_when_finished = True
-            if self.run_queue.qsize():
+            if len(self):
                 log.verbose('There are %s tasks to execute. Shutdown will commence when they have completed.' %
-                            self.run_queue.qsize())
+                            len(self))
         else:
             self._shutdown_now = True
 
@@ -104,8 +276,19 @@ class TaskQueue(object):
             while self._thread.is_alive():
                 time.sleep(0.5)
         except KeyboardInterrupt:
-            log.error('Got ctrl-c, shutting down after running task (if any) completes')
+            log.error('Got ctrl-c, shutting down after running tasks (if any) complete')
             self.shutdown(finish_queue=False)
             # We still wait to finish cleanly, pressing ctrl-c again will abort
             while self._thread.is_alive():
                 time.sleep(0.5)
+
+
+@event('manager.config_updated')
+def configure_task_queue(manager):
+    if manager.task_queue is not None:
+        manager.task_queue.configure(manager.config.get('task_queue') or {})
+
+
+@event('config.register')
+def register_config():
+    register_config_key('task_queue', task_queue_schema)
@@ -12,6 +12,7 @@ from flexget.api.app import __version__ as __api_version__, base_message
 from flexget.api.core.server import ObjectsContainer as OC
 from flexget.manager import Manager
 from flexget.tests.conftest import MockManager
+from flexget.utils import metrics
 from flexget.utils.tools import get_latest_flexget_version_number
 
 
@@ -125,3 +126,33 @@ class TestServerAPI(object):
         assert not errors
 
         assert len(data) == 2
+
+
+class TestServerMetricsAPI(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - title: entry 1
+              - title: entry 2
+            regexp:
+              reject:
+                - entry 2
+            seen: local
+    """
+
+    def test_metrics(self, api_client, execute_task):
+        metrics.reset()
+        execute_task('test')
+        rsp = api_client.get('/server/metrics/')
+        assert rsp.status_code == 200
+        assert rsp.mimetype == 'text/plain'
+        lines = rsp.get_data(as_text=True).splitlines()
+        assert '# TYPE flexget_plugin_wall_seconds histogram' in lines
+        assert 'flexget_plugin_wall_seconds_count{task="test",plugin="mock",phase="input"} 1' in lines
+        assert 'flexget_plugin_entries_out_total{task="test",plugin="mock",phase="input"} 2' in lines
+        assert 'flexget_plugin_entries_in_total{task="test",plugin="regexp",phase="filter"} 2' in lines
+        assert 'flexget_plugin_entries_out_total{task="test",plugin="regexp",phase="filter"} 1' in lines
+        queries = [line for line in lines
+                   if line.startswith('flexget_plugin_queries_total{task="test",plugin="seen",phase="filter"}')]
+        assert int(queries[0].split()[-1]) > 0
@@ -2,12 +2,38 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import json
+import threading
 
+import pytest
 from mock import patch
 
+from flexget import plugin
 from flexget.api.app import base_message
 from flexget.api.core.tasks import ObjectsContainer as OC
+from flexget.event import event
 from flexget.manager import Manager
+from flexget.task import Task
+from flexget.tests.conftest import MockManager
+
+
+class BlockingInput(object):
+    """Input which waits until it is released by the test."""
+
+    schema = {'type': 'boolean'}
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def on_task_input(self, task, config):
+        self.started.set()
+        self.release.wait(10)
+        return []
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(BlockingInput, 'test_blocking_input', api_ver=2, debug=True)
 
 
 class TestTaskAPI(object):
@@ -269,6 +295,40 @@ class TestTaskQueue(object):
         assert data == []
 
 
+class TestRunningTaskQueue(object):
+    config = """
+        tasks:
+          blocked:
+            test_blocking_input: yes
+        """
+
+    @pytest.yield_fixture()
+    def manager(self, request, config, tmpdir):
+        # The api and the task run on different threads, an in memory database would not be shared between them
+        database_uri = 'sqlite:///%s' % tmpdir.join('test.sqlite').strpath.replace('\\', '\\\\')
+        mockmanager = MockManager(config, request.cls.__name__, db_uri=database_uri)
+        yield mockmanager
+        mockmanager.shutdown()
+
+    def test_current_plugin(self, api_client, manager):
+        blocking = plugin.get_plugin_by_name('test_blocking_input').instance
+        task = Task(manager, 'blocked')
+        manager.task_queue.running_tasks.append(task)
+        thread = threading.Thread(target=task.execute)
+        thread.start()
+        try:
+            assert blocking.started.wait(10)
+            rsp = api_client.get('/tasks/queue/')
+            assert rsp.status_code == 200
+            data = json.loads(rsp.get_data(as_text=True))
+            assert [(t['name'], t['current_phase'], t['current_plugin']) for t in data] == \
+                [('blocked', 'input', 'test_blocking_input')]
+        finally:
+            blocking.release.set()
+            thread.join()
+            manager.task_queue.running_tasks.remove(task)
+
+
 class TestDisabledTasks(object):
     config = """
         tasks:
@@ -27,6 +27,7 @@ import flexget.logger
 from flexget.manager import Manager
 from flexget.plugin import load_plugins
 from flexget.task import Task, TaskAbort
+from flexget.utils.requests import clear_pools
 from flexget.webserver import User
 from flexget.manager import Session
 from flexget.api import api_app
@@ -130,8 +131,11 @@ def use_vcr(request, monkeypatch):
         if not online:
             log.debug('Disabling domain limiters during VCR playback.')
             monkeypatch.setattr('flexget.utils.requests.limit_domains', mock.Mock())
+        # Connections pooled during other tests must not be reused with this cassette, or leak out of it
+        clear_pools()
         with vcr.use_cassette(path=cassette_path) as cassette:
             yield cassette
+        clear_pools()
 
 
 @pytest.fixture()
@@ -184,7 +188,8 @@ def pytest_configure(config):
     # register the filecopy marker
     config.addinivalue_line('markers',
                             'filecopy(src, dst): mark test to copy a file from `src` to `dst` before running.'
-                            'online: mark a test that goes online. VCR will automatically be used.')
+                            'online: mark a test that goes online. VCR will automatically be used.'
+                            'localhost: mark a test that makes requests to servers it runs itself.')
 
 
 def pytest_runtest_setup(item):
@@ -194,7 +199,7 @@ def pytest_runtest_setup(item):
     # Add the online marker to tests that will go online
     if item.get_marker('online'):
         item.fixturenames.append('use_vcr')
-    else:
+    elif not item.get_marker('localhost'):
         item.fixturenames.append('no_requests')
 
 
@@ -0,0 +1,18 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+from flexget import plugin
+from flexget.event import event
+
+
+class LazyFilter(object):
+    schema = {'type': 'boolean'}
+
+    def on_task_filter(self, task, config):
+        for entry in task.entries:
+            entry.accept('lazy filter')
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(LazyFilter, 'lazy_filter', api_ver=2)
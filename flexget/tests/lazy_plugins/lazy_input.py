@@ -0,0 +1,18 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.event import event
+
+
+class LazyInput(object):
+    schema = {'type': 'boolean'}
+
+    def on_task_input(self, task, config):
+        return [Entry('lazy entry', 'fake url')]
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(LazyInput, 'lazy_input', api_ver=2)
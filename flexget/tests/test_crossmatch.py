@@ -1,6 +1,9 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget.entry import Entry
+from flexget.plugins.filter.crossmatch import CrossMatch, CrossMatchIndex
+
 
 class TestCrossmatch(object):
     config = """
@@ -15,9 +18,71 @@ class TestCrossmatch(object):
                 - title: entry 2
               action: reject
               fields: [title]
+          test_not_exact:
+            accept_all: yes
+            mock:
+            - title: The Show S01E01 720p
+            - title: Movie
+            - title: ab
+            - title: Other Movie 2016
+            crossmatch:
+              from:
+              - mock:
+                - title: Show S01E01
+                - title: Some Movie 2016
+                - title: xab
+              action: reject
+              fields: [title]
+              exact: no
+          test_copy_fields:
+            mock:
+            - title: entry 1
+            - {title: entry 2, imdb_id: tt0000001}
+            crossmatch:
+              from:
+              - mock:
+                - {title: entry 1, imdb_id: tt0000001}
+                - {title: entry 2}
+                - {title: entry 3, imdb_id: tt0000001, other: from entry 3}
+              action: accept
+              fields: [title, imdb_id]
     """
 
     def test_reject_title(self, execute_task):
         task = execute_task('test_title')
         assert task.find_entry('rejected', title='entry 2')
         assert len(task.rejected) == 1
+
+    def test_reject_not_exact(self, execute_task):
+        task = execute_task('test_not_exact')
+        assert task.find_entry('rejected', title='The Show S01E01 720p')
+        assert task.find_entry('rejected', title='Movie')
+        assert task.find_entry('rejected', title='ab')
+        assert task.find_entry('accepted', title='Other Movie 2016'), 'case sensitive substring should not match'
+        assert len(task.rejected) == 3
+
+    def test_copy_fields(self, execute_task):
+        task = execute_task('test_copy_fields')
+        entry = task.find_entry('accepted', title='entry 1')
+        assert entry['imdb_id'] == 'tt0000001', 'imdb_id should be copied from the first matching entry'
+        assert task.find_entry('accepted', title='entry 2'), 'entry 2 should match on copied imdb_id'
+        assert entry['other'] == 'from entry 3', 'entry 3 should match on imdb_id copied from entry 1'
+
+
+class TestCrossMatchIndex(object):
+    def test_candidates_superset(self):
+        """Index candidates must include every entry which intersects."""
+        crossmatch = CrossMatch()
+        generated = [Entry(title=title, url='') for title in
+                     ['Show', 'Some Show S01E01 720p', 'ow', 'x', 'Show S01', 'other show', 'Some Show']]
+        generated.append(Entry(title='list', url='', tags=['Show', 'Other']))
+        for exact in (True, False):
+            for fields in (['title'], ['tags'], ['title', 'tags']):
+                index = CrossMatchIndex(generated, fields, exact)
+                for title in ['Show', 'Some Show S01E01 720p HDTV', 'S01', 'o', 'Other', 'Some Show']:
+                    entry = Entry(title=title, url='', tags='Show')
+                    candidates = index.candidates(entry)
+                    for position, generated_entry in enumerate(generated):
+                        if crossmatch.entry_intersects(entry, generated_entry, fields, exact):
+                            assert position in candidates, '%s should be a candidate for %s' % (
+                                generated_entry['title'], title)
@@ -1,6 +1,8 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import threading
+import time
 from datetime import datetime, timedelta
 
 from flexget.entry import Entry
@@ -28,6 +30,43 @@ class SearchPlugin(object):
 plugin.register(SearchPlugin, 'test_search', interfaces=['search'], api_ver=2)
 
 
+class TrackingSearch(object):
+    """
+    Fake search plugin which records how many searches are running at once, in total and with this plugin.
+    Returns a single entry named after the searched entry and the config value, sorted by both.
+    """
+
+    schema = {'type': 'integer'}
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def __init__(self):
+        self.running_here = 0
+        self.max_running_here = 0
+
+    def search(self, task, entry, config=None):
+        with self.lock:
+            TrackingSearch.running += 1
+            TrackingSearch.max_running = max(TrackingSearch.max_running, TrackingSearch.running)
+            self.running_here += 1
+            self.max_running_here = max(self.max_running_here, self.running_here)
+        time.sleep(0.2)
+        with self.lock:
+            TrackingSearch.running -= 1
+            self.running_here -= 1
+        return [Entry(title='%s %s' % (entry['title'], config), url='mock://%s/%s' % (entry['title'], config),
+                      search_sort=entry['search_sort'] * 10 + config)]
+
+
+class ParallelSearch(TrackingSearch):
+    max_parallel_searches = 2
+
+
+plugin.register(TrackingSearch, 'test_tracking_search', interfaces=['search'], api_ver=2)
+plugin.register(ParallelSearch, 'test_parallel_search', interfaces=['search'], api_ver=2)
+
+
 class EstRelease(object):
     """Fake release estimate plugin. Just returns 'est_release' entry field."""
 
@@ -54,6 +93,38 @@ class TestDiscover(object):
                   search_sort: 2
               from:
               - test_search: yes
+          test_sort_parallel:
+            discover:
+              release_estimations: ignore
+              max_parallel_searches: 4
+              what:
+              - mock:
+                - title: Foo
+                  search_sort: 1
+                - title: Bar
+                  search_sort: 3
+                - title: Baz
+                  search_sort: 3
+                - title: Qux
+                  search_sort: 2
+              from:
+              - test_search: yes
+              - test_search: no
+          test_parallel_plugins:
+            discover:
+              release_estimations: ignore
+              max_parallel_searches: 4
+              what:
+              - mock:
+                - title: Foo
+                  search_sort: 1
+                - title: Bar
+                  search_sort: 3
+                - title: Baz
+                  search_sort: 2
+              from:
+              - test_tracking_search: 1
+              - test_parallel_search: 2
           test_interval:
             discover:
               release_estimations: ignore
@@ -107,6 +178,18 @@ class TestDiscover(object):
         order = list(e.get('search_sort') for e in task.entries)
         assert order == sorted(order, reverse=True)
 
+    def test_sort_parallel(self, execute_task):
+        task = execute_task('test_sort_parallel')
+        assert [e['title'] for e in task.entries] == ['Bar', 'Baz', 'Qux', 'Foo']
+
+    def test_parallel_plugins(self, execute_task):
+        TrackingSearch.max_running = 0
+        task = execute_task('test_parallel_plugins')
+        assert TrackingSearch.max_running > 1, 'searches should have overlapped'
+        assert plugin.get_plugin_by_name('test_tracking_search').instance.max_running_here == 1
+        assert plugin.get_plugin_by_name('test_parallel_search').instance.max_running_here == 2
+        assert [e['title'] for e in task.entries] == ['Bar 2', 'Bar 1', 'Baz 2', 'Baz 1', 'Foo 2', 'Foo 1']
+
     def test_interval(self, execute_task, manager):
         task = execute_task('test_interval')
         assert len(task.entries) == 1
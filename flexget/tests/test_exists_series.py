@@ -2,9 +2,16 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import os
+import threading
+import time
 
+import mock
 import pytest
 
+from flexget.utils import library_index
+
+from .conftest import MockManager
+
 
 class TestExistsSeries(object):
     _config = """
@@ -163,3 +170,73 @@ class TestExistsSeries(object):
             'jinja2 s01e01 should have been rejected (exists)'
         assert task.find_entry('accepted', title='jinja s01e02'), \
             'jinja s01e02 should have been accepted'
+
+
+class TestExistsSeriesIndex(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Foo.Bar.S01E01.XViD'}
+              - {title: 'Foo.Bar.S01E02.XViD'}
+            series:
+              - foo bar
+            exists_series: __tmp__
+    """
+
+    def test_index_follows_changes(self, execute_task, tmpdir):
+        season = tmpdir.mkdir('Season 1')
+        season.mkdir('Foo.Bar.S01E01.XViD')
+        task = execute_task('test')
+        assert task.find_entry('rejected', title='Foo.Bar.S01E01.XViD')
+        assert task.find_entry('accepted', title='Foo.Bar.S01E02.XViD')
+
+        season.join('Foo.Bar.S01E02.XViD.mkv').write('')
+        season.join('Foo.Bar.S01E01.XViD').remove()
+        task = execute_task('test')
+        assert task.find_entry('accepted', title='Foo.Bar.S01E01.XViD')
+        assert task.find_entry('rejected', title='Foo.Bar.S01E02.XViD')
+
+    def test_unchanged_dirs_not_listed(self, execute_task, tmpdir):
+        tmpdir.mkdir('Season 1').mkdir('Foo.Bar.S01E01.XViD')
+        tmpdir.mkdir('Season 2')
+        execute_task('test')
+        tmpdir.join('Season 2').join('Foo.Bar.S01E02.XViD.mkv').write('')
+        with mock.patch('flexget.utils.library_index.os.listdir', wraps=os.listdir) as listdir:
+            task = execute_task('test')
+        assert listdir.call_args_list == [mock.call(tmpdir.join('Season 2').strpath)]
+        assert task.find_entry('rejected', title='Foo.Bar.S01E01.XViD')
+        assert task.find_entry('rejected', title='Foo.Bar.S01E02.XViD')
+
+    def test_concurrent_refresh(self, request, tmpdir):
+        library = tmpdir.mkdir('library')
+        library.mkdir('Season 1').join('Foo.Bar.S01E01.XViD.mkv').write('')
+        # An in memory database is not shared between the threads refreshing the index
+        database_uri = 'sqlite:///%s' % tmpdir.join('test.sqlite').strpath.replace('\\', '\\\\')
+        manager = MockManager(self.config.replace('__tmp__', library.strpath), request.cls.__name__,
+                              db_uri=database_uri)
+        errors = []
+        listdir = os.listdir
+
+        def slow_listdir(path):
+            time.sleep(0.1)
+            return listdir(path)
+
+        def refresh():
+            try:
+                library_index.refresh(library.strpath)
+            except Exception as e:
+                errors.append(e)
+
+        try:
+            with mock.patch('flexget.utils.library_index.os.listdir', side_effect=slow_listdir):
+                threads = [threading.Thread(target=refresh) for _ in range(2)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            assert not errors
+            entries = library_index.entries(library.strpath)
+            assert sorted(entry.name for entry in entries) == ['Foo.Bar.S01E01.XViD.mkv', 'Season 1']
+        finally:
+            manager.shutdown()
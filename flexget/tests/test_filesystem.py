@@ -1,6 +1,11 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import os
+import time
+
+import mock
+import pytest
 from path import Path
 
 
@@ -208,3 +213,105 @@ class TestFilesystem(object):
         task = execute_task(task_name)
 
         self.assert_check(task, task_name, 'positive', should_exist)
+
+
+class TestFilesystemIncremental(object):
+    config = """
+        tasks:
+          incremental:
+            filesystem:
+              path: __tmp__
+              recursive: yes
+              retrieve: files
+              incremental: yes
+          other:
+            filesystem:
+              path: __tmp__
+              mask: '*.mkv'
+              incremental: yes
+          shallow:
+            filesystem:
+              path: __tmp__
+              retrieve: [files, dirs]
+              incremental: yes
+          aborted:
+            filesystem:
+              path: __tmp__
+              incremental: yes
+            abort_if_exists:
+              regexp: .
+              field: title
+    """
+
+    def titles(self, task):
+        return sorted(entry['title'] for entry in task.all_entries)
+
+    def test_changes_only(self, execute_task, tmpdir):
+        tmpdir.join('a.mkv').write('a')
+        tmpdir.mkdir('dir').join('b.txt').write('b')
+        assert self.titles(execute_task('incremental')) == ['a', 'b']
+        assert self.titles(execute_task('incremental')) == [], 'unchanged files should not be emitted again'
+
+        tmpdir.join('dir').join('c.mkv').write('c')
+        # Changed in place, without changing the directory
+        tmpdir.join('a.mkv').write('changed')
+        assert self.titles(execute_task('incremental')) == ['a', 'c']
+
+        tmpdir.join('dir').join('c.mkv').remove()
+        assert self.titles(execute_task('incremental')) == []
+        # Each task keeps its own position
+        assert self.titles(execute_task('other')) == ['a']
+
+    def test_aborted_run(self, execute_task, tmpdir):
+        tmpdir.join('a.mkv').write('a')
+        execute_task('aborted', abort=True)
+        assert self.titles(execute_task('aborted', abort=True)) == ['a'], \
+            'changes of an aborted run should be emitted again'
+
+    def test_symlink_loop(self, execute_task, tmpdir):
+        tmpdir.mkdir('dir').join('a.mkv').write('a')
+        tmpdir.join('dir').join('loop').mksymlinkto(tmpdir)
+        assert self.titles(execute_task('incremental')) == ['a']
+
+    def test_max_depth(self, execute_task, tmpdir):
+        tmpdir.join('a.mkv').write('a')
+        tmpdir.mkdir('dir').mkdir('sub').join('b.mkv').write('b')
+        with mock.patch('flexget.utils.library_index.os.listdir', wraps=os.listdir) as listdir:
+            assert self.titles(execute_task('shallow')) == ['a', 'dir']
+        assert [args[0] for args, kwargs in listdir.call_args_list] == [tmpdir.strpath], \
+            'only the top directory should have been indexed'
+        assert self.titles(execute_task('incremental')) == ['a', 'b']
+
+        tmpdir.join('c.mkv').write('c')
+        assert self.titles(execute_task('shallow')) == ['c']
+        assert self.titles(execute_task('incremental')) == ['c'], 'deeper paths should have stayed in the index'
+
+
+class TestLibraryWatcher(object):
+    def wait_changed(self, watcher, root):
+        for _ in range(50):
+            if watcher.changed(root):
+                return True
+            time.sleep(0.1)
+        return False
+
+    def test_changes(self, tmpdir):
+        pytest.importorskip('inotify_simple')
+        from flexget.utils.library_index import Watcher
+
+        root = tmpdir.strpath
+        watcher = Watcher()
+        try:
+            watcher.add(root)
+            assert watcher.changed(root), 'a root should be refreshed once after being watched'
+            assert not watcher.changed(root)
+            tmpdir.mkdir('dir')
+            assert self.wait_changed(watcher, root)
+            # Watches are added for new directories
+            time.sleep(0.2)
+            watcher.changed(root)
+            tmpdir.join('dir').join('a.mkv').write('a')
+            assert self.wait_changed(watcher, root)
+            assert not watcher.changed(root)
+        finally:
+            watcher.stop()
@@ -11,8 +11,16 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import threading
+import time
+
+import mock
 import pytest
 
+from flexget.task import Task
+
+from .conftest import MockManager
+
 
 @pytest.mark.online
 class TestImdb(object):
@@ -332,3 +340,90 @@ class TestImdbLookup(object):
             # Should have only been one call to the actual imdb page
             imdb_calls = sum(1 for r in use_vcr.requests if 'title/tt0133093' in r.uri)
             assert imdb_calls == 1
+
+
+class TestImdbPrefetch(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'The Matrix 1999 720p'}
+              - {title: 'Something', imdb_id: 'tt0133093'}
+              - {title: 'Unknown'}
+            imdb_lookup: yes
+    """
+
+    def test_cached_movies_prefetched(self, execute_task):
+        from datetime import datetime
+
+        from flexget.manager import Session
+        from flexget.plugins.metainfo.imdb_lookup import ImdbLookup, Movie, SearchResult
+
+        with Session() as session:
+            movie = Movie()
+            movie.title = 'The Matrix'
+            movie.url = 'http://www.imdb.com/title/tt0133093/'
+            movie.year = 1999
+            movie.updated = datetime.now()
+            session.add(movie)
+            session.add(SearchResult('The Matrix 1999 720p', movie.url))
+        with mock.patch.object(ImdbLookup, 'lookup') as lookup:
+            task = execute_task('test')
+            assert [e.get('imdb_name') for e in task.all_entries] == ['The Matrix', 'The Matrix', None]
+        # Only the entry without a cached movie was looked up
+        assert [call[0][0]['title'] for call in lookup.call_args_list] == ['Unknown']
+
+
+class TestImdbConcurrentLookups(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Movie 1', imdb_id: 'tt0000001'}
+              - {title: 'Movie 1 REPACK', imdb_id: 'tt0000001'}
+              - {title: 'Movie 2', imdb_id: 'tt0000002'}
+              - {title: 'Movie 3', imdb_id: 'tt0000003'}
+            imdb_lookup: yes
+            accept_all: yes
+    """
+
+    def test_shared_rows_stored_once(self, request, tmpdir):
+        from flexget.manager import Session
+        from flexget.plugins.metainfo.imdb_lookup import Actor, Genre, Language, Movie
+        from flexget.utils.imdb import ImdbParser, extract_id
+
+        lock = threading.Lock()
+        parsing = []
+        most_parsing = []
+
+        def parse(parser, imdb_id):
+            with lock:
+                parsing.append(imdb_id)
+                most_parsing.append(len(parsing))
+            time.sleep(0.1)
+            parser.imdb_id = extract_id(imdb_id)
+            parser.name = 'Movie %s' % int(parser.imdb_id[2:])
+            parser.genres = ['comedy', 'drama']
+            parser.languages = ['english']
+            parser.actors = {'nm0000001': 'Actor'}
+            parser.directors = {'nm0000002': 'Director'}
+            parser.writers = {'nm0000003': 'Writer'}
+            with lock:
+                parsing.remove(imdb_id)
+
+        # Lookups are only run concurrently when the database is shared between threads
+        database_uri = 'sqlite:///%s' % tmpdir.join('test.sqlite').strpath.replace('\\', '\\\\')
+        manager = MockManager(self.config, request.cls.__name__, db_uri=database_uri)
+        try:
+            with mock.patch.object(ImdbParser, 'parse', parse):
+                task = Task(manager, 'test')
+                task.execute()
+                assert [entry['imdb_name'] for entry in task.accepted] == ['Movie 1', 'Movie 1', 'Movie 2', 'Movie 3']
+            assert max(most_parsing) > 1, 'lookups should have run concurrently'
+            with Session() as session:
+                assert session.query(Movie).count() == 3
+                assert sorted(genre.name for genre in session.query(Genre)) == ['comedy', 'drama']
+                assert session.query(Language).count() == 1
+                assert session.query(Actor).count() == 1
+        finally:
+            manager.shutdown()
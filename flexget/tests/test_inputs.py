@@ -1,6 +1,18 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget import plugin
+
+
+class FailingInput(object):
+    schema = {'type': 'boolean'}
+
+    def on_task_input(self, task, config):
+        raise plugin.PluginError('input failure')
+
+
+plugin.register(FailingInput, 'test_failing_input', api_ver=2, debug=True)
+
 
 class TestInputs(object):
     config = """
@@ -20,6 +32,28 @@ class TestInputs(object):
                   - {title: 'title1b', url: 'http://url1'}
                   - {title: 'title1c', url: 'http://other', urls: ['http://url1']}
                   - {title: 'title2', url: 'http://url2b'}
+          test_parallel:
+            max_parallel_inputs: 3
+            inputs:
+              - mock:
+                  - {title: 'title1', url: 'http://url1'}
+              - mock:
+                  - {title: 'title2', url: 'http://url2'}
+                  - {title: 'title1', url: 'http://url1b'}
+              - mock:
+                  - {title: 'title3', url: 'http://url3'}
+          test_parallel_task:
+            max_parallel_inputs: 2
+            mock:
+              - {title: 'title1', url: 'http://url1'}
+            inputs:
+              - mock:
+                  - {title: 'title2', url: 'http://url2'}
+          test_input_error:
+            inputs:
+              - mock:
+                  - {title: 'title1', url: 'http://url1'}
+              - test_failing_input: yes
           test_no_url:
             inputs:
               - mock:
@@ -37,3 +71,18 @@ class TestInputs(object):
         assert len(task.entries) == 2, 'Should only have created 2 entries'
         assert task.find_entry(title='title1a'), 'title1a should be in entries'
         assert task.find_entry(title='title2'), 'title2 should be in entries'
+
+    def test_input_error(self, execute_task, caplog):
+        task = execute_task('test_input_error')
+        assert len(task.entries) == 1
+        messages = [record.getMessage() for record in caplog.handler.records]
+        assert 'Error during input plugin test_failing_input: input failure' in messages
+        assert not any('did not return anything' in message for message in messages), 'should only be logged once'
+
+    def test_parallel(self, execute_task):
+        task = execute_task('test_parallel')
+        assert [e['title'] for e in task.entries] == ['title1', 'title2', 'title3'], 'Should keep config order'
+
+    def test_parallel_task(self, execute_task):
+        task = execute_task('test_parallel_task')
+        assert len(task.entries) == 2, 'Should have created 2 entries'
@@ -1,10 +1,54 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import threading
+import time
+from functools import partial
+
+import mock
+
 from flexget.entry import Entry
 from flexget.plugin import PluginError
 
 
+class FakeTask(object):
+    def __init__(self, entries):
+        self.all_entries = entries
+        for entry in entries:
+            entry.task = self
+
+
+class BatchedLookup(object):
+    max_parallel_lookups = 3
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most_running = 0
+        self.looked_up = []
+        self.prefetched = []
+
+    def prefetch_lazy(self, entries):
+        self.prefetched.append([entry['title'] for entry in entries])
+        for entry in entries:
+            if entry['title'] == 'cached':
+                entry['looked_up'] = 'from cache'
+
+    def lazy_loader(self, entry, suffix=''):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(0.05)
+        self.looked_up.append(entry['title'])
+        entry['looked_up'] = entry['title'] + suffix
+        with self.lock:
+            self.running -= 1
+
+
+class UnbatchedLookup(BatchedLookup):
+    max_parallel_lookups = None
+
+
 class TestLazyFields(object):
     def test_lazy_queue(self):
         """Tests behavior when multiple plugins register lazy lookups for the same field"""
@@ -39,3 +83,28 @@ class TestLazyFields(object):
         assert entry['a_fail'] == 'b', 'Lookup should have fallen back to b'
         assert entry['a_field'] is None, 'a_field should be None after failed lookup'
         assert entry['ab_field'] == 'b', 'ab_field should be `b`'
+
+    @mock.patch('flexget.manager.manager', None)
+    def test_batched_lookups(self):
+        lookup = BatchedLookup()
+        entries = [Entry(title=title, url='') for title in ('a', 'b', 'cached', 'rejected', 'c', 'd')]
+        FakeTask(entries)
+        entries[3].reject()
+        for entry in entries:
+            entry.register_lazy_func(partial(lookup.lazy_loader, suffix='!'), ['looked_up'])
+        assert entries[0]['looked_up'] == 'a!'
+        assert lookup.prefetched == [['a', 'b', 'cached', 'c', 'd']]
+        assert sorted(lookup.looked_up) == ['a', 'b', 'c', 'd']
+        assert lookup.most_running == 3
+        assert [entry.get('looked_up') for entry in entries] == ['a!', 'b!', 'from cache', 'rejected!', 'c!', 'd!']
+        assert sorted(lookup.looked_up) == ['a', 'b', 'c', 'd', 'rejected']
+
+    def test_unbatched_lookups(self):
+        lookup = UnbatchedLookup()
+        entries = [Entry(title=title, url='') for title in ('a', 'b')]
+        FakeTask(entries)
+        for entry in entries:
+            entry.register_lazy_func(lookup.lazy_loader, ['looked_up'])
+        assert entries[0]['looked_up'] == 'a'
+        assert lookup.looked_up == ['a']
+        assert not lookup.prefetched
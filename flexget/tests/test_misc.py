@@ -5,6 +5,7 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.utils import text_type
 
 import os
+import pickle
 import stat
 
 import pytest
@@ -164,6 +165,77 @@ class TestEntryStringCoercion(object):
         assert type(e['test']) == text_type  # pylint: disable=unidiomatic-typecheck
 
 
+class TestEntrySnapshot(object):
+    def test_copy_on_write(self):
+        e = Entry('title', 'url', tags=['a'], size=1)
+        e.take_snapshot('test')
+        snapshot = e.snapshots['test']
+        assert not snapshot.changed_fields()
+        e['size'] = 2
+        e['tags'].append('b')
+        e['new'] = 'field'
+        del e['url']
+        assert dict(snapshot) == {'title': 'title', 'url': 'url', 'original_url': 'url', 'tags': ['a'], 'size': 1}
+        assert snapshot.changed_fields() == {'size', 'tags', 'new', 'url'}
+
+        e.restore_snapshot('test')
+        assert dict(e) == dict(snapshot)
+        assert not e.snapshots['test'].changed_fields()
+
+    def test_lazy_not_evaluated(self):
+        calls = []
+
+        def lazy(entry):
+            calls.append(entry['title'])
+            entry['lazy_field'] = 'value'
+
+        e = Entry('title', 'url')
+        e.register_lazy_func(lazy, ['lazy_field'])
+        e.take_snapshot('test')
+        assert not calls, 'taking a snapshot should not evaluate lazy fields'
+        assert e['lazy_field'] == 'value'
+        assert not e.snapshots['test'].changed_fields()
+        assert e.snapshots['test']['lazy_field'] == 'value'
+        assert len(calls) == 1
+
+    def test_copy_entry(self):
+        calls = []
+
+        def lazy(entry):
+            calls.append(entry['title'])
+            entry['lazy_field'] = 'value'
+
+        e = Entry('title', 'url', tags=['a'])
+        e.register_lazy_func(lazy, ['lazy_field'])
+        e.on_accept(lambda entry, **kwargs: calls.append('accepted'))
+        e.take_snapshot('test')
+        e['tags'].append('b')
+        e['title'] = 'changed'
+        e.on_reject(lambda entry, **kwargs: calls.append('rejected'))
+        copy = e.snapshots['test'].copy_entry()
+        assert copy['title'] == 'title'
+        assert copy['tags'] == ['a']
+        assert copy.is_lazy('lazy_field')
+        assert copy['lazy_field'] == 'value'
+        assert e.is_lazy('lazy_field'), 'looking up the field on the copy should not change the entry'
+        assert not copy.snapshots
+        copy.accept()
+        copy.reject()
+        assert calls == ['title', 'accepted'], 'hooks added after the snapshot should not be copied'
+
+    @pytest.mark.parametrize('protocol', [0, pickle.HIGHEST_PROTOCOL])
+    def test_pickle(self, protocol):
+        e = Entry('title', 'url')
+        e.take_snapshot('test')
+        e['size'] = 1
+        e.trace('message')
+        e = pickle.loads(pickle.dumps(e, protocol))
+        assert e['size'] == 1
+        assert e.traces == [(None, None, 'message')]
+        assert e.snapshots['test'].entry is e
+        assert e.snapshots['test'].changed_fields() == {'size'}
+
+
 class TestFilterRequireField(object):
     config = """
         tasks:
@@ -282,3 +354,45 @@ class TestSetPlugin(object):
         entry = task.find_entry('entries', title='Entry 1')
         assert entry['title'] == 'Entry 1', 'should fall back to original value when template fails'
         assert entry['other'] is None
+
+
+class TestRenderFromEntry(object):
+    config = """
+        tasks: {}
+    """
+
+    def test_compiled_once(self, manager):
+        from flexget.utils import template
+        template.render_from_entry('{{ title }}', Entry(title='a'))
+        compiled = template._template_cache['{{ title }}']
+        assert template.render_from_entry('{{ title }}', Entry(title='b')) == 'b'
+        assert template._template_cache['{{ title }}'] is compiled
+        assert template.evaluate_expression('a > 1', template.RenderContext({'a': 2}))
+        assert template.evaluate_expression('a > 1', template.RenderContext({'a': 1})) is False
+        assert len([key for key in template._expression_cache if key == 'a > 1']) == 1
+
+    def test_lazy_fields(self, manager):
+        from flexget.utils.template import RenderContext, evaluate_expression
+        calls = []
+
+        def lazy(entry):
+            calls.append(entry['title'])
+            entry['lazy'] = 'looked up'
+
+        entry = Entry(title='a')
+        entry.register_lazy_func(lazy, ['lazy'])
+        assert entry.render('{{ title }}') == 'a'
+        assert not calls, 'lazy field was looked up without being used'
+        assert entry.render('{{ lazy }}') == 'looked up'
+        assert evaluate_expression('lazy == "looked up" and missing is not defined', RenderContext(entry.store))
+        assert calls == ['a']
+
+    def test_overlay(self, manager):
+        from flexget.utils.template import RenderContext, RenderError, render
+        context = RenderContext({'a': 'store', 'b': 'store'}, {'a': 'overlay'})
+        assert render('{{ a }} {{ b }}', context) == 'overlay store'
+        assert set(context) == {'a', 'b'}
+        with pytest.raises(RenderError):
+            render('{{ missing }}', context)
+        with pytest.raises(RenderError):
+            render('{{ missing', context)
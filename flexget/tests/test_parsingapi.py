@@ -3,14 +3,18 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 from flexget.plugin import get_plugin_by_name, get_plugins
 from flexget.plugins.parsers import plugin_parsing
+from flexget.utils import qualities
 
 
 class TestParsingAPI(object):
     def test_all_types_handled(self):
         declared_types = set(plugin_parsing.PARSER_TYPES)
-        method_handlers = set(m[6:] for m in dir(get_plugin_by_name('parsing').instance) if m.startswith('parse_'))
+        methods = [m for m in dir(get_plugin_by_name('parsing').instance) if m.startswith('parse_')]
+        method_handlers = set(m[6:] for m in methods if not m.endswith('_many'))
         assert set(declared_types) == set(method_handlers), \
             'declared parser types: %s, handled types: %s' % (declared_types, method_handlers)
+        batch_handlers = set(m[6:-5] for m in methods if m.endswith('_many'))
+        assert batch_handlers <= declared_types, 'batch parse methods for unknown types: %s' % batch_handlers
 
     def test_parsing_plugins_have_parse_methods(self):
         for parser_type in plugin_parsing.PARSER_TYPES:
@@ -32,3 +36,39 @@ class TestTaskParsing(object):
         # make sure when a non-default parser is installed on a task, it doesn't affect other tasks
         execute_task('explicit_parser')
         assert not plugin_parsing.selected_parsers
+
+
+class TestParseCache(object):
+    config = """
+        tasks: {}
+    """
+
+    def test_cached_results_are_copies(self, manager):
+        parser = get_plugin_by_name('parsing').instance
+        first = parser.parse_series('Some.Show.S01E02.720p.HDTV-FlexGet', name='Some Show')
+        first.name = 'Modified'
+        second = parser.parse_series('Some.Show.S01E02.720p.HDTV-FlexGet', name='Some Show')
+        assert second.name == 'Some Show'
+        assert second is not first
+
+    def test_cached_quality_is_copied(self, manager):
+        parser = get_plugin_by_name('parsing').instance
+        first = parser.parse_series('Some.Show.S01E02.720p.HDTV-FlexGet', name='Some Show')
+        first.quality.resolution = qualities.get('1080p').resolution
+        second = parser.parse_series('Some.Show.S01E02.720p.HDTV-FlexGet', name='Some Show')
+        assert second.quality == qualities.Quality('720p hdtv')
+        assert second.quality is not first.quality
+
+    def test_kwargs_in_key(self, manager):
+        parser = get_plugin_by_name('parsing').instance
+        title = 'Some.Show.S01E02.720p.HDTV-FlexGet'
+        assert parser.parse_series(title, name='Some Show').valid
+        assert not parser.parse_series(title, name='Other Show').valid
+        assert parser.parse_series(title, name='Other Show', alternate_names=['Some Show']).valid
+
+    def test_parse_series_many(self, manager):
+        parser = get_plugin_by_name('parsing').instance
+        titles = ['Some.Show.S01E02.720p.HDTV-FlexGet', 'Other.Show.S02E03.HDTV-FlexGet', 'Some.Show.S01E03.HDTV']
+        results = parser.parse_series_many(titles, name='Some Show')
+        assert [r.valid for r in results] == [True, False, True]
+        assert [r.identifier for r in results if r.valid] == ['S01E02', 'S01E03']
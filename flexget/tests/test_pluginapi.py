@@ -1,8 +1,11 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
-import os
 import glob
+import json
+import os
+import subprocess
+import sys
 
 import pytest
 
@@ -83,3 +86,79 @@ class TestExternalPluginLoading(object):
         # TODO: This isn't working because calling load_plugins again doesn't cause the schema for tasks to regenerate
         task = execute_task('ext_plugin')
         assert task.find_entry(title='test entry'), 'External plugin did not create entry'
+
+
+class TestLazyPlugins(object):
+    _config = """
+        templates:
+          lazy:
+            lazy_filter: yes
+        tasks:
+          lazy:
+            template: lazy
+            lazy_input: yes
+    """
+
+    @pytest.yield_fixture()
+    def config(self, request):
+        sys.path.insert(0, request.fspath.dirpath().join('lazy_plugins').strpath)
+        # Placeholders like the ones created from the plugin manifest
+        for module_name in ('lazy_input', 'lazy_filter'):
+            phase = module_name.split('_')[1]
+            plugin.LazyPluginInfo(module_name, name=module_name, api_ver=2, interfaces=['task'], debug=False,
+                                  category=None, schema={'type': 'boolean', 'id': '/schema/plugin/%s' % module_name},
+                                  phases={phase: 128})
+        # fire the config register event again so that task schema is rebuilt with the placeholders
+        fire_event('config.register')
+        yield self._config
+        sys.path.remove(request.fspath.dirpath().join('lazy_plugins').strpath)
+
+    def test_lazy_plugins(self, execute_task):
+        assert isinstance(plugin.get_plugin_by_name('lazy_input'), plugin.LazyPluginInfo)
+        assert isinstance(plugin.get_plugin_by_name('lazy_filter'), plugin.LazyPluginInfo)
+        assert 'lazy_input' not in sys.modules and 'lazy_filter' not in sys.modules
+        task = execute_task('lazy')
+        assert task.find_entry('accepted', title='lazy entry'), 'lazy plugins did not run'
+        # lazy_input is configured in the task and imported before it runs, lazy_filter only gets merged from
+        # the template in the prepare phase and is imported by its placeholder phase handler
+        assert not isinstance(plugin.get_plugin_by_name('lazy_input'), plugin.LazyPluginInfo)
+        assert not isinstance(plugin.get_plugin_by_name('lazy_filter'), plugin.LazyPluginInfo)
+        assert 'lazy_input' in sys.modules and 'lazy_filter' in sys.modules
+
+
+class TestPluginManifest(object):
+    config = 'tasks: {}'
+
+    script = """
+import json, sys
+from flexget import logger, plugin
+logger.initialize(True)
+plugin.load_plugins(manifest=sys.argv[1])
+rss = plugin.get_plugin_by_name('rss')
+result = {'lazy': isinstance(rss, plugin.LazyPluginInfo),
+          'imported': 'flexget.plugins.input.rss' in sys.modules,
+          'phases': sorted(rss.phase_handlers)}
+result['instance'] = type(rss.instance).__name__
+print(json.dumps(result))
+"""
+
+    def load_plugins(self, manifest):
+        """Loads plugins in a fresh interpreter, so that nothing is imported yet."""
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(plugins.__file__))))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get('PYTHONPATH', '')]))
+        output = subprocess.check_output([sys.executable, '-c', self.script, manifest], env=env)
+        return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+    def test_manifest(self, tmpdir):
+        manifest = tmpdir.join('plugin_manifest.json').strpath
+        result = self.load_plugins(manifest)
+        assert not result['lazy'], 'plugins should be imported while the manifest is built'
+        assert os.path.exists(manifest)
+        with open(manifest) as f:
+            assert 'flexget.plugins.input.rss' in json.load(f)['lazy']
+
+        result = self.load_plugins(manifest)
+        assert result['lazy']
+        assert not result['imported'], 'rss should not have been imported before it was used'
+        assert result['phases'] == ['input']
+        assert result['instance'] == 'InputRSS'
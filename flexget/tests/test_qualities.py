@@ -1,14 +1,41 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import random
+
 import pytest
 from jinja2 import Template
 
 from flexget.plugins.parsers.parser_guessit import ParserGuessit
 from flexget.plugins.parsers.parser_internal import ParserInternal
+from flexget.utils import qualities
 from flexget.utils.qualities import Quality
 
 
+def search_all(text):
+    """Parses `text` by searching for every component in turn, the way qualities were parsed before tokenizing."""
+    clean_text = text
+    result = {}
+    for type, qlist in [('resolution', qualities._resolutions), ('source', qualities._sources),
+                        ('codec', qualities._codecs), ('audio', qualities._audios)]:
+        search_in = clean_text
+        for item in qlist:
+            match = item.matches(search_in)
+            if match[0]:
+                result[type] = item
+                clean_text = match[1]
+                if type != 'resolution':
+                    search_in = clean_text
+                if item.modifier is not None:
+                    break
+    for component in list(result.values()):
+        for default in component.defaults:
+            default = qualities._registry[default]
+            result.setdefault(default.type, default)
+    return ' '.join(str(result[type]) for type in ('resolution', 'source', 'codec', 'audio') if type in result), \
+        clean_text
+
+
 class TestQualityModule(object):
     def test_get(self):
         assert not Quality(), 'unknown quality is not false'
@@ -19,6 +46,40 @@ class TestQualityModule(object):
             got_val = Quality(test_val).name
             assert got_val == '720p', got_val
 
+    def test_cached_parse_is_not_shared(self):
+        quality = Quality('Show.S01E01.720p.HDTV.x264')
+        quality.resolution = Quality('1080p').resolution
+        again = Quality('Show.S01E01.720p.HDTV.x264')
+        assert again.name == '720p hdtv h264'
+        assert again.clean_text == 'Show.S01E01...'
+
+    @pytest.mark.parametrize('text, expected', [
+        # dtshd is taken first, plain dts still matches elsewhere
+        ('dtshd.dts-hd', 'dts'),
+        # dts is a prefix of a dtshd match
+        ('dts-hd', 'dtshd'),
+        # aac channels overlap 10bit, which is removed first
+        ('aac 10-bit', '10bit aac'),
+    ])
+    def test_overlapping_components(self, text, expected):
+        assert Quality(text).name == expected
+
+    def test_removed_match_joins_text(self):
+        quality = Quality('Show-dd+hevc-5.1[')
+        assert quality.name == 'h265 dd+5.1'
+        assert quality.clean_text == 'Show-['
+
+    def test_same_as_searching_all(self):
+        rng = random.Random(0)
+        words = ['Show', 'S01E01', '2016', '720p', '1080i', '1280x720', 'bluray', 'web-dl', 'webrip', 'hdtv', 'dvd',
+                 'rip', 'hd', 'x264', 'h264', 'hevc', '10bit', '10-bit', 'xvid', 'dd', 'dd+', 'dd5.1', 'dd+5.1', 'dts',
+                 'dts-hd', 'dtshd', 'aac', 'aac2.0', 'truehd', 'flac', 'mp3', '5.1', '2.0']
+        for _ in range(5000):
+            # Mostly without separators, so that removing a match can join the text around it into another one
+            text = ''.join(rng.choice(words) + rng.choice(['-', '', '.']) for _ in range(rng.randint(1, 6)))
+            quality = Quality(text)
+            assert (quality.name if quality else '', quality.clean_text) == search_all(text), text
+
 
 class TestQualityParser(object):
     @pytest.fixture(scope='class', params=['internal', 'guessit'], ids=['internal', 'guessit'], autouse=True)
@@ -1,6 +1,10 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from mock import patch
+
+from flexget.plugins.filter.regexp import FilterRegexp
+
 
 class TestRegexp(object):
     config = """
@@ -96,6 +100,23 @@ class TestRegexp(object):
                 - genre1
                 - genre2:
                     not: genre3
+
+          test_first_match_wins:
+            regexp:
+              accept:
+                - regular:
+                    set: {matched_by: other}
+                    from: [otherfield, title]
+                    not: genre1
+                - genre:
+                    set: {matched_by: genre}
+                    from: genre
+                - expression:
+                    set: {matched_by: title}
+                - regexp1:
+                    set: {matched_by: first}
+                - regexp\\d:
+                    set: {matched_by: second}
     """
 
     def test_accept(self, execute_task):
@@ -154,3 +175,25 @@ class TestRegexp(object):
         assert task.find_entry('accepted', title='expression'), '\'expression\' should have been accepted'
         assert task.find_entry('entries',
                                title='regular') not in task.accepted, '\'regular\' should not have been accepted'
+
+    def test_first_match_wins(self, execute_task):
+        task = execute_task('test_first_match_wins')
+        assert task.find_entry('accepted', title='expression', matched_by='genre')
+        assert task.find_entry('accepted', title='regexp1', matched_by='first')
+        assert task.find_entry('accepted', title='regexp2', matched_by='second')
+        # `not` only applies to the field the regexp matched in
+        assert task.find_entry('accepted', title='regular', matched_by='other')
+
+    def test_fields_read_once(self, execute_task):
+        field_values = FilterRegexp.field_values
+        reads = []
+
+        def counted_field_values(self, entry, field, eval_lazy):
+            reads.append((entry['title'], field, eval_lazy))
+            return field_values(self, entry, field, eval_lazy)
+
+        with patch.object(FilterRegexp, 'field_values', counted_field_values):
+            task = execute_task('test_first_match_wins')
+        assert task.find_entry('accepted', title='regular', matched_by='other')
+        # `not` regexps are searched from the values read for the regexps
+        assert sorted(reads) == sorted(set(reads))
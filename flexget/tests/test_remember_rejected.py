@@ -4,6 +4,8 @@ from past.builtins import basestring
 
 from flexget import plugin
 from flexget.event import event
+from flexget.manager import Session
+from flexget.plugins.filter.remember_rejected import RememberEntry
 from flexget.utils.tools import parse_timedelta
 
 
@@ -28,6 +30,13 @@ class TestRememberRejected(object):
             mock:
               - {title: 'title 1', url: 'http://localhost/title1'}
             test_remember_reject: yes
+          test_many:
+            mock:
+              - {title: 'title 1', url: 'http://localhost/title1'}
+              - {title: 'title 2', url: 'http://localhost/title2'}
+              - {title: 'title 3', url: 'http://localhost/title3'}
+              - {title: 'title 4', url: 'http://localhost/title4'}
+            test_remember_reject: yes
     """
 
     def test_remember_rejected(self, execute_task):
@@ -36,3 +45,17 @@ class TestRememberRejected(object):
         task = execute_task('test')
         assert task.find_entry('rejected', title='title 1', rejected_by='remember_rejected'), \
             'remember_rejected should have rejected'
+
+    def test_remember_rejected_many(self, execute_task):
+        task = execute_task('test_many')
+        assert len(task.rejected) == 4
+        with Session() as session:
+            session.query(RememberEntry).filter(RememberEntry.title.in_(['title 3', 'title 4'])). \
+                update({'url': 'http://localhost/other'}, synchronize_session=False)
+        task = execute_task('test_many')
+        for title in ('title 1', 'title 2'):
+            assert task.find_entry('rejected', title=title, rejected_by='remember_rejected'), \
+                '%s should have been remembered' % title
+        for title in ('title 3', 'title 4'):
+            assert task.find_entry('rejected', title=title, rejected_by='test_remember_reject'), \
+                '%s has a different url and should not have been remembered' % title
@@ -1,9 +1,20 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import threading
+import time
+
 import pytest
 import yaml
 
+from flexget import plugin
+from flexget.manager import Session
+from flexget.plugins.input.rss import InputRSS
+from flexget.task import Task
+from flexget.utils.simple_persistence import SimpleKeyValue
+
+from .conftest import MockManager
+
 
 class TestInputRSS(object):
     config = """
@@ -158,6 +169,55 @@ class TestInputRSS(object):
             'RSS entry missing: multiple content tags'
 
 
+class ConcurrentRSS(InputRSS):
+    """Reads the feed once the other instances of this input have started as well."""
+
+    started = []
+    condition = threading.Condition()
+
+    def on_task_input(self, task, config):
+        with self.condition:
+            self.started.append(task.current_plugin)
+            self.condition.notify_all()
+            deadline = time.time() + 5
+            while len(self.started) < 2 and time.time() < deadline:
+                self.condition.wait(0.1)
+        return super(ConcurrentRSS, self).on_task_input(task, config)
+
+
+plugin.register(ConcurrentRSS, 'test_rss_a', api_ver=2, debug=True)
+plugin.register(ConcurrentRSS, 'test_rss_b', api_ver=2, debug=True)
+
+
+class TestConcurrentRSS(object):
+    config = """
+        tasks:
+          test:
+            max_parallel_inputs: 2
+            test_rss_a:
+              url: rss.xml
+              all_entries: no
+            test_rss_b:
+              url: rss.xml
+              all_entries: no
+    """
+
+    def test_persistence_per_plugin(self, request, tmpdir):
+        # An in memory database is not shared between the threads running the inputs
+        database_uri = 'sqlite:///%s' % tmpdir.join('rss.sqlite').strpath.replace('\\', '\\\\')
+        manager = MockManager(self.config, request.cls.__name__, db_uri=database_uri)
+        try:
+            task = Task(manager, 'test')
+            task.execute()
+            assert sorted(ConcurrentRSS.started) == ['test_rss_a', 'test_rss_b']
+            assert task.entries
+            with Session() as session:
+                keys = [(skv.plugin, skv.key.split('_', 1)[1]) for skv in session.query(SimpleKeyValue)]
+            assert sorted(keys) == [('test_rss_a', 'last_entry'), ('test_rss_b', 'last_entry')]
+        finally:
+            manager.shutdown()
+
+
 @pytest.mark.xfail(reason="silverorange changed some stuff")
 @pytest.mark.online
 class TestRssOnline(object):
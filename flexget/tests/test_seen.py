@@ -1,6 +1,8 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from flexget.plugins.filter import seen
+
 
 class TestFilterSeen(object):
     config = """
@@ -113,6 +115,39 @@ class TestSeenLocal(object):
         assert task.find_entry('rejected', title='item 2'), 'item 2 should be seen'
 
 
+class TestSeenBloomFilter(object):
+    config = """
+      tasks:
+        test:
+          seen:
+            bloom_filter: yes
+          accept_all: yes
+          mock:
+          - {title: 'item 1', url: 'http://localhost/item1'}
+          - {title: 'item 2', url: 'http://localhost/item2'}
+        test2:
+          seen:
+            bloom_filter: yes
+          accept_all: yes
+          mock:
+          - {title: 'item 3', url: 'http://localhost/item1'}
+          - {title: 'item 4', url: 'http://localhost/item4'}
+          - {title: 'item 5'}
+    """
+
+    def test_bloom_filter(self, execute_task):
+        task = execute_task('test')
+        assert len(task.accepted) == 2
+        task = execute_task('test')
+        assert len(task.rejected) == 2, 'entries learned after the filter was built should be seen'
+        # Values added outside of the seen plugin should be picked up as well
+        seen.add('item 5', 'cli', {'title': 'item 5'})
+        task = execute_task('test2')
+        assert task.find_entry('rejected', title='item 3'), 'item 3 should be seen by url'
+        assert task.find_entry('accepted', title='item 4'), 'item 4 should not be seen'
+        assert task.find_entry('rejected', title='item 5'), 'item 5 should be seen by title'
+
+
 class TestFilterSeenMovies(object):
     config = """
         tasks:
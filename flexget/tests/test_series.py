@@ -6,9 +6,11 @@ from io import StringIO
 
 import pytest
 from jinja2 import Template
+from sqlalchemy import event
 from sqlalchemy.sql import select
 
 from flexget.entry import Entry
+from flexget.event import add_event_handler, remove_event_handler
 from flexget.logger import capture_output
 from flexget.manager import Session, get_parser
 from flexget.plugins.filter.series import Series, SeriesTask, Episode, EpisodeRelease, Season, SeasonRelease
@@ -2419,3 +2421,68 @@ class TestSeriesDDAudio(object):
         assert task.find_entry(title='Channels.S01E01.1080p.HDTV.DD+7.1-FlexGet'), \
             'Channels.S01E01.1080p.HDTV.DD+7.1-FlexGet should have been accepted'
         assert len(task.accepted) == 1, 'should have accepted only one'
+
+
+class TestFilterQueries(object):
+    config = """
+        templates:
+          global:
+            parsing:
+              series: {{parser}}
+            disable: builtins
+        tasks:
+          few_series:
+            series:
+            {% for i in range(2) %}
+              - few {{i}}
+            {% endfor %}
+            mock:
+            {% for i in range(2) %}
+              - {title: 'few {{i}} S01E01 720p HDTV'}
+              - {title: 'few {{i}} S01E02 HDTV'}
+            {% endfor %}
+          many_series:
+            series:
+            {% for i in range(30) %}
+              - many {{i}}
+            {% endfor %}
+            mock:
+            {% for i in range(30) %}
+              - {title: 'many {{i}} S01E01 720p HDTV'}
+              - {title: 'many {{i}} S01E02 HDTV'}
+            {% endfor %}
+    """
+
+    def count_filter_queries(self, manager, execute_task, task_name):
+        """Returns number of queries ran by series filter phase for `task_name`."""
+        counter = {'counting': False, 'queries': 0}
+
+        def before_plugin(task, keyword):
+            counter['counting'] = task.current_phase == 'filter' and keyword == 'series'
+
+        def after_plugin(task, keyword):
+            counter['counting'] = False
+
+        def before_cursor_execute(*args):
+            if counter['counting']:
+                counter['queries'] += 1
+
+        add_event_handler('task.execute.before_plugin', before_plugin)
+        add_event_handler('task.execute.after_plugin', after_plugin)
+        event.listen(manager.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            execute_task(task_name)
+        finally:
+            event.remove(manager.engine, 'before_cursor_execute', before_cursor_execute)
+            remove_event_handler('task.execute.before_plugin', before_plugin)
+            remove_event_handler('task.execute.after_plugin', after_plugin)
+        return counter['queries']
+
+    def test_queries_do_not_scale_with_series(self, manager, execute_task):
+        for task_name in ('few_series', 'many_series'):
+            task = execute_task(task_name)
+            assert len(task.accepted) == len(task.entries)
+        # On repeated runs everything exists in the database already, lookups should be done in bulk
+        few = self.count_filter_queries(manager, execute_task, 'few_series')
+        many = self.count_filter_queries(manager, execute_task, 'many_series')
+        assert many == few, 'series filter ran %s queries for 30 series, %s for 2 series' % (many, few)
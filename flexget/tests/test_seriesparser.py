@@ -7,6 +7,7 @@ import pytest
 
 from flexget.plugins.parsers.parser_internal import ParserInternal
 from flexget.plugins.parsers.parser_guessit import ParserGuessit
+from flexget.plugins.filter.series import SeriesMatcher
 
 
 class TestSeriesParser(object):
@@ -616,3 +617,45 @@ class TestSeriesParser(object):
         assert s.season == 1
         assert s.episode == 1
 
+
+class TestSeriesMatcher(object):
+    config = [
+        {'Some Show': {}},
+        {'Law & Order': {}},
+        {'Other Show (US)': {}},
+        {'Alt Show': {'alternate_name': ['Alternative']}},
+        {'Regexp Show': {'name_regexp': ['^re.?show']}},
+        {'Some Show Extended': {}},
+    ]
+
+    titles = [
+        ('Some.Show.S01E01.720p.HDTV', {0}),
+        ('Some_Show_Extended.S01E01', {0, 5}),
+        ('[Group] Some Show - 01', {0}),
+        ('HD 720p: SomeShow S01E01', {0}),
+        ('Law.and.Order.S10E01', {1}),
+        ('Law & Order S10E01', {1}),
+        ('Other Show S01E01', {2}),
+        ('Other.Show.US.S01E01', {2}),
+        ('Alternative.S02E02', {3}),
+        ('Re-Show.S01E01', {4}),
+        ('Regexp.Show.S01E01', set()),
+        ('Unknown.S01E01', set()),
+    ]
+
+    @pytest.mark.parametrize('title, expected', titles)
+    def test_candidates(self, title, expected):
+        assert SeriesMatcher(self.config).candidates(title) == expected
+
+    def test_superset_of_parser(self):
+        """Every series the parser accepts a title for must be a candidate for the title."""
+        matcher = SeriesMatcher(self.config)
+        for title, _ in self.titles:
+            candidates = matcher.candidates(title)
+            for index, series_item in enumerate(self.config):
+                name, series_config = list(series_item.items())[0]
+                result = ParserInternal().parse_series(title, name=name,
+                                                       alternate_names=series_config.get('alternate_name', []),
+                                                       name_regexps=series_config.get('name_regexp', []))
+                if result.valid:
+                    assert index in candidates, '%s should be a candidate for %s' % (name, title)
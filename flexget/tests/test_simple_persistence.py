@@ -1,7 +1,12 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
-from flexget.utils.simple_persistence import SimplePersistence
+from sqlalchemy import event
+
+from flexget.manager import Session
+from flexget.utils.simple_persistence import SimplePersistence, SimpleKeyValue
+
+from .conftest import MockManager
 
 
 class TestSimplePersistence(object):
@@ -29,3 +34,67 @@ class TestSimplePersistence(object):
         # Make sure it commits and actually persists
         persist = SimplePersistence('testplugin')
         assert persist['aoeu'] == 'test'
+
+    def test_flush_changed(self, manager):
+        persist = SimplePersistence('flush_plugin')
+        persist['a'] = 1
+        persist['b'] = {'value': 2}
+        SimplePersistence.flush()
+        with Session() as session:
+            rows = session.query(SimpleKeyValue).filter(SimpleKeyValue.plugin == 'flush_plugin').all()
+            assert dict((row.key, row.value) for row in rows) == {'a': 1, 'b': {'value': 2}}
+
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(manager.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            SimplePersistence.flush()
+            assert not statements, 'nothing changed, nothing should have been written'
+            persist['b']['value'] = 3
+            del persist['a']
+            SimplePersistence.flush()
+        finally:
+            event.remove(manager.engine, 'before_cursor_execute', before_cursor_execute)
+        assert len(statements) == 3, 'expected a select, an update and a delete, got %s' % statements
+        with Session() as session:
+            rows = session.query(SimpleKeyValue).filter(SimpleKeyValue.plugin == 'flush_plugin').all()
+            assert dict((row.key, row.value) for row in rows) == {'b': {'value': 3}}
+        assert 'a' not in persist
+
+    def test_lazy_load(self, manager):
+        with Session() as session:
+            session.add(SimpleKeyValue('lazy_task', 'lazy_plugin', 'key', 'value'))
+            session.add(SimpleKeyValue('lazy_task', 'other_plugin', 'key', 'other value'))
+        persist = SimplePersistence('lazy_plugin')
+        persist.taskname = 'lazy_task'
+        assert persist['key'] == 'value'
+        assert ('lazy_task', 'lazy_plugin') in SimplePersistence.class_loaded
+        assert ('lazy_task', 'other_plugin') not in SimplePersistence.class_loaded
+
+    def test_db_cleanup(self, manager):
+        persist = SimplePersistence('cleanup_plugin')
+        persist.taskname = 'removed_task'
+        persist['key'] = 'value'
+        SimplePersistence.flush('removed_task')
+        manager.db_cleanup(force=True)
+        persist['key'] = 'value'
+        SimplePersistence.flush('removed_task')
+        with Session() as session:
+            assert session.query(SimpleKeyValue).filter(SimpleKeyValue.task == 'removed_task').count() == 1
+
+    def test_new_manager(self, request):
+        for _ in range(2):
+            # Each manager starts with a database of its own
+            manager = MockManager(self.config, request.cls.__name__)
+            try:
+                persist = SimplePersistence('manager_plugin')
+                assert 'key' not in persist
+                persist['key'] = 'value'
+                SimplePersistence.flush()
+                with Session() as session:
+                    assert session.query(SimpleKeyValue).filter(SimpleKeyValue.plugin == 'manager_plugin').count() == 1
+            finally:
+                manager.shutdown()
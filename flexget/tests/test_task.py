@@ -1,6 +1,25 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import pytest
+
+from flexget import plugin
+from flexget.event import add_event_handler, remove_event_handler
+
+
+class AppendRun(object):
+    """Changes the entries in place on every run."""
+
+    schema = {'type': 'boolean'}
+
+    def on_task_metainfo(self, task, config):
+        for entry in task.entries:
+            entry['runs'].append(task.rerun_count)
+            entry['title'] += ' changed'
+
+
+plugin.register(AppendRun, 'test_append_run', api_ver=2, debug=True)
+
 
 class TestTemplate(object):
     config = """
@@ -29,3 +48,62 @@ class TestTemplate(object):
 
         task = execute_task('test')
         assert len(task.entries) == 2, 'Should have emitted House S01E02 and Hawaii Five-O S01E01'
+
+
+class TestInputReplay(object):
+    config = """
+        tasks:
+          replay:
+            mock:
+              - {title: 'entry 1'}
+            accept_all: yes
+            disable: seen
+            rerun: 2
+          replay_changed:
+            mock:
+              - {title: 'entry 1', runs: []}
+            test_append_run: yes
+            disable: seen
+            rerun: 2
+          no_replay:
+            inputs:
+              - mock:
+                  - {title: 'entry 1'}
+              - next_series_episodes: yes
+            series:
+              - House
+            rerun: 2
+    """
+
+    @pytest.fixture()
+    def plugin_runs(self):
+        runs = []
+
+        def before_plugin(task, keyword):
+            if task.current_phase == 'input':
+                runs.append(keyword)
+
+        add_event_handler('task.execute.before_plugin', before_plugin)
+        yield runs
+        remove_event_handler('task.execute.before_plugin', before_plugin)
+
+    def test_replay(self, execute_task, plugin_runs):
+        task = execute_task('replay')
+        assert task.rerun_count == 2
+        assert plugin_runs.count('mock') == 1, 'mock input should have been replayed on reruns'
+        assert plugin_runs.count('rerun') == 3
+        assert task.find_entry('accepted', title='entry 1'), 'replayed entry should have been accepted'
+        assert task.find_entry(title='entry 1').task is task
+
+    def test_replay_changed(self, execute_task, plugin_runs):
+        task = execute_task('replay_changed')
+        assert task.rerun_count == 2
+        assert plugin_runs.count('mock') == 1
+        entry = task.find_entry(title='entry 1 changed')
+        assert entry, 'replayed entry should have the title it had after input'
+        assert entry['runs'] == [2], 'replayed entry should not keep changes from previous runs'
+
+    def test_opt_out(self, execute_task, plugin_runs):
+        task = execute_task('no_replay')
+        assert task.rerun_count == 2
+        assert plugin_runs.count('inputs') == 3, 'inputs containing next_series_episodes should run on reruns'
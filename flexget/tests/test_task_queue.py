@@ -0,0 +1,164 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import threading
+import time
+from functools import total_ordering
+
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.manager import Session
+from flexget.plugins.operate.status import TaskExecution
+from flexget.task import Task
+from flexget.task_queue import TaskQueue
+
+from .conftest import MockManager
+
+
+@total_ordering
+class FakeTask(object):
+    """Minimal stand-in for a task which records how many tasks were running concurrently."""
+
+    def __init__(self, manager, name, config, tracker, priority=0):
+        self.manager = manager
+        self.name = name
+        self.config = config
+        self.priority = priority
+        self.tracker = tracker
+
+    def execute(self):
+        with self.tracker['lock']:
+            self.tracker['running'] += 1
+            self.tracker['max_running'] = max(self.tracker['max_running'], self.tracker['running'])
+        time.sleep(0.2)
+        with self.tracker['lock']:
+            self.tracker['running'] -= 1
+            self.tracker['finished'].append(self.name)
+
+    def __lt__(self, other):
+        return (self.priority, self.name) < (other.priority, other.name)
+
+    def __eq__(self, other):
+        return (self.priority, self.name) == (other.priority, other.name)
+
+
+class TestTaskQueue(object):
+    config = """
+        templates:
+          tv:
+            series:
+              - foo
+        tasks: {}
+    """
+
+    def run_tasks(self, manager, queue_config, task_configs):
+        tracker = {'lock': threading.Lock(), 'running': 0, 'max_running': 0, 'finished': []}
+        task_queue = TaskQueue(queue_config)
+        for i, task_config in enumerate(task_configs):
+            task_queue.put(FakeTask(manager, 'task%s' % i, task_config, tracker))
+        task_queue.start()
+        task_queue.shutdown(finish_queue=True)
+        task_queue.wait()
+        assert len(tracker['finished']) == len(task_configs)
+        return tracker
+
+    def test_single_worker(self, manager):
+        tracker = self.run_tasks(manager, {}, [{'mock': []}] * 3)
+        assert tracker['max_running'] == 1
+        assert tracker['finished'] == ['task0', 'task1', 'task2']
+
+    def test_multiple_workers(self, manager):
+        tracker = self.run_tasks(manager, {'workers': 3}, [{'mock': []}] * 3)
+        assert tracker['max_running'] == 3
+
+    def test_plugin_lock(self, manager):
+        tracker = self.run_tasks(manager, {'workers': 3}, [{'series': ['a']}, {'configure_series': {}}])
+        assert tracker['max_running'] == 1
+
+    def test_template_lock(self, manager):
+        tracker = self.run_tasks(manager, {'workers': 3}, [{'series': ['a']}, {'template': 'tv'}])
+        assert tracker['max_running'] == 1
+
+    def test_configured_lock(self, manager):
+        tracker = self.run_tasks(manager, {'workers': 3, 'locks': ['rss']}, [{'rss': 'a'}, {'rss': 'b'}])
+        assert tracker['max_running'] == 1
+
+    def test_exclusive_plugin(self, manager):
+        tracker = self.run_tasks(manager, {'workers': 3}, [{'mock': []}, {'plugin_priority': {}}])
+        assert tracker['max_running'] == 1
+
+    def test_same_task(self, manager):
+        tracker = {'lock': threading.Lock(), 'running': 0, 'max_running': 0, 'finished': []}
+        task_queue = TaskQueue({'workers': 2})
+        for priority in range(2):
+            task_queue.put(FakeTask(manager, 'test', {'mock': []}, tracker, priority=priority))
+        task_queue.start()
+        task_queue.shutdown(finish_queue=True)
+        task_queue.wait()
+        assert tracker['max_running'] == 1
+
+    def test_task_locks(self, manager):
+        task_queue = TaskQueue({'locks': ['rss', 'seen']})
+        task = FakeTask(manager, 'test', {'rss': 'a', 'template': ['tv', 'no_global'], '_series': []}, None)
+        assert task_queue.task_locks(task) == {'series', 'rss', 'seen', 'task test'}
+        task = FakeTask(manager, 'test', {'rss': 'a', 'disable': 'seen', 'template': 'no_global'}, None)
+        assert task_queue.task_locks(task) == {'rss', 'task test'}
+        task = FakeTask(manager, 'test', {'reorder_quality': {}, 'template': 'no_global'}, None)
+        assert task_queue.task_locks(task) == {'*', 'seen', 'task test'}
+
+
+class SlowInput(object):
+    """Returns its config as entries once as many tasks as configured are running it at the same time."""
+
+    schema = {'type': 'array'}
+    concurrent = 2
+
+    def __init__(self):
+        self.running = 0
+        self.condition = threading.Condition()
+
+    def on_task_input(self, task, config):
+        with self.condition:
+            self.running += 1
+            self.condition.notify_all()
+            deadline = time.time() + 5
+            while self.running < self.concurrent and time.time() < deadline:
+                self.condition.wait(0.1)
+        return [Entry(title=title, url='mock://%s' % title) for title in config]
+
+
+plugin.register(SlowInput, 'test_slow_input', api_ver=2, debug=True)
+
+
+class TestConcurrentTasks(object):
+    config = """
+        tasks:
+          a:
+            test_slow_input: [a1, a2]
+            accept_all: yes
+          b:
+            test_slow_input: [b1, b2, b3]
+            regexp:
+              accept: [b1]
+    """
+
+    def test_status(self, request, tmpdir):
+        # An in memory database is not shared between the worker threads
+        database_uri = 'sqlite:///%s' % tmpdir.join('concurrent.sqlite').strpath.replace('\\', '\\\\')
+        manager = MockManager(self.config, request.cls.__name__, db_uri=database_uri)
+        try:
+            task_queue = TaskQueue({'workers': 2})
+            for name in ('a', 'b'):
+                task_queue.put(Task(manager, name, priority=0))
+            task_queue.start()
+            task_queue.shutdown(finish_queue=True)
+            task_queue.wait()
+            assert plugin.get_plugin_by_name('test_slow_input').instance.running == 2
+            with Session() as session:
+                executions = dict((execution.task.name, execution) for execution in session.query(TaskExecution))
+                assert sorted(executions) == ['a', 'b']
+                assert (executions['a'].produced, executions['a'].accepted) == (2, 2)
+                assert (executions['b'].produced, executions['b'].accepted) == (3, 1)
+                assert all(execution.succeeded and execution.end for execution in executions.values())
+        finally:
+            manager.shutdown()
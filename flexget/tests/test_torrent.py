@@ -6,7 +6,7 @@ import os
 import mock
 import pytest
 
-from flexget.utils.bittorrent import Torrent
+from flexget.utils.bittorrent import Torrent, bencode
 
 
 class TestInfoHash(object):
@@ -42,6 +42,39 @@ class TestInfoHash(object):
 
 
 @pytest.mark.usefixtures('tmpdir')
+class TestTorrentDecoding(object):
+    # Keys in the info dict are not sorted, so encoding it again would give a different info hash
+    info = b'd7:privatei1e6:lengthi10e4:name4:test12:piece lengthi16384e6:pieces20:' + b'\xff' * 20 + b'e'
+    data = b'd8:announce15:http://tracker/4:info' + info + b'e\n'
+
+    def test_info_hash_from_file_contents(self):
+        import hashlib
+        torrent = Torrent(self.data)
+        assert torrent.info_hash == hashlib.sha1(self.info).hexdigest().upper()
+        assert bencode(torrent.content['info']) != self.info
+        torrent.content['info']['private'] = 0
+        torrent.modified = True
+        assert torrent.info_hash == hashlib.sha1(bencode(torrent.content['info'])).hexdigest().upper()
+
+    def test_metadata_only(self, tmpdir):
+        path = tmpdir.join('test.torrent')
+        path.write_binary(self.data)
+        full = Torrent.from_file(str(path))
+        torrent = Torrent.from_file(str(path), metadata_only=True)
+        assert full.content['info']['pieces'] == b'\xff' * 20
+        assert 'pieces' not in torrent.content['info']
+        assert torrent.size == full.size == 10
+        assert torrent.info_hash == full.info_hash
+        with pytest.raises(ValueError):
+            torrent.encode()
+
+    @pytest.mark.parametrize('data', [b'', b'd4:infod4:name4:teste', b'd4:infod4:name5:teste',
+                                      b'd4:infod4:name4:testee junk', b'l4:teste'])
+    def test_invalid(self, data):
+        with pytest.raises(SyntaxError):
+            Torrent(data)
+
+
 class TestSeenInfoHash(object):
     config = """
         tasks:
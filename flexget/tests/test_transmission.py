@@ -0,0 +1,186 @@
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import json
+import threading
+import time
+
+import pytest
+
+from flexget import plugin
+from flexget.plugins.clients import transmission
+
+try:
+    import transmissionrpc
+except ImportError:
+    transmissionrpc = None
+
+
+def make_torrent(torrent_id, name, status=6, complete=True):
+    now = int(time.time())
+    return {'id': torrent_id, 'name': name, 'status': status, 'hashString': '%040d' % torrent_id,
+            'torrentFile': '/torrents/%s.torrent' % name, 'totalSize': 1000, 'comment': '', 'downloadDir': '/downloads',
+            'isFinished': complete, 'isPrivate': False, 'trackers': [{'announce': 'http://tracker.example/announce'}],
+            'seedRatioMode': 0, 'seedRatioLimit': 2.0, 'uploadRatio': 1.0, 'seedIdleMode': 0, 'seedIdleLimit': 30,
+            'activityDate': now, 'addedDate': now - 7200, 'doneDate': now - 3600,
+            'files': [{'name': '%s.mkv' % name, 'length': 1000, 'bytesCompleted': 1000 if complete else 10}],
+            'priorities': [0], 'wanted': [1]}
+
+
+class FakeTransmission(object):
+    """Answers transmission RPC requests from the torrents it holds, and records them."""
+
+    session_id = 'fake-session'
+
+    def __init__(self, torrents=()):
+        self.torrents = dict((torrent['id'], torrent) for torrent in torrents)
+        self.requests = []
+        self.negotiations = 0
+
+    def calls(self, method):
+        return [arguments for name, arguments in self.requests if name == method]
+
+    def handle(self, method, arguments):
+        self.requests.append((method, arguments))
+        if method == 'session-get':
+            return {'rpc-version': 15, 'version': '2.92 (14714)', 'download-dir': '/downloads',
+                    'start-added-torrents': True, 'seedRatioLimited': False, 'seedRatioLimit': 2.0,
+                    'idle-seeding-limit-enabled': False, 'idle-seeding-limit': 30}
+        if method == 'torrent-add':
+            torrent_id = max(list(self.torrents) + [0]) + 1
+            torrent = self.torrents[torrent_id] = make_torrent(torrent_id, 'added %s' % torrent_id, complete=False)
+            return {'torrent-added': {'id': torrent_id, 'name': torrent['name'], 'hashString': torrent['hashString']}}
+        if method == 'torrent-get':
+            ids = arguments.get('ids', list(self.torrents))
+            return {'torrents': [dict((field, self.torrents[torrent_id][field]) for field in arguments['fields'])
+                                 for torrent_id in ids if torrent_id in self.torrents]}
+        if method == 'torrent-remove':
+            for torrent_id in arguments['ids']:
+                del self.torrents[torrent_id]
+        return {}
+
+
+@pytest.yield_fixture()
+def fake_transmission():
+    from future.moves.http.server import HTTPServer, BaseHTTPRequestHandler
+
+    fake = FakeTransmission([make_torrent(1, 'complete', status=0), make_torrent(2, 'seeding'),
+                             make_torrent(3, 'incomplete', status=4, complete=False)])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+            if self.headers.get('X-Transmission-Session-Id') != fake.session_id:
+                fake.negotiations += 1
+                self.send_response(409)
+                self.send_header('X-Transmission-Session-Id', fake.session_id)
+                self.end_headers()
+                return
+            arguments = fake.handle(request['method'], request.get('arguments', {}))
+            body = json.dumps({'result': 'success', 'arguments': arguments, 'tag': request.get('tag')})
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body.encode('utf-8'))
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    fake.port = server.server_port
+    yield fake
+    transmission._clients.clear()
+    transmission._client_locks.clear()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def config(fake_transmission):
+    return """
+        templates:
+          global:
+            disable: [seen]
+        tasks:
+          add:
+            mock:
+              - {title: 'a', url: 'magnet:?xt=urn:btih:%(hash)s1'}
+              - {title: 'b', url: 'magnet:?xt=urn:btih:%(hash)s2'}
+              - {title: 'c', url: 'magnet:?xt=urn:btih:%(hash)s3'}
+            accept_all: yes
+            transmission:
+              host: 127.0.0.1
+              port: %(port)s
+              ratio: 2
+          input:
+            from_transmission:
+              host: 127.0.0.1
+              port: %(port)s
+          clean:
+            clean_transmission:
+              host: 127.0.0.1
+              port: %(port)s
+    """ % {'port': fake_transmission.port, 'hash': '0' * 39}
+
+
+@pytest.mark.localhost
+@pytest.mark.skipif(transmissionrpc is None, reason='transmissionrpc module required')
+class TestTransmission(object):
+    def test_add_batched(self, execute_task, fake_transmission):
+        task = execute_task('add')
+        assert len(task.accepted) == 3
+        assert len(fake_transmission.calls('torrent-add')) == 3
+        # Follow-up requests are made once for all added torrents
+        sets = fake_transmission.calls('torrent-set')
+        assert len(sets) == 1
+        assert sorted(sets[0]['ids']) == [4, 5, 6]
+        assert sets[0]['seedRatioLimit'] == 2
+        starts = fake_transmission.calls('torrent-start')
+        assert len(starts) == 1
+        assert sorted(starts[0]['ids']) == [4, 5, 6]
+        assert all('ids' in arguments for arguments in fake_transmission.calls('torrent-get'))
+
+    def test_client_reused(self, execute_task, fake_transmission):
+        execute_task('add')
+        execute_task('input')
+        execute_task('clean')
+        assert fake_transmission.negotiations == 1, 'every task should not connect again'
+
+    def test_input_fields(self, execute_task, fake_transmission):
+        task = execute_task('input')
+        assert [entry['title'] for entry in task.all_entries] == ['complete']
+        gets = fake_transmission.calls('torrent-get')
+        assert 'ids' not in gets[0] and 'files' not in gets[0]['fields']
+        # Files are only requested for the torrent which may be complete
+        assert gets[1]['ids'] == [1] and 'files' in gets[1]['fields']
+
+    def test_clean_fields(self, execute_task, fake_transmission):
+        execute_task('clean')
+        gets = fake_transmission.calls('torrent-get')
+        assert 'ids' not in gets[0] and 'files' not in gets[0]['fields']
+        assert sorted(gets[1]['ids']) == [1, 2, 3] and 'files' in gets[1]['fields']
+        assert sorted(fake_transmission.torrents) == [3], 'only the downloaded torrents should be removed'
+
+    def test_client_locked(self, execute_task, fake_transmission):
+        instance = plugin.get_plugin_by_name('from_transmission').instance
+        config = instance.prepare_config({'host': '127.0.0.1', 'port': fake_transmission.port})
+        held = threading.Event()
+        requests_while_held = []
+
+        def hold_client():
+            with instance.rpc_client(config):
+                before = len(fake_transmission.requests)
+                held.set()
+                time.sleep(0.5)
+                requests_while_held.append(len(fake_transmission.requests) - before)
+
+        thread = threading.Thread(target=hold_client)
+        thread.start()
+        held.wait()
+        task = execute_task('input')
+        thread.join()
+        assert requests_while_held == [0], 'the task should wait for the shared client'
+        assert [entry['title'] for entry in task.all_entries] == ['complete']
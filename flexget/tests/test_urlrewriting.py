@@ -1,7 +1,58 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+import threading
+import time
+
+import pytest
+
+from flexget import plugin
+from flexget.event import event
 from flexget.plugin import get_plugin_by_name
+from flexget.task import Task
+
+from .conftest import MockManager
+
+
+class SlowRewriter(object):
+    max_parallel_rewrites = 2
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most_running = 0
+
+    def url_rewritable(self, task, entry):
+        return entry['url'].startswith('http://slow/')
+
+    def url_rewrite(self, task, entry):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        time.sleep(0.05)
+        entry['url'] = entry['url'].replace('http://slow/', 'http://fast/')
+        with self.lock:
+            self.running -= 1
+
+
+class SerialRewriter(object):
+    """Does not allow rewriting several entries at once."""
+
+    def __init__(self):
+        self.threads = []
+
+    def url_rewritable(self, task, entry):
+        return entry['url'].startswith('http://serial/')
+
+    def url_rewrite(self, task, entry):
+        self.threads.append(threading.current_thread())
+        entry['url'] = entry['url'].replace('http://serial/', 'http://fast/')
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(SlowRewriter, 'test_slow_rewriter', interfaces=['urlrewriter'], api_ver=2, debug=True)
+    plugin.register(SerialRewriter, 'test_serial_rewriter', interfaces=['urlrewriter'], api_ver=2, debug=True)
 
 
 class TestURLRewriters(object):
@@ -86,3 +137,47 @@ class TestRegexpurlrewriter(object):
         task = execute_task('test')
         assert task.find_entry(url='http://newzleech.com/?m=gen&dl=1&post=123'), \
             'did not url_rewrite properly'
+
+
+class TestParallelRewrites(object):
+    config = """
+        tasks:
+          test:
+            mock:
+              - {title: 'a', url: 'http://slow/a'}
+              - {title: 'b', url: 'http://slow/b'}
+              - {title: 'c', url: 'http://slow/c'}
+              - {title: 'd', url: 'http://slow/d'}
+              - {title: 'e', url: 'http://slow/e'}
+              - {title: 'f', url: 'http://serial/f'}
+              - {title: 'g', url: 'http://serial/g'}
+            accept_all: yes
+    """
+
+    @pytest.fixture()
+    def rewriters(self):
+        slow = get_plugin_by_name('test_slow_rewriter').instance
+        serial = get_plugin_by_name('test_serial_rewriter').instance
+        slow.most_running = 0
+        del serial.threads[:]
+        return slow, serial
+
+    def test_max_parallel_rewrites(self, request, tmpdir, rewriters):
+        slow, serial = rewriters
+        # An in memory database is not shared between the threads doing the rewrites
+        database_uri = 'sqlite:///%s' % tmpdir.join('rewrites.sqlite').strpath.replace('\\', '\\\\')
+        manager = MockManager(self.config, request.cls.__name__, db_uri=database_uri)
+        try:
+            task = Task(manager, 'test')
+            task.execute()
+            assert [e['url'] for e in task.accepted] == ['http://fast/%s' % t for t in 'abcdefg']
+            assert slow.most_running == 2
+            assert serial.threads == [threading.current_thread()] * 2, 'other rewriters should run in the task thread'
+        finally:
+            manager.shutdown()
+
+    def test_memory_database(self, execute_task, rewriters):
+        slow, serial = rewriters
+        task = execute_task('test')
+        assert [e['url'] for e in task.accepted] == ['http://fast/%s' % t for t in 'abcdefg']
+        assert slow.most_running == 1
@@ -1,13 +1,18 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
+from contextlib import contextmanager
 from datetime import datetime
 import math
+import re
+import ssl
+import threading
+import time
 
 import pytest
 
-from flexget.utils import json
-from flexget.utils.tools import parse_filesize, split_title_year
+from flexget.utils import json, metrics, requests
+from flexget.utils.tools import parse_filesize, split_title_year, parallel_map, BloomFilter, RegexpMatcher
 
 
 def compare_floats(float1, float2):
@@ -98,3 +103,182 @@ class TestSplitYearTitle(object):
     ])
     def test_split_year_title(self, title, expected_title, expected_year):
         assert split_title_year(title) == (expected_title, expected_year)
+
+
+class TestParallelMap(object):
+    def test_order(self):
+        def slow_double(value):
+            time.sleep(0.05 * (5 - value))
+            return value * 2
+
+        assert parallel_map(slow_double, range(5), max_workers=5) == [0, 2, 4, 6, 8]
+
+    def test_max_workers(self):
+        state = {'running': 0, 'max_running': 0}
+        lock = threading.Lock()
+
+        def track(value):
+            with lock:
+                state['running'] += 1
+                state['max_running'] = max(state['max_running'], state['running'])
+            time.sleep(0.05)
+            with lock:
+                state['running'] -= 1
+
+        parallel_map(track, range(10), max_workers=3)
+        assert state['max_running'] == 3
+
+    def test_exception(self):
+        def fail(value):
+            if value == 2:
+                raise ValueError('fail %s' % value)
+            return value
+
+        with pytest.raises(ValueError):
+            parallel_map(fail, range(5), max_workers=2)
+
+
+class TestMetrics(object):
+    def test_worker_threads_accounted_to_plugin(self):
+        metrics.reset()
+        with metrics.Measurement('task', 'plugin', 'input') as measurement:
+            parallel_map(lambda nbytes: metrics.count_http(nbytes), [10, 20, 30], max_workers=3)
+            measurement.entries_out = 3
+        assert measurement.counters.http_requests == 3
+        lines = metrics.render().splitlines()
+        assert 'flexget_plugin_http_bytes_total{task="task",plugin="plugin",phase="input"} 60' in lines
+        assert 'flexget_plugin_entries_out_total{task="task",plugin="plugin",phase="input"} 3' in lines
+
+
+class TestBloomFilter(object):
+    def test_contains(self):
+        bloom = BloomFilter(capacity=1000)
+        values = ['value %s' % i for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+        assert len(bloom) == 1000
+        assert all(value in bloom for value in values)
+        false_positives = sum(1 for i in range(1000) if 'other %s' % i in bloom)
+        assert false_positives < 50
+
+
+class TestRegexpMatcher(object):
+    @pytest.mark.parametrize('value', [
+        'The.Show.S01E01.720p', 'the show s02', 'Other (2016) 1080p', 'show', 'Ünïcode.Shöw.S01', 'HDTV', '',
+    ])
+    def test_same_as_search(self, value):
+        patterns = ['the.show.s\\d+', 'show', '^other \\(\\d{4}\\)', '(?:foo|bar)', 'x264|hdtv', '1080p$',
+                    'ünïcode', 'shöw', '(sh)ow.s0', '.*']
+        regexps = [re.compile(pattern, re.IGNORECASE | re.UNICODE) for pattern in patterns]
+        matcher = RegexpMatcher(regexps)
+        expected = [i for i, regexp in enumerate(regexps) if regexp.search(value)]
+        assert matcher.matching([value]) == expected
+
+    def test_multiple_values(self):
+        regexps = [re.compile(pattern, re.IGNORECASE) for pattern in ['genre1', 'genre2', 'genre3']]
+        assert RegexpMatcher(regexps).matching(['Genre3', 'genre1']) == [0, 2]
+
+
+@contextmanager
+def serve_http(certfile=None, keyfile=None):
+    """Runs a local HTTP server, or HTTPS server with the given certificate, yields its url."""
+    from future.moves.http.server import HTTPServer, BaseHTTPRequestHandler
+    from future.moves.socketserver import ThreadingMixIn
+
+    class Server(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path.startswith('/slow'):
+                time.sleep(0.2)
+            body = (self.headers.get('Cookie') or self.path).encode('ascii')
+            self.send_response(404 if self.path == '/missing' else 200)
+            if self.path == '/login':
+                self.send_header('Set-Cookie', 'session=secret')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+        def handle_error(self, *args):
+            pass
+
+    server = Server(('127.0.0.1', 0), Handler)
+    if certfile:
+        server.socket = ssl.wrap_socket(server.socket, certfile=certfile, keyfile=keyfile, server_side=True)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    requests.clear_pools()
+    try:
+        yield '%s://127.0.0.1:%s' % ('https' if certfile else 'http', server.server_port)
+    finally:
+        requests.clear_pools()
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.yield_fixture()
+def http_server():
+    with serve_http() as url:
+        yield url
+
+
+@pytest.yield_fixture()
+def https_server(request):
+    """Serves HTTPS with a self-signed certificate for 127.0.0.1, which is in `localhost.crt`."""
+    tests_dir = request.fspath.dirpath()
+    with serve_http(tests_dir.join('localhost.crt').strpath, tests_dir.join('localhost.key').strpath) as url:
+        yield url
+
+
+@pytest.mark.localhost
+class TestSharedPools(object):
+    def test_connections_shared_cookies_not(self, http_server):
+        first, second = requests.Session(), requests.Session()
+        first.get(http_server + '/login').content
+        assert first.get(http_server + '/').text == 'session=secret'
+        assert second.get(http_server + '/').text == '/'
+        first.close()
+        assert second.get(http_server + '/').text == '/'
+        stats = requests.pool_stats()
+        assert stats['requests'] == 4
+        assert stats['connections'] == 1
+        assert stats['reused'] == 0.75
+        assert stats['hosts'][http_server] == {'requests': 4, 'connections': 1}
+
+    def test_content_not_read(self, http_server):
+        metrics.reset()
+        with metrics.Measurement('task', 'plugin', 'input'):
+            result = requests.Session().get(http_server + '/streamed')
+            assert result._content_consumed is False, 'content should only be read when it is used'
+        assert 'flexget_plugin_http_bytes_total{task="task",plugin="plugin",phase="input"} 9' in \
+            metrics.render().splitlines()
+
+    def test_fetch_all(self, http_server):
+        session = requests.Session()
+        urls = [http_server + '/slow/%s' % i for i in range(5)]
+        start = time.time()
+        responses = session.fetch_all(urls + [{'url': http_server + '/missing'}], max_workers=6)
+        assert time.time() - start < 0.8, 'requests should run concurrently'
+        assert [r.text for r in responses[:5]] == ['/slow/%s' % i for i in range(5)]
+        assert isinstance(responses[5], requests.RequestException)
+        assert responses[5].response.status_code == 404
+
+    def test_verify_not_shared(self, https_server, request):
+        insecure = requests.Session()
+        assert insecure.get(https_server + '/', verify=False).text == '/'
+        # The pooled connection of the session which does not verify certificates must not be used
+        with pytest.raises(requests.RequestException):
+            requests.Session().get(https_server + '/')
+        ca_certs = request.fspath.dirpath().join('localhost.crt').strpath
+        assert requests.Session().get(https_server + '/', verify=ca_certs).text == '/'
+        assert insecure.get(https_server + '/', verify=False).text == '/'
+        # Only the second request without verification reused a connection
+        stats = requests.pool_stats()
+        assert stats['hosts'][https_server] == {'requests': 4, 'connections': 3}
@@ -1,11 +1,11 @@
 """Torrenting utils, mostly for handling bencoding and torrent files."""
-# Torrent decoding is a short fragment from effbot.org. Site copyright says:
-# Test scripts and other short code fragments can be considered as being in the public domain.
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+from future.utils import PY2
 
 import binascii
-import functools
+import hashlib
+import mmap
 import re
 import logging
 
@@ -90,60 +90,138 @@ def is_torrent_file(metafilepath):
     return bool(magic_marker)
 
 
-def tokenize(text, match=re.compile(b'([idel])|(\d+):|(-?\d+)').match):
-    i = 0
-    while i < len(text):
-        m = match(text, i)
-        s = m.group(m.lastindex)
-        i = m.end()
-        if m.lastindex == 2:
-            yield b's'
-            yield text[i:i + int(s)]
-            i += int(s)
-        else:
-            yield s
-
-
-def decode_item(next, token):
-    if token == b'i':
-        # integer: "i" value "e"
-        data = int(next())
-        if next() != b'e':
-            raise ValueError
-    elif token == b's':
-        # string: "s" value (virtual tokens)
-        data = next()
+# Whitespace allowed around torrent file contents, see #1592
+WHITESPACE = b' \t\n\r\x0b\x0c'
+
+
+def _find(data, sub, pos):
+    index = data.find(sub, pos)
+    if index < 0:
+        raise ValueError('missing %r after position %d' % (sub, pos))
+    return index
+
+
+def _decode(data, pos, skip=()):
+    """
+    Decodes the bencoded value at `pos`, slicing strings straight out of `data`.
+
+    :param data: Bencoded data, bytes or anything else supporting `find` and slicing, like an mmap
+    :param skip: Keys left out of a dictionary at `pos`, without copying their values
+    :return: Tuple of the decoded value and the position after it
+    """
+    token = data[pos:pos + 1]
+    if token.isdigit():
+        colon = _find(data, b':', pos)
+        end = colon + 1 + int(data[pos:colon])
+        if end > len(data):
+            raise ValueError('string at position %d exceeds data' % pos)
+        value = data[colon + 1:end]
         # Strings in torrent file are defined as utf-8 encoded
         try:
-            data = data.decode('utf-8')
+            value = value.decode('utf-8')
         except UnicodeDecodeError:
             # The pieces field is a byte string, and should be left as such.
             pass
-    elif token == b'l' or token == b'd':
-        # container: "l" (or "d") values "e"
-        data = []
-        tok = next()
-        while tok != b'e':
-            data.append(decode_item(next, tok))
-            tok = next()
-        if token == b'd':
-            data = dict(list(zip(data[0::2], data[1::2])))
-    else:
-        raise ValueError
-    return data
+        return value, end
+    elif token == b'i':
+        end = _find(data, b'e', pos)
+        return int(data[pos + 1:end]), end + 1
+    elif token == b'l':
+        value = []
+        pos += 1
+        while data[pos:pos + 1] != b'e':
+            item, pos = _decode(data, pos)
+            value.append(item)
+        return value, pos + 1
+    elif token == b'd':
+        value = {}
+        pos += 1
+        while data[pos:pos + 1] != b'e':
+            key, pos = _decode(data, pos)
+            if key in skip:
+                pos = _skip(data, pos)
+            else:
+                value[key], pos = _decode(data, pos)
+        return value, pos + 1
+    raise ValueError('invalid token %r at position %d' % (token, pos))
+
+
+def _skip(data, pos):
+    """:return: Position after the bencoded value at `pos`, without decoding it"""
+    token = data[pos:pos + 1]
+    if token.isdigit():
+        colon = _find(data, b':', pos)
+        return colon + 1 + int(data[pos:colon])
+    elif token == b'i':
+        return _find(data, b'e', pos) + 1
+    elif token in (b'l', b'd'):
+        pos += 1
+        while data[pos:pos + 1] != b'e':
+            pos = _skip(data, pos)
+        return pos + 1
+    raise ValueError('invalid token %r at position %d' % (token, pos))
+
+
+def _strip(data):
+    """:return: (start, end) positions of `data` without surrounding whitespace"""
+    start, end = 0, len(data)
+    while start < end and data[start:start + 1] in WHITESPACE:
+        start += 1
+    while end > start and data[end - 1:end] in WHITESPACE:
+        end -= 1
+    return start, end
 
 
 def bdecode(text):
     try:
-        src = tokenize(text)
-        data = decode_item(functools.partial(next, src), next(src))  # pylint:disable=E1101
-        for _ in src:  # look for more tokens
+        data, end = _decode(text, 0)
+        if end != len(text):
             raise SyntaxError("trailing junk")
-    except (AttributeError, ValueError, StopIteration, TypeError) as e:
+    except (ValueError, IndexError, TypeError, RuntimeError) as e:
         raise SyntaxError("syntax error: %s" % e)
     return data
 
 
+def decode_torrent(data, skip_pieces=False):
+    """
+    Decodes a torrent file.
+
+    :param data: Contents of the torrent file, bytes or anything else supporting `find` and slicing, like an mmap.
+        Surrounding whitespace is ignored.
+    :param bool skip_pieces: Leave the piece hashes out of the info dictionary
+    :return: Tuple of the decoded torrent, and the (start, end) span of the bencoded info dictionary in `data`, or
+        None if there is no info dictionary
+    """
+    start, end = _strip(data)
+    content = {}
+    info_span = None
+    try:
+        if data[start:start + 1] != b'd':
+            raise ValueError('torrent is not a dictionary')
+        pos = start + 1
+        while data[pos:pos + 1] != b'e':
+            key, pos = _decode(data, pos)
+            value_start = pos
+            if key == 'info':
+                content[key], pos = _decode(data, pos, skip=('pieces',) if skip_pieces else ())
+                info_span = value_start, pos
+            else:
+                content[key], pos = _decode(data, pos)
+        if pos + 1 != end:
+            raise SyntaxError("trailing junk")
+    except (ValueError, IndexError, TypeError, RuntimeError) as e:
+        raise SyntaxError("syntax error: %s" % e)
+    return content, info_span
+
+
+def sha1_hexdigest(data, start, end):
+    """:return: Uppercase hex sha1 of `data` between `start` and `end`, without copying it where possible"""
+    if PY2:
+        return str(hashlib.sha1(data[start:end]).hexdigest().upper())
+    with memoryview(data) as view, view[start:end] as part:
+        return str(hashlib.sha1(part).hexdigest().upper())
+
+
 # encoding implementation by d0b
 def encode_string(data):
     return encode_bytes(data.encode('utf-8'))
@@ -158,22 +236,14 @@ def encode_integer(data):
 
 
 def encode_list(data):
-    encoded = b'l'
-    for item in data:
-        encoded += bencode(item)
-    encoded += b'e'
-    return encoded
+    # Joined once, so large strings like pieces are not copied again for every following item
+    return b'l' + b''.join(bencode(item) for item in data) + b'e'
 
 
 def encode_dictionary(data):
-    encoded = b'd'
     items = list(data.items())
     items.sort()
-    for (key, value) in items:
-        encoded += bencode(key)
-        encoded += bencode(value)
-    encoded += b'e'
-    return encoded
+    return b'd' + b''.join(bencode(key) + bencode(value) for key, value in items) + b'e'
 
 
 def bencode(data):
@@ -198,18 +268,38 @@ class Torrent(object):
     KEY_TYPE = str
 
     @classmethod
-    def from_file(cls, filename):
-        """Create torrent from file on disk."""
+    def from_file(cls, filename, metadata_only=False):
+        """Create torrent from file on disk, mapping it into memory instead of reading it."""
         with open(filename, 'rb') as handle:
-            return cls(handle.read())
+            try:
+                data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, EnvironmentError):
+                # Empty files can not be mapped
+                return cls(handle.read(), metadata_only=metadata_only)
+            try:
+                return cls(data, metadata_only=metadata_only)
+            finally:
+                data.close()
 
-    def __init__(self, content):
-        """Accepts torrent file as string"""
-        # Make sure there is no trailing whitespace. see #1592
-        content = content.strip()
+    def __init__(self, content, metadata_only=False):
+        """
+        :param content: Torrent file contents, bytes or an mmap of the file
+        :param bool metadata_only: Leave the piece hashes out, for when they will not be needed. Such a torrent can
+            not be encoded back into a torrent file.
+        """
         # decoded torrent structure
-        self.content = bdecode(content)
+        self.content, info_span = decode_torrent(content, skip_pieces=metadata_only)
+        self.metadata_only = metadata_only
         self.modified = False
+        # Hash of the info dictionary as it is in the file, valid until the torrent is modified
+        self._info_hash = None
+        self._info_source = None
+        if info_span:
+            if isinstance(content, bytes):
+                # Hashed once needed, until then keep a reference to the (immutable) content
+                self._info_source = content, info_span
+            else:
+                self._info_hash = sha1_hexdigest(content, *info_span)
 
     def __repr__(self):
         return "%s(%s, %s)" % (self.__class__.__name__,
@@ -305,11 +395,16 @@ class Torrent(object):
     @property
     def info_hash(self):
         """Return Torrent info hash"""
-        import hashlib
-        hash = hashlib.sha1()
+        if not self.modified:
+            if self._info_source:
+                content, info_span = self._info_source
+                self._info_hash = sha1_hexdigest(content, *info_span)
+                self._info_source = None
+            if self._info_hash:
+                return self._info_hash
+        self._check_encodable()
         info_data = encode_dictionary(self.content['info'])
-        hash.update(info_data)
-        return str(hash.hexdigest().upper())
+        return sha1_hexdigest(info_data, 0, len(info_data))
 
     @property
     def comment(self):
@@ -355,5 +450,10 @@ class Torrent(object):
     def __str__(self):
         return '<Torrent instance. Files: %s>' % self.get_filelist()
 
+    def _check_encodable(self):
+        if self.metadata_only:
+            raise ValueError('Torrent was decoded without its pieces and can not be encoded')
+
     def encode(self):
+        self._check_encodable()
         return bencode(self.content)
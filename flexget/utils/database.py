@@ -126,7 +126,7 @@ def entry_synonym(name):
         return Entry(json.loads(getattr(self, name), decode_datetime=True))
 
     def setter(self, entry):
-        if isinstance(entry, Entry) or isinstance(entry, dict):
+        if isinstance(entry, Mapping):
             setattr(self, name, unicode(json.dumps(only_builtins(dict(entry)), encode_datetime=True)))
         else:
             raise TypeError('%r is not of type Entry or dict.' % type(entry))
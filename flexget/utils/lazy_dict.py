@@ -2,15 +2,39 @@ from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 
 import logging
+import threading
 from collections import MutableMapping
+from functools import partial
 
 log = logging.getLogger('lazy_lookup')
 
+# Guards picking lookups to run from the lookup lists of several entries at once
+_batch_lock = threading.Lock()
+
+
+def _func_key(func):
+    """Lookup functions with equal keys do the same lookup, for different entries."""
+    if isinstance(func, partial):
+        return func.func, func.args, sorted((func.keywords or {}).items())
+    return func
+
+
+def _func_owner(func):
+    """Returns the object (usually a plugin instance) a lookup function is a method of."""
+    if isinstance(func, partial):
+        func = func.func
+    return getattr(func, '__self__', None)
+
 
 class LazyLookup(object):
     """
     This class stores the information to do a lazy lookup for a LazyDict. An instance is stored as a placeholder value
     for any key that can be lazily looked up. There should be one instance of this class per LazyDict.
+
+    When the lookup function is a method of an object with a `max_parallel_lookups` attribute, the first time it is
+    needed it is run for all peers of the LazyDict (see :meth:`LazyDict.lazy_peers`) which have the same lookup pending,
+    that many at once. If the object also has a `prefetch_lazy` method, it is first called with the list of those
+    LazyDicts, to fill in whatever it can in bulk.
     """
 
     def __init__(self, store):
@@ -24,26 +48,82 @@ class LazyLookup(object):
             self.func_list.append(func)
             self.key_list.append(keys)
 
-    def __getitem__(self, key):
+    def copy(self, store):
+        """Returns a lookup with the same lookup functions pending, for LazyDict `store`."""
+        lookup = LazyLookup(store)
+        lookup.func_list = list(self.func_list)
+        lookup.key_list = list(self.key_list)
+        return lookup
+
+    def _pop_func(self, func_key):
+        """Removes the lookup with `func_key` if any of its keys are still lazy, returns (function, keys) or None."""
+        for index, func in enumerate(self.func_list):
+            if _func_key(func) == func_key:
+                keys = self.key_list[index]
+                if not any(self.store.is_lazy(key) for key in keys):
+                    return None
+                del self.func_list[index]
+                del self.key_list[index]
+                return func, keys
+        return None
+
+    def _batch(self, func):
+        """Returns (LazyLookup, function, keys) for each peer of our store with the same lookup as `func` pending."""
+        batch = []
+        func_key = _func_key(func)
+        for peer in self.store.lazy_peers():
+            lookup = next((value for value in peer.store.values() if isinstance(value, LazyLookup)), None)
+            if lookup is None or lookup is self:
+                continue
+            popped = lookup._pop_func(func_key)
+            if popped is not None:
+                batch.append((lookup,) + popped)
+        return batch
+
+    def _run(self, func):
         from flexget.plugin import PluginError
-        while self.store.is_lazy(key):
-            index = next((i for i, keys in enumerate(self.key_list) if key in keys), None)
-            if index is None:
-                # All lazy lookup functions for this key were tried unsuccessfully
-                return None
-            func = self.func_list.pop(index)
-            self.key_list.pop(index)
+        try:
+            func(self.store)
+        except PluginError as e:
+            e.log.info(e)
+        except Exception as e:
+            log.error('Unhandled error in lazy lookup plugin')
+            from flexget.manager import manager
+            if manager:
+                manager.crash_report()
+            else:
+                log.debug('Traceback', exc_info=True)
+
+    def _run_batch(self, owner, batch):
+        from flexget.manager import manager
+        from flexget.utils.tools import parallel_map
+        log.debug('Looking up %s entries together with %r', len(batch), batch[0][1])
+        prefetch = getattr(owner, 'prefetch_lazy', None)
+        if prefetch:
             try:
-                func(self.store)
-            except PluginError as e:
-                e.log.info(e)
-            except Exception as e:
-                log.error('Unhandled error in lazy lookup plugin')
-                from flexget.manager import manager
-                if manager:
-                    manager.crash_report()
-                else:
-                    log.debug('Traceback', exc_info=True)
+                prefetch([lookup.store for lookup, func, keys in batch])
+            except Exception:
+                log.error('Unhandled error in lazy lookup prefetch', exc_info=True)
+        # Skip whatever was filled in by the prefetch
+        batch = [(lookup, func) for lookup, func, keys in batch if any(lookup.store.is_lazy(key) for key in keys)]
+        max_workers = owner.max_parallel_lookups if not manager or manager.threadsafe_database else 1
+        parallel_map(lambda item: item[0]._run(item[1]), batch, max_workers=max_workers)
+
+    def __getitem__(self, key):
+        while self.store.is_lazy(key):
+            with _batch_lock:
+                index = next((i for i, keys in enumerate(self.key_list) if key in keys), None)
+                if index is None:
+                    # All lazy lookup functions for this key were tried unsuccessfully
+                    return None
+                func = self.func_list.pop(index)
+                keys = self.key_list.pop(index)
+                owner = _func_owner(func)
+                batch = self._batch(func) if getattr(owner, 'max_parallel_lookups', None) else []
+            if batch:
+                self._run_batch(owner, [(self, func, keys)] + batch)
+            else:
+                self._run(func)
         return self.store[key]
 
     def __repr__(self):
@@ -52,6 +132,8 @@ class LazyLookup(object):
 
 class LazyDict(MutableMapping):
 
+    __slots__ = ('store',)
+
     def __init__(self, *args, **kwargs):
         self.store = dict(*args, **kwargs)
 
@@ -122,6 +204,10 @@ class LazyDict(MutableMapping):
             if key not in self.store:
                 self[key] = ll
 
+    def lazy_peers(self):
+        """Returns other LazyDicts whose lazy lookups may be resolved together with ours."""
+        return []
+
     def is_lazy(self, key):
         """
         :param key: Key to check
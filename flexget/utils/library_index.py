@@ -0,0 +1,528 @@
+"""
+Persistent index of the files and directories under media library paths, used by the exists_series and exists_movie
+filters, the incremental mode of the filesystem input and torrent_match. It is refreshed by listing only the
+directories whose mtime changed since the previous refresh, and stores how names were parsed so unchanged files are
+never parsed again.
+
+In daemon mode, when inotify_simple is installed, :func:`watch` keeps track of changes under a root between refreshes,
+so that refreshing a root where nothing changed does not even stat its directories.
+"""
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import errno
+import logging
+import os
+import stat
+import threading
+
+from sqlalchemy import Column, Integer, Unicode, String, Float, Boolean, ForeignKey, Index, func
+
+from flexget import db_schema
+from flexget.event import event
+from flexget.plugin import get_plugin_by_name
+from flexget.plugins.parsers import ParseWarning
+from flexget.utils import qualities
+from flexget.utils.database import with_session
+from flexget.utils.log import log_once
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+log = logging.getLogger('library_index')
+Base = db_schema.versioned_base('library_index', 0)
+
+# Keep IN clauses below the sqlite variable limit
+CHUNK_SIZE = 500
+
+# Roots are refreshed by one task at a time, by root
+_refresh_locks = {}
+_refresh_locks_lock = threading.Lock()
+
+
+class LibraryEntry(Base):
+    __tablename__ = 'library_index_entries'
+    # Ids are never reused, anything with a higher id than seen before was added (or changed) since
+    __table_args__ = (Index('ix_library_index_entries_root_directory', 'root', 'directory'),
+                      Index('ix_library_index_entries_root_path', 'root', 'path', unique=True),
+                      {'sqlite_autoincrement': True})
+
+    id = Column(Integer, primary_key=True)
+    root = Column(Unicode)
+    path = Column(Unicode)
+    # Parent directory, None for the root itself
+    directory = Column(Unicode)
+    name = Column(Unicode)
+    is_dir = Column(Boolean)
+    mtime = Column(Float)
+    size = Column(Integer)
+    inode = Column(Integer)
+    is_link = Column(Boolean, default=False)
+
+    movie_parser = Column(String)
+    movie_name = Column(Unicode)
+    movie_year = Column(Integer)
+    movie_quality = Column(String)
+    imdb_id = Column(String)
+    imdb_checked = Column(Boolean, default=False)
+
+    def __repr__(self):
+        return '<LibraryEntry(path=%s)>' % self.path
+
+
+@db_schema.upgrade('library_index')
+def upgrade(ver, session):
+    if ver is None:
+        # The tables already match the first schema version
+        ver = 0
+    return ver
+
+
+class LibrarySeries(Base):
+    """Remembers up to which entry a library has been parsed as a series, with a parser."""
+    __tablename__ = 'library_index_series'
+
+    id = Column(Integer, primary_key=True)
+    root = Column(Unicode, index=True)
+    name = Column(Unicode)
+    parser = Column(String)
+    last_entry_id = Column(Integer, default=0)
+
+
+class LibraryCursor(Base):
+    """Remembers up to which entry of a library a consumer, like a task, has seen the changes."""
+    __tablename__ = 'library_index_cursors'
+
+    id = Column(Integer, primary_key=True)
+    root = Column(Unicode, index=True)
+    name = Column(Unicode)
+    last_entry_id = Column(Integer, default=0)
+
+
+class LibrarySeriesMatch(Base):
+    __tablename__ = 'library_index_series_matches'
+
+    id = Column(Integer, primary_key=True)
+    series_id = Column(Integer, ForeignKey('library_index_series.id'), index=True)
+    entry_id = Column(Integer, index=True)
+    identifier = Column(Unicode)
+    quality = Column(String)
+    proper_count = Column(Integer)
+
+
+def _chunks(items):
+    items = list(items)
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+def _storable(path):
+    try:
+        path.encode('utf-8')
+    except UnicodeEncodeError:
+        log_once('Cannot index %r, its name is not in the filesystem encoding' % path, logger=log)
+        return False
+    return True
+
+
+def _stat(path):
+    """Returns stat of `path`, following symlinks unless they are broken, and whether it is a symlink."""
+    st = os.lstat(path)
+    if not stat.S_ISLNK(st.st_mode):
+        return st, False
+    try:
+        return os.stat(path), True
+    except OSError:
+        return st, True
+
+
+@with_session
+def refresh(root, check_files=False, max_depth=None, session=None):
+    """
+    Brings the index of `root` up to date with the filesystem. Unchanged directories are not listed again, their
+    contents are taken from the index. Nothing is done when a watcher started by :func:`watch` saw no change under
+    `root` since the previous refresh.
+
+    :param root: Path of the library
+    :param bool check_files: Also notice files changed in place, by checking the files in unchanged directories
+    :param max_depth: Only bring paths up to this many levels below `root` up to date, deeper ones are left as they
+        are in the index
+    :return: Normalized `root`, as used in the index
+    """
+    root = os.path.normpath(os.path.abspath(root))
+    with _refresh_locks_lock:
+        lock = _refresh_locks.setdefault(root, threading.Lock())
+    # The refresh is committed before other tasks may refresh the same root, or they would index the changes again
+    with lock:
+        if _watcher and not _watcher.changed(root):
+            log.debug('No changes under %s since it was indexed', root)
+            return root
+        try:
+            _refresh(root, check_files, max_depth, session)
+            session.commit()
+        except Exception:
+            if _watcher:
+                _watcher.touch(root)
+            raise
+    if _watcher and max_depth is not None:
+        # Changes deeper down were not indexed yet
+        _watcher.touch(root)
+    return root
+
+
+def _file_changed(old, st, is_dir, is_link):
+    return not old or (old.is_dir, old.is_link) != (is_dir, is_link) or (
+        not is_dir and (old.inode, old.mtime, old.size) != (st.st_ino, st.st_mtime, st.st_size))
+
+
+def _new_entry(root, directory, path, st, is_dir, is_link):
+    return {'root': root, 'path': path, 'directory': directory, 'name': os.path.basename(path), 'is_dir': is_dir,
+            'is_link': is_link, 'inode': st.st_ino, 'mtime': None if is_dir else st.st_mtime,
+            'size': None if is_dir else st.st_size}
+
+
+def _refresh(root, check_files, max_depth, session):
+    known = {}
+    children = {}
+    for row in session.query(LibraryEntry.id, LibraryEntry.path, LibraryEntry.directory, LibraryEntry.is_dir,
+                             LibraryEntry.is_link, LibraryEntry.mtime, LibraryEntry.size,
+                             LibraryEntry.inode).filter(LibraryEntry.root == root):
+        known[row.path] = row
+        children.setdefault(row.directory, []).append(row.path)
+
+    kept = set()
+    new = {}
+    dir_mtimes = {}
+    if root in known and known[root].is_dir:
+        kept.add(root)
+    else:
+        new[root] = {'root': root, 'path': root, 'directory': None, 'name': os.path.basename(root), 'is_dir': True}
+    listed = 0
+    # Directories reached through symlinks may loop back to one of their parents
+    visited = set()
+    stack = [(root, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        if max_depth is not None and depth >= max_depth:
+            # Keep whatever is indexed below this directory
+            below = [directory]
+            while below:
+                for path in children.get(below.pop(), ()):
+                    kept.add(path)
+                    below.append(path)
+            continue
+        try:
+            st = os.stat(directory)
+        except OSError as e:
+            log.debug('Unable to stat %s: %s', directory, e)
+            continue
+        if (st.st_dev, st.st_ino) in visited:
+            log_once('Not indexing %s again, it was reached through a symlink loop' % directory, logger=log)
+            continue
+        visited.add((st.st_dev, st.st_ino))
+        row = known.get(directory)
+        if directory not in new and row.mtime == st.st_mtime:
+            for path in children.get(directory, ()):
+                if check_files and not known[path].is_dir:
+                    try:
+                        file_st, is_link = _stat(path)
+                    except OSError as e:
+                        log.debug('Unable to stat %s: %s', path, e)
+                        continue
+                    is_dir = stat.S_ISDIR(file_st.st_mode)
+                    if _file_changed(known[path], file_st, is_dir, is_link):
+                        new[path] = _new_entry(root, directory, path, file_st, is_dir, is_link)
+                        if is_dir:
+                            stack.append((path, depth + 1))
+                        continue
+                kept.add(path)
+                if known[path].is_dir:
+                    stack.append((path, depth + 1))
+            continue
+        try:
+            names = os.listdir(directory)
+        except OSError as e:
+            log.warning('Unable to list %s: %s', directory, e)
+            continue
+        listed += 1
+        dir_mtimes[directory] = st.st_mtime
+        for name in names:
+            path = os.path.join(directory, name)
+            if not _storable(path):
+                continue
+            try:
+                st, is_link = _stat(path)
+            except OSError as e:
+                log.debug('Unable to stat %s: %s', path, e)
+                continue
+            is_dir = stat.S_ISDIR(st.st_mode)
+            if _file_changed(known.get(path), st, is_dir, is_link):
+                new[path] = _new_entry(root, directory, path, st, is_dir, is_link)
+            else:
+                kept.add(path)
+            if is_dir:
+                stack.append((path, depth + 1))
+
+    removed = [row.id for path, row in known.items() if path not in kept]
+    for chunk in _chunks(removed):
+        session.query(LibraryEntry).filter(LibraryEntry.id.in_(chunk)).delete(synchronize_session=False)
+    if removed:
+        session.query(LibrarySeriesMatch).filter(~LibrarySeriesMatch.entry_id.in_(
+            session.query(LibraryEntry.id))).delete(synchronize_session=False)
+    for directory, mtime in dir_mtimes.items():
+        if directory in new:
+            new[directory]['mtime'] = mtime
+        else:
+            session.query(LibraryEntry).filter(LibraryEntry.id == known[directory].id).update({'mtime': mtime})
+    session.bulk_insert_mappings(LibraryEntry, list(new.values()))
+    log.verbose('Index of %s refreshed, %s directories listed, %s entries added and %s removed',
+                root, listed, len(new), len(removed))
+
+
+@with_session
+def entries(root, dirs=True, files=True, session=None):
+    """
+    Returns indexed entries under `root`, not including root itself. Call :func:`refresh` first.
+
+    :param bool dirs: Include directories
+    :param bool files: Include files
+    """
+    query = session.query(LibraryEntry).filter(LibraryEntry.root == os.path.normpath(os.path.abspath(root)))
+    query = query.filter(LibraryEntry.directory != None)  # noqa pylint: disable=singleton-comparison
+    if not (dirs and files):
+        query = query.filter(LibraryEntry.is_dir == dirs)
+    return query.all()
+
+
+@with_session
+def changes(root, name, session=None):
+    """
+    Returns indexed entries under `root` added or changed since consumer `name` last called :func:`seen`, in the
+    order they were indexed. Call :func:`refresh` first.
+
+    :return: The entries, and the position to pass to :func:`seen` once they have been handled
+    """
+    root = os.path.normpath(os.path.abspath(root))
+    cursor = session.query(LibraryCursor).filter(LibraryCursor.root == root).filter(
+        LibraryCursor.name == name).first()
+    last_entry_id = cursor.last_entry_id if cursor else 0
+    # Entries indexed meanwhile by another refresh are left for next time
+    position = max(session.query(func.max(LibraryEntry.id)).filter(LibraryEntry.root == root).scalar() or 0,
+                   last_entry_id)
+    query = session.query(LibraryEntry).filter(LibraryEntry.root == root).filter(
+        LibraryEntry.directory != None).filter(  # noqa pylint: disable=singleton-comparison
+        LibraryEntry.id > last_entry_id).filter(LibraryEntry.id <= position)
+    return query.order_by(LibraryEntry.id).all(), position
+
+
+@with_session
+def seen(root, name, position, session=None):
+    """Records that consumer `name` handled the changes under `root` up to `position`, as given by :func:`changes`."""
+    root = os.path.normpath(os.path.abspath(root))
+    cursor = session.query(LibraryCursor).filter(LibraryCursor.root == root).filter(
+        LibraryCursor.name == name).first()
+    if not cursor:
+        cursor = LibraryCursor(root=root, name=name)
+        session.add(cursor)
+    cursor.last_entry_id = position
+
+
+def parse_movie(entry):
+    """
+    Returns movie name, year and quality parsed from the name of :class:`LibraryEntry` `entry`. The name is only
+    parsed again when a different parser is used.
+    """
+    parsing = get_plugin_by_name('parsing').instance
+    parser = parsing.selected_parser('movie')
+    if entry.movie_parser != parser:
+        movie = parsing.parse_movie(entry.name)
+        entry.movie_parser = parser
+        entry.movie_name = movie.name
+        entry.movie_year = movie.year
+        entry.movie_quality = movie.quality.name
+        entry.imdb_checked = False
+    return entry.movie_name, entry.movie_year, qualities.Quality(entry.movie_quality)
+
+
+@with_session
+def series_episodes(root, name, session=None):
+    """
+    Returns identifier, quality and proper count of every file and directory under `root` which parses as an episode
+    of series `name`. Call :func:`refresh` first. Only entries added since the previous call are parsed.
+    """
+    root = os.path.normpath(os.path.abspath(root))
+    parsing = get_plugin_by_name('parsing').instance
+    parser = parsing.selected_parser('series')
+    series = session.query(LibrarySeries).filter(LibrarySeries.root == root).filter(
+        LibrarySeries.name == name).filter(LibrarySeries.parser == parser).first()
+    if not series:
+        series = LibrarySeries(root=root, name=name, parser=parser, last_entry_id=0)
+        session.add(series)
+        session.flush()
+    new_entries = session.query(LibraryEntry.id, LibraryEntry.name).filter(LibraryEntry.root == root).filter(
+        LibraryEntry.directory != None).filter(  # noqa pylint: disable=singleton-comparison
+        LibraryEntry.id > series.last_entry_id).all()
+    for entry_id, entry_name in new_entries:
+        try:
+            parsed = parsing.parse_series(data=entry_name, name=name)
+        except ParseWarning as pw:
+            parsed = pw.parsed
+            log_once(pw.value, logger=log)
+        if parsed.valid:
+            session.add(LibrarySeriesMatch(series_id=series.id, entry_id=entry_id, identifier=parsed.identifier,
+                                           quality=parsed.quality.name, proper_count=parsed.proper_count))
+        series.last_entry_id = max(series.last_entry_id, entry_id)
+    if new_entries:
+        log.debug('Parsed %s new entries of %s as %s', len(new_entries), root, name)
+    matches = session.query(LibrarySeriesMatch).filter(LibrarySeriesMatch.series_id == series.id).all()
+    return [(match.identifier, qualities.Quality(match.quality), match.proper_count) for match in matches]
+
+
+@event('manager.db_cleanup')
+def db_cleanup(manager, session):
+    roots = set(root for root, in session.query(LibraryEntry.root).distinct())
+    roots.update(root for root, in session.query(LibraryCursor.root).distinct())
+    roots = [root for root in roots if not os.path.isdir(root)]
+    for root in roots:
+        series_ids = [series_id for series_id, in session.query(LibrarySeries.id).filter(LibrarySeries.root == root)]
+        for chunk in _chunks(series_ids):
+            session.query(LibrarySeriesMatch).filter(LibrarySeriesMatch.series_id.in_(chunk)).delete(
+                synchronize_session=False)
+        for table in (LibraryEntry, LibrarySeries, LibraryCursor):
+            session.query(table).filter(table.root == root).delete(synchronize_session=False)
+    if roots:
+        log.verbose('Removed the index of %s libraries which no longer exist', len(roots))
+
+
+class Watcher(object):
+    """
+    Watches the directories under roots with inotify, in a thread, and remembers which roots had changes since their
+    previous refresh.
+    """
+
+    def __init__(self):
+        self.inotify = inotify_simple.INotify()
+        flags = inotify_simple.flags
+        self.mask = (flags.CREATE | flags.DELETE | flags.MODIFY | flags.ATTRIB | flags.MOVED_FROM | flags.MOVED_TO
+                     | flags.DELETE_SELF | flags.MOVE_SELF)
+        self.lock = threading.Lock()
+        # Whether there were changes under each root, None when not all of its directories could be watched
+        self.roots = {}
+        # Directory and roots for each watch descriptor
+        self.watches = {}
+        self.stopped = False
+        self.thread = threading.Thread(target=self.run, name='library_index_watcher')
+        self.thread.daemon = True
+        self.thread.start()
+
+    def add(self, root):
+        with self.lock:
+            if root in self.roots:
+                return
+            self.roots[root] = True
+        self.add_tree(root, root)
+
+    def add_tree(self, root, top):
+        def unwatchable(e):
+            if e.errno != errno.ENOENT:
+                log.warning('Unable to watch %s, it will be listed on every refresh: %s', root, e)
+                with self.lock:
+                    self.roots[root] = None
+
+        visited = set()
+        for directory, dirs, _ in os.walk(top, onerror=unwatchable, followlinks=True):
+            try:
+                st = os.stat(directory)
+                if (st.st_dev, st.st_ino) in visited:
+                    del dirs[:]
+                    continue
+                visited.add((st.st_dev, st.st_ino))
+                wd = self.inotify.add_watch(directory, self.mask)
+            except OSError as e:
+                unwatchable(e)
+                if e.errno == errno.ENOENT:
+                    continue
+                return
+            with self.lock:
+                self.watches.setdefault(wd, (directory, set()))[1].add(root)
+        # Changes made before the watches were in place
+        self.touch(root)
+
+    def touch(self, root):
+        with self.lock:
+            if self.roots.get(root) is False:
+                self.roots[root] = True
+
+    def changed(self, root):
+        """Returns whether `root` may have changed since the previous call, unwatched roots always may have."""
+        with self.lock:
+            state = self.roots.get(root)
+            if state:
+                self.roots[root] = False
+            return state is not False
+
+    def run(self):
+        flags = inotify_simple.flags
+        while not self.stopped:
+            try:
+                events = self.inotify.read(timeout=1000)
+            except OSError as e:
+                log.error('Stopped watching libraries: %s', e)
+                with self.lock:
+                    for root in self.roots:
+                        self.roots[root] = None
+                return
+            for inotify_event in events:
+                if inotify_event.mask & flags.Q_OVERFLOW:
+                    for root in list(self.roots):
+                        self.touch(root)
+                    continue
+                with self.lock:
+                    directory, roots = self.watches.get(inotify_event.wd, (None, ()))
+                    if inotify_event.mask & flags.IGNORED:
+                        self.watches.pop(inotify_event.wd, None)
+                for root in roots:
+                    self.touch(root)
+                if directory and inotify_event.mask & flags.ISDIR and inotify_event.mask & (
+                        flags.CREATE | flags.MOVED_TO):
+                    for root in roots:
+                        self.add_tree(root, os.path.join(directory, inotify_event.name))
+
+    def stop(self):
+        self.stopped = True
+        self.thread.join()
+        self.inotify.close()
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def watch(root):
+    """
+    Keeps track of changes under `root` until shutdown, if inotify is available, so that refreshing its index can be
+    skipped when nothing changed.
+    """
+    global _watcher
+    if inotify_simple is None:
+        log_once('Install inotify_simple to keep library indexes up to date between refreshes', logger=log)
+        return
+    with _watcher_lock:
+        if not _watcher:
+            try:
+                _watcher = Watcher()
+            except (OSError, AttributeError) as e:
+                log_once('Unable to use inotify to watch libraries: %s' % e, logger=log)
+                return
+    _watcher.add(os.path.normpath(os.path.abspath(root)))
+
+
+@event('manager.shutdown')
+def stop_watcher(manager):
+    global _watcher
+    with _watcher_lock:
+        if _watcher:
+            _watcher.stop()
+            _watcher = None
@@ -0,0 +1,191 @@
+"""
+Always on metrics about plugins run by tasks.
+
+For each task, plugin and phase histograms of wall and CPU time are kept, along with counts of runs, database queries,
+entries in and out and HTTP requests and bytes. Work done in threads started with
+:func:`flexget.utils.tools.parallel_map` is accounted to the plugin that started them.
+"""
+from __future__ import unicode_literals, division, absolute_import
+from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
+
+import bisect
+import contextlib
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the time histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# CPU time of the calling thread where available, otherwise of the whole process
+if hasattr(time, 'thread_time'):
+    cpu_time = time.thread_time
+elif hasattr(time, 'process_time'):
+    cpu_time = time.process_time
+else:
+    cpu_time = time.clock
+
+
+class Counters(object):
+    """Counts of work done on behalf of a plugin, possibly by several threads."""
+
+    __slots__ = ('lock', 'queries', 'http_requests', 'http_bytes')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.http_requests = 0
+        self.http_bytes = 0
+
+    def add(self, queries=0, http_requests=0, http_bytes=0):
+        with self.lock:
+            self.queries += queries
+            self.http_requests += http_requests
+            self.http_bytes += http_bytes
+
+
+_local = threading.local()
+# Work done outside of any plugin is counted here
+_process_counters = Counters()
+
+
+def current_counters():
+    """Returns the :class:`Counters` work done by the current thread is accounted to."""
+    return getattr(_local, 'counters', _process_counters)
+
+
+@contextlib.contextmanager
+def use_counters(counters):
+    """Context manager which accounts work done by the current thread to `counters`."""
+    old_counters = current_counters()
+    _local.counters = counters
+    try:
+        yield counters
+    finally:
+        _local.counters = old_counters
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(*args):
+    current_counters().add(queries=1)
+
+
+def count_http(nbytes):
+    """Records a HTTP request which received `nbytes` of content."""
+    current_counters().add(http_requests=1, http_bytes=nbytes)
+
+
+class Histogram(object):
+    __slots__ = ('buckets', 'sum', 'count')
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class PluginMetrics(object):
+    __slots__ = ('wall', 'cpu', 'queries', 'entries_in', 'entries_out', 'http_requests', 'http_bytes')
+
+    def __init__(self):
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.queries = 0
+        self.entries_in = 0
+        self.entries_out = 0
+        self.http_requests = 0
+        self.http_bytes = 0
+
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+class Measurement(object):
+    """
+    Context manager measuring a single run of a plugin. Set :attr:`entries_out` before leaving it, otherwise the run
+    is recorded as leaving as many entries as it got.
+    """
+
+    def __init__(self, task, plugin, phase, entries_in=0):
+        self.key = (task, plugin, phase)
+        self.entries_in = entries_in
+        self.entries_out = None
+        self.counters = Counters()
+
+    def __enter__(self):
+        self.parent = current_counters()
+        _local.counters = self.counters
+        self.started = time.time(), cpu_time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        wall, cpu = time.time() - self.started[0], cpu_time() - self.started[1]
+        _local.counters = self.parent
+        counters = self.counters
+        self.parent.add(counters.queries, counters.http_requests, counters.http_bytes)
+        with _lock:
+            metrics = _metrics.get(self.key)
+            if metrics is None:
+                metrics = _metrics[self.key] = PluginMetrics()
+            metrics.wall.observe(wall)
+            metrics.cpu.observe(max(cpu, 0.0))
+            metrics.queries += counters.queries
+            metrics.entries_in += self.entries_in
+            metrics.entries_out += self.entries_in if self.entries_out is None else self.entries_out
+            metrics.http_requests += counters.http_requests
+            metrics.http_bytes += counters.http_bytes
+
+
+def reset():
+    """Forgets everything recorded so far."""
+    with _lock:
+        _metrics.clear()
+
+
+def _labels(key, **extra):
+    labels = list(zip(('task', 'plugin', 'phase'), key)) + sorted(extra.items())
+    return ','.join('%s="%s"' % (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                    for name, value in labels)
+
+
+def render():
+    """Returns everything recorded so far in prometheus text exposition format."""
+    with _lock:
+        items = sorted(_metrics.items())
+        lines = []
+        for name, attr, description in (('wall_seconds', 'wall', 'Wall clock time plugins took'),
+                                        ('cpu_seconds', 'cpu', 'CPU time plugins took')):
+            name = 'flexget_plugin_' + name
+            lines.append('# HELP %s %s' % (name, description))
+            lines.append('# TYPE %s histogram' % name)
+            for key, metrics in items:
+                histogram = getattr(metrics, attr)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (None,), histogram.buckets):
+                    cumulative += count
+                    le = '+Inf' if bound is None else repr(bound)
+                    lines.append('%s_bucket{%s} %d' % (name, _labels(key, le=le), cumulative))
+                lines.append('%s_sum{%s} %r' % (name, _labels(key), histogram.sum))
+                lines.append('%s_count{%s} %d' % (name, _labels(key), histogram.count))
+        for name, attr, description in (('queries_total', 'queries', 'Database queries made by plugins'),
+                                        ('entries_in_total', 'entries_in', 'Entries undecided or accepted when '
+                                                                           'plugins started'),
+                                        ('entries_out_total', 'entries_out', 'Entries undecided or accepted when '
+                                                                             'plugins finished, or produced by '
+                                                                             'inputs'),
+                                        ('http_requests_total', 'http_requests', 'HTTP requests made by plugins'),
+                                        ('http_bytes_total', 'http_bytes', 'HTTP content bytes received by plugins')):
+            name = 'flexget_plugin_' + name
+            lines.append('# HELP %s %s' % (name, description))
+            lines.append('# TYPE %s counter' % name)
+            for key, metrics in items:
+                lines.append('%s{%s} %d' % (name, _labels(key), getattr(metrics, attr)))
+    return '\n'.join(lines) + '\n'
@@ -5,6 +5,10 @@ from past.builtins import basestring
 import re
 import copy
 import logging
+import sre_constants
+import sre_parse
+
+from flexget.utils.tools import LRUCache
 
 log = logging.getLogger('utils.qualities')
 
@@ -33,6 +37,7 @@ class QualityComponent(object):
         # compile regexp
         if regexp is None:
             regexp = re.escape(name)
+        self.pattern = regexp
         self.regexp = re.compile('(?<![^\W_])(' + regexp + ')(?![^\W_])', re.IGNORECASE)
 
     def matches(self, text):
@@ -194,6 +199,82 @@ for items in (_resolutions, _sources, _codecs, _audios):
         _registry[item.name] = item
 
 
+def _first_chars(parsed):
+    """
+    :param parsed: Parsed regexp, from :func:`sre_parse.parse`
+    :return: Tuple of lowercase characters a match may start with, or None if it could be anything, and whether the
+        regexp may match an empty string
+    """
+    chars = set()
+    for op, av in parsed:
+        if op == sre_constants.LITERAL:
+            return chars | {chr(av).lower()}, False
+        elif op == sre_constants.IN and all(item_op == sre_constants.LITERAL for item_op, _ in av):
+            return chars | {chr(item_av).lower() for _, item_av in av}, False
+        elif op == sre_constants.AT:
+            continue
+        elif op in (sre_constants.SUBPATTERN, sre_constants.BRANCH, sre_constants.MAX_REPEAT,
+                    sre_constants.MIN_REPEAT):
+            if op == sre_constants.SUBPATTERN:
+                alternatives, optional = [av[-1]], False
+            elif op == sre_constants.BRANCH:
+                alternatives, optional = av[1], False
+            else:
+                alternatives, optional = [av[2]], av[0] == 0
+            for alternative in alternatives:
+                first, nullable = _first_chars(alternative)
+                if first is None:
+                    return None, False
+                chars |= first
+                optional = optional or nullable
+            if not optional:
+                return chars, False
+        else:
+            return None, False
+    return chars, True
+
+
+_components = _resolutions + _sources + _codecs + _audios
+# All components in one regexp, in the order they are looked for. Finds the positions where any component matches.
+_tokenizer = re.compile(r'(?<![^\W_])(?:%s)(?![^\W_])' % '|'.join(
+    '(?P<c%d>%s)' % (index, component.pattern) for index, component in enumerate(_components)), re.IGNORECASE)
+# Components by the (lowercase) characters they may start with, and ones which could start with anything
+_starting_with = {}
+_starting_with_any = []
+for index, item in enumerate(_components):
+    first = _first_chars(sre_parse.parse(item.pattern))[0]
+    if first is None:
+        _starting_with_any.append((index, item))
+    for char in first or []:
+        _starting_with.setdefault(char, []).append((index, item))
+
+# Parsed components and clean text of recently seen texts
+_parse_cache = LRUCache(maxsize=10000)
+
+
+def _tokenize(text):
+    """
+    Finds all quality components in `text` in a single pass.
+
+    :return: Set of the names of components matching somewhere in `text`
+    """
+    found = set()
+    pos = 0
+    while True:
+        match = _tokenizer.search(text, pos)
+        if not match:
+            return found
+        start = match.start()
+        index = int(match.lastgroup[1:])
+        found.add(_components[index].name)
+        # Components later in the list may match at the same position too
+        for other_index, component in _starting_with.get(text[start].lower(), []) + _starting_with_any:
+            if other_index > index and component.name not in found and component.regexp.match(text, start):
+                found.add(component.name)
+        # Matches may overlap, continue from the next position
+        pos = start + 1
+
+
 def all_components():
     return iter(_registry.values())
 
@@ -221,23 +302,40 @@ class Quality(object):
         :param text: The string to parse
         """
         self.text = text
+        try:
+            parsed = _parse_cache[text]
+        except KeyError:
+            parsed = _parse_cache[text] = self._parse(text)
+        self.resolution, self.source, self.codec, self.audio, self.clean_text = parsed
+
+    def _parse(self, text):
+        """:return: Tuple of the best components of each type, followed by `text` with their matches removed."""
         self.clean_text = text
-        self.resolution = self._find_best(_resolutions, _UNKNOWNS['resolution'], False)
-        self.source = self._find_best(_sources, _UNKNOWNS['source'])
-        self.codec = self._find_best(_codecs, _UNKNOWNS['codec'])
-        self.audio = self._find_best(_audios, _UNKNOWNS['audio'])
+        # Components found in each searched text, searches continue in text with the matches removed
+        found = {}
+        resolution = self._find_best(found, _resolutions, _UNKNOWNS['resolution'], False)
+        source = self._find_best(found, _sources, _UNKNOWNS['source'])
+        codec = self._find_best(found, _codecs, _UNKNOWNS['codec'])
+        audio = self._find_best(found, _audios, _UNKNOWNS['audio'])
+        result = {'resolution': resolution, 'source': source, 'codec': codec, 'audio': audio}
         # If any of the matched components have defaults, set them now.
-        for component in self.components:
+        for component in [resolution, source, codec, audio]:
             for default in component.defaults:
                 default = _registry[default]
-                if not getattr(self, default.type):
-                    setattr(self, default.type, default)
+                if not result[default.type]:
+                    result[default.type] = default
+        return result['resolution'], result['source'], result['codec'], result['audio'], self.clean_text
 
-    def _find_best(self, qlist, default=None, strip_all=True):
-        """Finds the highest matching quality component from `qlist`"""
+    def _find_best(self, found, qlist, default=None, strip_all=True):
+        """Finds the highest matching quality component from `qlist`, checking only those `found` in the text"""
         result = None
         search_in = self.clean_text
         for item in qlist:
+            if search_in not in found:
+                # Removing a match may join the text around it into new matches
+                found[search_in] = _tokenize(search_in)
+            if item.name not in found[search_in]:
+                continue
             match = item.matches(search_in)
             if match[0]:
                 result = item
@@ -3,18 +3,25 @@ from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.urllib.request import urlopen
 from future.moves.urllib.parse import urlparse
 from future.utils import text_to_native_str
+from past.builtins import basestring
 
+import os
 import time
 import logging
+import threading
 from datetime import timedelta, datetime
 
 import requests
 # Allow some request objects to be imported from here instead of requests
 import warnings
 from requests import RequestException
+from requests.adapters import DEFAULT_CA_BUNDLE_PATH, HTTPAdapter
+from requests.packages.urllib3 import PoolManager
+from requests.utils import select_proxy
 
 from flexget import __version__ as version
-from flexget.utils.tools import parse_timedelta, TimedDict, timedelta_total_seconds
+from flexget.utils import metrics
+from flexget.utils.tools import parse_timedelta, TimedDict, timedelta_total_seconds, parallel_map
 
 # If we use just 'requests' here, we'll get the logger created by requests, rather than our own
 log = logging.getLogger('utils.requests')
@@ -85,7 +92,8 @@ class TokenBucketLimiter(DomainLimiter):
         self.rate = parse_timedelta(rate)
         self.wait = wait
         # Restore previous state for this domain, or establish new state cache
-        self.state = self.state_cache.setdefault(domain, {'tokens': self.max_tokens, 'last_update': datetime.now()})
+        self.state = self.state_cache.setdefault(domain, {'tokens': self.max_tokens, 'last_update': datetime.now(),
+                                                          'lock': threading.RLock()})
 
     @property
     def tokens(self):
@@ -104,24 +112,26 @@ class TokenBucketLimiter(DomainLimiter):
         self.state['last_update'] = value
 
     def __call__(self):
-        if self.tokens < self.max_tokens:
-            regen = (timedelta_total_seconds(datetime.now() - self.last_update) /
-                     timedelta_total_seconds(self.rate))
-            self.tokens += regen
-        self.last_update = datetime.now()
-        if self.tokens < 1:
-            if not self.wait:
-                raise RequestException('Requests to %s have exceeded their limit.' % self.domain)
-            wait = timedelta_total_seconds(self.rate) * (1 - self.tokens)
-            # Don't spam console if wait is low
-            if wait < 4:
-                level = log.debug
-            else:
-                level = log.verbose
-            level('Waiting %.2f seconds until next request to %s', wait, self.domain)
-            # Sleep until it is time for the next request
-            time.sleep(wait)
-        self.tokens -= 1
+        # Requests to the same domain may be made from multiple threads (e.g. concurrent searches), they queue up here
+        with self.state['lock']:
+            if self.tokens < self.max_tokens:
+                regen = (timedelta_total_seconds(datetime.now() - self.last_update) /
+                         timedelta_total_seconds(self.rate))
+                self.tokens += regen
+            self.last_update = datetime.now()
+            if self.tokens < 1:
+                if not self.wait:
+                    raise RequestException('Requests to %s have exceeded their limit.' % self.domain)
+                wait = timedelta_total_seconds(self.rate) * (1 - self.tokens)
+                # Don't spam console if wait is low
+                if wait < 4:
+                    level = log.debug
+                else:
+                    level = log.verbose
+                level('Waiting %.2f seconds until next request to %s', wait, self.domain)
+                # Sleep until it is time for the next request
+                time.sleep(wait)
+            self.tokens -= 1
 
 
 class TimedLimiter(TokenBucketLimiter):
@@ -131,6 +141,137 @@ class TimedLimiter(TokenBucketLimiter):
         super(TimedLimiter, self).__init__(domain, 1, interval)
 
 
+# Number of hosts to keep connection pools for, and number of connections to keep open per host
+POOL_HOSTS = 50
+POOL_SIZE = 10
+# Default number of requests `Session.fetch_all` sends at once
+FETCH_WORKERS = 8
+
+_pool_lock = threading.Lock()
+_pool_manager = None
+# TLS settings of the request being sent by each thread
+_request_tls = threading.local()
+# Request and connection counts of pools which have been discarded, by host
+_retired_pool_stats = {}
+
+
+def _pool_host(pool):
+    return '%s://%s:%s' % (pool.scheme, pool.host, pool.port)
+
+
+def _retire_pool(pool):
+    """Keeps the stats of a connection pool which is discarded to make room for others, then closes it."""
+    with _pool_lock:
+        stats = _retired_pool_stats.setdefault(_pool_host(pool), [0, 0])
+        stats[0] += pool.num_requests
+        stats[1] += pool.num_connections
+    pool.close()
+
+
+def _shared_pool_manager():
+    """Returns the manager of connection pools shared by all sessions, creating it if needed."""
+    global _pool_manager
+    with _pool_lock:
+        if _pool_manager is None:
+            _pool_manager = PoolManager(num_pools=POOL_HOSTS, maxsize=POOL_SIZE)
+            _pool_manager.pools.dispose_func = _retire_pool
+        return _pool_manager
+
+
+def clear_pools():
+    """Closes all pooled connections and resets their stats."""
+    global _pool_manager
+    with _pool_lock:
+        manager, _pool_manager = _pool_manager, None
+        _retired_pool_stats.clear()
+    if manager:
+        manager.pools.dispose_func = lambda pool: pool.close()
+        manager.clear()
+
+
+def pool_stats():
+    """
+    Reports how well connections to each host are being reused.
+
+    :return: Dict with the total number of `requests` made through the shared pools, new `connections` opened for
+        them, the fraction of requests which `reused` an open connection, and the same counts per host under `hosts`
+    """
+    with _pool_lock:
+        counts = dict((host, list(stats)) for host, stats in _retired_pool_stats.items())
+        manager = _pool_manager
+    if manager:
+        for key in manager.pools.keys():
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            stats = counts.setdefault(_pool_host(pool), [0, 0])
+            stats[0] += pool.num_requests
+            stats[1] += pool.num_connections
+    hosts = {}
+    for host, (num_requests, num_connections) in counts.items():
+        hosts[host] = {'requests': num_requests, 'connections': num_connections}
+    total_requests = sum(stats['requests'] for stats in hosts.values())
+    total_connections = sum(stats['connections'] for stats in hosts.values())
+    reused = (total_requests - total_connections) / total_requests if total_requests else 0
+    return {'requests': total_requests, 'connections': total_connections, 'reused': max(reused, 0), 'hosts': hosts}
+
+
+def _tls_pool_kwargs(verify, cert):
+    """
+    Returns the TLS settings `HTTPAdapter.cert_verify` gives connection pools for `verify` and `cert`. Shared pools
+    are created with them, so that requests only share connections with requests verifying certificates the same way.
+    """
+    kwargs = {'cert_reqs': 'CERT_NONE', 'ca_certs': None, 'ca_cert_dir': None, 'cert_file': None, 'key_file': None}
+    if verify:
+        cert_loc = DEFAULT_CA_BUNDLE_PATH if verify is True else verify
+        kwargs['cert_reqs'] = 'CERT_REQUIRED'
+        if cert_loc and os.path.isdir(cert_loc):
+            kwargs['ca_cert_dir'] = cert_loc
+        else:
+            kwargs['ca_certs'] = cert_loc
+    if cert:
+        if isinstance(cert, basestring):
+            kwargs['cert_file'] = cert
+        else:
+            kwargs['cert_file'], kwargs['key_file'] = cert
+    return kwargs
+
+
+class SharedPoolAdapter(HTTPAdapter):
+    """
+    Transport adapter sending requests through connection pools shared by all sessions, so connections (and TLS
+    sessions) to a host are reused across tasks. Pools are kept open when a session is closed.
+
+    HTTPS pools are keyed by their certificate settings as well as the host, a request never uses a connection opened
+    with other certificate verification settings.
+    """
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _shared_pool_manager()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        # The adapter may be sending other requests from other threads
+        _request_tls.pool_kwargs = _tls_pool_kwargs(verify, cert)
+        try:
+            return super(SharedPoolAdapter, self).send(request, stream=stream, timeout=timeout, verify=verify,
+                                                       cert=cert, proxies=proxies)
+        finally:
+            _request_tls.pool_kwargs = None
+
+    def get_connection(self, url, proxies=None):
+        pool_kwargs = getattr(_request_tls, 'pool_kwargs', None)
+        if select_proxy(url, proxies) or not pool_kwargs or not url.lower().startswith('https'):
+            return super(SharedPoolAdapter, self).get_connection(url, proxies)
+        return self.poolmanager.connection_from_url(urlparse(url).geturl(), pool_kwargs=pool_kwargs)
+
+    def close(self):
+        for proxy in self.proxy_manager.values():
+            proxy.clear()
+
+
 def _wrap_urlopen(url, timeout=None):
     """
     Handles alternate schemes using urllib, wraps the response in a requests.Response
@@ -172,6 +313,7 @@ class Session(requests.Session):
     Subclass of requests Session class which defines some of our own defaults, records unresponsive sites,
     and raises errors by default.
 
+    Connections are pooled with all other sessions, while cookies, headers and domain limiters stay with the session.
     """
 
     def __init__(self, timeout=30, max_retries=1, *args, **kwargs):
@@ -179,7 +321,8 @@ class Session(requests.Session):
         super(Session, self).__init__(*args, **kwargs)
         self.timeout = timeout
         self.stream = True
-        self.adapters['http://'].max_retries = max_retries
+        self.mount('https://', SharedPoolAdapter())
+        self.mount('http://', SharedPoolAdapter(max_retries=max_retries))
         # Stores min intervals between requests for certain sites
         self.domain_limiters = {}
         self.headers.update({'User-Agent': 'FlexGet/%s (www.flexget.com)' % version})
@@ -244,11 +387,46 @@ class Session(requests.Session):
             set_unresponsive(url)
             raise
 
+        # Streamed content (the session default) is read later, if at all, it is counted by its length
+        try:
+            nbytes = int(result.headers.get('Content-Length', 0))
+        except ValueError:
+            nbytes = 0
+        if not nbytes and result._content_consumed:
+            nbytes = len(result.content)
+        metrics.count_http(nbytes)
+
         if raise_status:
             result.raise_for_status()
 
         return result
 
+    def fetch_all(self, batch, max_workers=FETCH_WORKERS):
+        """
+        Sends a batch of requests concurrently. Each goes through :meth:`request`, so timeouts, domain limiters and
+        unresponsive site handling apply as usual. Domain limiters make requests to a limited domain wait their turn.
+
+        :param batch: Iterable of urls to GET, or dicts of :meth:`request` arguments (`method` defaults to GET).
+            Response bodies are downloaded concurrently too, unless `stream` is given as True.
+        :param int max_workers: Maximum amount of requests in flight at once
+        :return: List with the response, or the `RequestException` raised, for each request in `batch` order
+        """
+
+        def fetch(item):
+            kwargs = {'url': item} if not isinstance(item, dict) else dict(item)
+            kwargs.setdefault('method', 'GET')
+            kwargs.setdefault('stream', False)
+            try:
+                response = self.request(**kwargs)
+                if not kwargs['stream']:
+                    # Download the body in this thread
+                    response.content
+                return response
+            except RequestException as e:
+                return e
+
+        return parallel_map(fetch, batch, max_workers=max_workers)
+
 
 # Define some module level functions that use our Session, so this module can be used like main requests module
 def request(method, url, **kwargs):
@@ -12,10 +12,11 @@ from future.types.newstr import newstr
 
 import logging
 import pickle
+import threading
 from collections import MutableMapping, defaultdict
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, Index
+from sqlalchemy import Column, Integer, String, DateTime, Unicode, select, Index, and_, bindparam
 
 from flexget import db_schema
 from flexget.event import event
@@ -23,6 +24,7 @@ from flexget.manager import Session
 from flexget.utils import json
 from flexget.utils.database import json_synonym
 from flexget.utils.sqlalchemy_utils import table_schema, create_index, table_add_column
+from flexget.utils.tools import chunked
 
 log = logging.getLogger('util.simple_persistence')
 Base = db_schema.versioned_base('simple_persistence', 4)
@@ -72,9 +74,12 @@ def upgrade(ver, session):
 @event('manager.db_cleanup')
 def db_cleanup(manager, session):
     """Clean up values in the db from tasks which no longer exist."""
-    # SKVs not associated with any task use None as task tame
-    existing_tasks = list(manager.tasks) + [None]
-    session.query(SimpleKeyValue).filter(~SimpleKeyValue.task.in_(existing_tasks)).delete(synchronize_session=False)
+    # SKVs not associated with any task use None as task tame. NULL can't be matched with IN, it is checked separately.
+    existing_tasks = list(manager.tasks)
+    session.query(SimpleKeyValue).filter(SimpleKeyValue.task.isnot(None)).filter(
+        ~SimpleKeyValue.task.in_(existing_tasks)).delete(synchronize_session=False)
+    # What is known about the removed values in memory does not hold anymore
+    SimplePersistence.reset(lambda task: task is not None and task not in existing_tasks)
 
 
 class SimpleKeyValue(Base):
@@ -110,6 +115,11 @@ class SimplePersistence(MutableMapping):
     """
     # Stores values in store[taskname][pluginname][key] format
     class_store = defaultdict(lambda: defaultdict(dict))
+    # Stores json of the values as they are in the database, in the same format. Used to only flush changed values.
+    class_persisted = defaultdict(lambda: defaultdict(dict))
+    # (taskname, pluginname) pairs which have been loaded from the database
+    class_loaded = set()
+    lock = threading.RLock()
 
     def __init__(self, plugin=None):
         self.taskname = None
@@ -117,6 +127,8 @@ class SimplePersistence(MutableMapping):
 
     @property
     def store(self):
+        if (self.taskname, self.plugin) not in self.class_loaded:
+            self.load(self.taskname, self.plugin)
         return self.class_store[self.taskname][self.plugin]
 
     def __setitem__(self, key, value):
@@ -138,32 +150,96 @@ class SimplePersistence(MutableMapping):
         return len(self.store)
 
     @classmethod
-    def load(cls, task=None):
-        """Load all key/values from `task` into memory from database."""
-        with Session() as session:
-            for skv in session.query(SimpleKeyValue).filter(SimpleKeyValue.task == task).all():
-                cls.class_store[task][skv.plugin][skv.key] = skv.value
+    def load(cls, task=None, plugin=None):
+        """
+        Load key/values of `plugin` in `task` into memory from database. All plugins are loaded if `plugin` is not
+        given. Plugins which are already in memory are not loaded again.
+        """
+        with cls.lock:
+            if plugin is not None and (task, plugin) in cls.class_loaded:
+                return
+            with Session() as session:
+                query = session.query(SimpleKeyValue).filter(SimpleKeyValue.task == task)
+                if plugin is not None:
+                    query = query.filter(SimpleKeyValue.plugin == plugin)
+                loaded = set()
+                for skv in query.all():
+                    if (task, skv.plugin) in cls.class_loaded:
+                        continue
+                    loaded.add((task, skv.plugin))
+                    cls.class_store[task][skv.plugin][skv.key] = skv.value
+                    cls.class_persisted[task][skv.plugin][skv.key] = skv._json
+                cls.class_loaded.update(loaded)
+            cls.class_loaded.add((task, plugin))
+
+    @classmethod
+    def reset(cls, forget=None):
+        """
+        Forgets key/values held in memory, and which ones are in the database. They are loaded again when used.
+
+        :param forget: Function telling whether the values of a task name should be forgotten. Defaults to all tasks.
+        """
+        with cls.lock:
+            tasks = set(cls.class_store) | set(cls.class_persisted) | set(task for task, _ in cls.class_loaded)
+            for task in tasks:
+                if forget is None or forget(task):
+                    cls.class_store.pop(task, None)
+                    cls.class_persisted.pop(task, None)
+                    cls.class_loaded.difference_update([loaded for loaded in cls.class_loaded if loaded[0] == task])
 
     @classmethod
     def flush(cls, task=None):
-        """Flush all in memory key/values to database."""
-        log.debug('Flushing simple persistence for task %s to db.' % task)
-        with Session() as session:
-            for pluginname in cls.class_store[task]:
-                for key, value in cls.class_store[task][pluginname].items():
-                    query = (session.query(SimpleKeyValue).
-                             filter(SimpleKeyValue.task == task).
-                             filter(SimpleKeyValue.plugin == pluginname).
-                             filter(SimpleKeyValue.key == key))
+        """Flush in memory key/values which have changed to database."""
+        with cls.lock:
+            changed = {}
+            deleted = set()
+            for pluginname, store in cls.class_store[task].items():
+                persisted = cls.class_persisted[task][pluginname]
+                for key, value in list(store.items()):
                     if value == DELETE:
-                        query.delete()
+                        deleted.add((pluginname, key))
+                        continue
+                    value_json = json.dumps(value, encode_datetime=True)
+                    if persisted.get(key) != value_json:
+                        changed[(pluginname, key)] = value_json
+            if not changed and not deleted:
+                return
+            log.debug('Flushing %s changed and %s deleted simple persistence values for task %s to db.',
+                      len(changed), len(deleted), task)
+            table = SimpleKeyValue.__table__
+            with Session() as session:
+                # Find the existing rows for all changed keys at once
+                existing = {}
+                keys = list(changed) + list(deleted)
+                plugins = list(set(pluginname for pluginname, _ in keys))
+                for chunk in chunked(list(set(key for _, key in keys))):
+                    rows = session.execute(select([table.c.id, table.c.plugin, table.c.key]).where(
+                        and_(table.c.feed == task, table.c.plugin.in_(plugins), table.c.key.in_(chunk))))
+                    for row in rows:
+                        existing.setdefault((row['plugin'], row['key']), []).append(row['id'])
+                updates = []
+                inserts = []
+                for (pluginname, key), value_json in changed.items():
+                    if (pluginname, key) in existing:
+                        updates.extend({'_id': row_id, '_json': newstr(value_json)}
+                                       for row_id in existing[(pluginname, key)])
                     else:
-                        updated = query.update(
-                            {'value': newstr(json.dumps(value, encode_datetime=True))},
-                            synchronize_session=False
-                        )
-                        if not updated:
-                            session.add(SimpleKeyValue(task, pluginname, key, value))
+                        inserts.append({'feed': task, 'plugin': pluginname, 'key': key, 'json': newstr(value_json),
+                                        'added': datetime.now()})
+                delete_ids = [row_id for key in deleted for row_id in existing.get(key, [])]
+                if updates:
+                    session.execute(table.update().where(table.c.id == bindparam('_id')).
+                                    values(json=bindparam('_json')), updates)
+                if inserts:
+                    session.execute(table.insert(), inserts)
+                for chunk in chunked(delete_ids):
+                    session.execute(table.delete().where(table.c.id.in_(chunk)))
+            for (pluginname, key), value_json in changed.items():
+                cls.class_persisted[task][pluginname][key] = value_json
+            for pluginname, key in deleted:
+                cls.class_persisted[task][pluginname].pop(key, None)
+                if cls.class_store[task][pluginname].get(key) == DELETE:
+                    del cls.class_store[task][pluginname][key]
 
 
 class SimpleTaskPersistence(SimplePersistence):
@@ -177,10 +253,10 @@ class SimpleTaskPersistence(SimplePersistence):
         return self.task.current_plugin
 
 
-@event('manager.startup')
-def load_taskless(manager):
-    """Loads all key/value pairs into memory which aren't associated with a specific task."""
-    SimplePersistence.load()
+@event('manager.startup', priority=255)
+def reset_persistence(manager):
+    """Values of a previous manager may come from another database."""
+    SimplePersistence.reset()
 
 
 @event('manager.shutdown')
@@ -188,13 +264,6 @@ def flush_taskless(manager):
     SimplePersistence.flush()
 
 
-@event('task.execute.started')
-def load_task(task):
-    """Loads all key/value pairs into memory before a task starts."""
-    if not SimplePersistence.class_store[task.name]:
-        SimplePersistence.load(task.name)
-
-
 @event('task.execute.completed')
 def flush_task(task):
     """Stores all in memory key/value pairs to database when a task has completed."""
@@ -1,6 +1,6 @@
 from __future__ import unicode_literals, division, absolute_import
 from future.utils import text_to_native_str
-from flexget.utils.tools import native_str_to_text
+from flexget.utils.tools import native_str_to_text, LRUCache
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from past.builtins import basestring
 
@@ -8,16 +8,16 @@ import logging
 import os
 import re
 import locale
-from copy import copy
+from collections import Mapping
 from datetime import datetime, date, time
 
 import jinja2.filters
 from jinja2 import (Environment, StrictUndefined, ChoiceLoader, FileSystemLoader, PackageLoader, Template,
-                    TemplateNotFound, TemplateSyntaxError)
+                    TemplateNotFound, TemplateSyntaxError, Undefined)
 from dateutil import parser as dateutil_parse
 
 from flexget.event import event
-from flexget.utils.lazy_dict import LazyDict
+from flexget.utils.lazy_dict import LazyDict, LazyLookup
 from flexget.utils.pathscrub import pathscrub
 
 log = logging.getLogger('utils.template')
@@ -25,6 +25,10 @@ log = logging.getLogger('utils.template')
 # The environment will be created after the manager has started
 environment = None
 
+# Compiled templates and expressions keyed by their source, the same ones get rendered for every entry
+_template_cache = LRUCache(maxsize=1000)
+_expression_cache = LRUCache(maxsize=1000)
+
 
 class RenderError(Exception):
     """Error raised when there is a problem with jinja rendering."""
@@ -135,10 +139,54 @@ class FlexGetTemplate(Template):
 
     def new_context(self, vars=None, shared=False, locals=None):
         context = super(FlexGetTemplate, self).new_context(vars, shared, locals)
-        context.parent = LazyDict(context.parent)
+        if not isinstance(context.parent, RenderContext):
+            context.parent = LazyDict(context.parent)
         return context
 
 
+class RenderContext(Mapping):
+    """
+    Rendering context made of the fields in `store` (a dict, which may hold lazy fields) with the ones in `overlay`
+    on top of them. Used instead of a copy of all fields when rendering for an entry, lazy fields are only looked up
+    when a template uses them.
+    """
+
+    __slots__ = ('store', 'overlay', 'fallback')
+
+    def __init__(self, store, overlay=None, fallback=None):
+        self.store = store
+        self.overlay = overlay or {}
+        # Template globals, when rendering
+        self.fallback = fallback or {}
+
+    def __getitem__(self, key):
+        if key in self.overlay:
+            return self.overlay[key]
+        if key in self.store:
+            value = self.store[key]
+            if isinstance(value, LazyLookup):
+                return value[key]
+            return value
+        return self.fallback[key]
+
+    def __contains__(self, key):
+        return key in self.overlay or key in self.store or key in self.fallback
+
+    def __iter__(self):
+        seen = set()
+        for mapping in (self.overlay, self.store, self.fallback):
+            for key in mapping:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def with_fallback(self, fallback):
+        return RenderContext(self.store, self.overlay, fallback)
+
+
 @event('manager.initialize')
 def make_environment(manager):
     """Create our environment and add our custom filters"""
@@ -151,6 +199,8 @@ def make_environment(manager):
     for name, filt in list(globals().items()):
         if name.startswith('filter_'):
             environment.filters[name.split('_', 1)[1]] = filt
+    _template_cache.clear()
+    _expression_cache.clear()
 
 
 def list_templates(extensions=None):
@@ -198,16 +248,26 @@ def render(template, context):
     Renders a Template with `context` as its context.
 
     :param template: Template or template string to render.
-    :param context: Context to render the template from.
+    :param context: Context to render the template from, a dict or :class:`RenderContext`.
     :return: The rendered template text.
     """
     if isinstance(template, basestring):
         try:
-            template = environment.from_string(template)
-        except TemplateSyntaxError as e:
-            raise RenderError('Error in template syntax: ' + e.message)
+            template = _template_cache[template]
+        except KeyError:
+            source = template
+            try:
+                template = environment.from_string(source)
+            except TemplateSyntaxError as e:
+                raise RenderError('Error in template syntax: ' + e.message)
+            _template_cache[source] = template
     try:
-        result = template.render(context)
+        if isinstance(context, RenderContext):
+            # Template.render would copy the context to a dict, evaluating every lazy field
+            render_context = template.new_context(context.with_fallback(template.globals), shared=True)
+            result = ''.join(template.root_render_func(render_context))
+        else:
+            result = template.render(context)
     except Exception as e:
         error = RenderError('(%s) %s' % (type(e).__name__, e))
         log.debug('Error during rendering: %s', error)
@@ -219,17 +279,16 @@ def render(template, context):
 def render_from_entry(template_string, entry):
     """Renders a Template or template string with an Entry as its context."""
 
-    # Make a copy of the Entry so we can add some more fields
-    variables = copy(entry.store)
-    variables['now'] = datetime.now()
+    # Some more fields are added on top of the entry ones
+    variables = {'now': datetime.now()}
     # Add task name to variables, usually it's there because metainfo_task plugin, but not always
     if hasattr(entry, 'task') and entry.task is not None:
-        if 'task' not in variables:
+        if 'task' not in entry.store:
             variables['task'] = entry.task.name
         # Since `task` has different meaning between entry and task scope, the `task_name` field is create to be
         # consistent
         variables['task_name'] = entry.task.name
-    return render(template_string, variables)
+    return render(template_string, RenderContext(entry.store, variables))
 
 
 def render_from_task(template, task):
@@ -249,9 +308,20 @@ def evaluate_expression(expression, context):
     Evaluate a jinja `expression` using a given `context` with support for `LazyDict`s (`Entry`s.)
 
     :param str expression:  A jinja expression to evaluate
-    :param context: dictlike, supporting LazyDicts
+    :param context: dictlike, supporting LazyDicts, or a :class:`RenderContext`
     """
-    compiled_expr = environment.compile_expression(expression)
+    try:
+        compiled_expr = _expression_cache[expression]
+    except KeyError:
+        compiled_expr = _expression_cache[expression] = environment.compile_expression(expression)
+    if isinstance(context, RenderContext):
+        # Same as TemplateExpression.__call__, without copying the context to a dict
+        template = compiled_expr._template
+        render_context = template.new_context(context.with_fallback(template.globals), shared=True)
+        for _ in template.root_render_func(render_context):
+            pass
+        result = render_context.vars['result']
+        return None if isinstance(result, Undefined) else result
     # If we have a LazyDict, grab the underlying store. Our environment supports LazyFields directly
     if isinstance(context, LazyDict):
         context = context.store
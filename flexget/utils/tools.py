@@ -2,18 +2,23 @@
 from __future__ import unicode_literals, division, absolute_import
 from builtins import *  # noqa pylint: disable=unused-import, redefined-builtin
 from future.moves.urllib import request
-from future.utils import PY2
+from future.utils import PY2, raise_
 
 import logging
 import ast
+import binascii
 import copy
 import hashlib
 import locale
+import math
 import operator
 import os
 import re
+import sre_constants
+import sre_parse
 import sys
-from collections import MutableMapping, defaultdict
+import threading
+from collections import Counter, MutableMapping, OrderedDict, defaultdict
 from datetime import timedelta, datetime
 from pprint import pformat
 
@@ -381,6 +386,170 @@ class TimedDict(MutableMapping):
             self.__class__.__name__, dict(list(zip(self._store, (v[1] for v in list(self._store.values()))))))
 
 
+class LRUCache(MutableMapping):
+    """
+    Acts like a normal dict, but holds at most `maxsize` keys. When full, the least recently used key is discarded.
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            # Move the key to the end, marking it most recently used
+            value = self._store.pop(key)
+            self._store[key] = value
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._store.pop(key, None)
+            self._store[key] = value
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._store[key]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._store))
+
+    def __len__(self):
+        return len(self._store)
+
+    def __repr__(self):
+        return '%s(maxsize=%s, %r)' % (self.__class__.__name__, self.maxsize, dict(self._store))
+
+
+class BloomFilter(object):
+    """
+    Set-like structure which only answers membership tests, in a fraction of the memory of a set. Values which
+    were added are always reported present, values which were not are reported present with probability of about
+    `error_rate`, as long as no more than `capacity` values are added.
+    """
+
+    def __init__(self, capacity=10000, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.count = 0
+        ln2 = math.log(2)
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / ln2 ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * ln2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value):
+        if not isinstance(value, bytes):
+            value = str(value).encode('utf-8')
+        digest = hashlib.md5(value).digest()
+        # Double hashing, positions are derived from two 64 bit halves of the digest
+        h1 = int(binascii.hexlify(digest[:8]), 16)
+        h2 = int(binascii.hexlify(digest[8:]), 16) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def __len__(self):
+        return self.count
+
+
+def _literal_runs(regexp):
+    """
+    :param regexp: Compiled regexp
+    :return: Lowercase ascii substrings which every match of `regexp` contains. Empty if none could be found.
+    """
+    try:
+        parsed = sre_parse.parse(regexp.pattern, regexp.flags)
+    except Exception:
+        return []
+    runs = []
+    run = []
+
+    def flush():
+        if run:
+            runs.append(''.join(run).lower())
+            del run[:]
+
+    def walk(items):
+        # Only parts matched in sequence are required, anything else ends the current run
+        for op, av in items:
+            if op == sre_constants.LITERAL and av < 128:
+                run.append(chr(av))
+            elif op == sre_constants.SUBPATTERN:
+                walk(av[-1])
+            else:
+                flush()
+
+    walk(parsed)
+    flush()
+    return runs
+
+
+def _trigrams(text):
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+class RegexpMatcher(object):
+    """
+    Finds which of many compiled regexps match a value, in a single pass over the value.
+
+    Each regexp is indexed by a literal substring every match of it contains, under its least common trigram. Only
+    regexps whose literal occurs in the value are searched. Regexps without such literal are always searched, as are
+    all regexps for non ascii values, where case folding of the regexps may differ from :meth:`str.lower`.
+    """
+
+    def __init__(self, regexps):
+        self.regexps = list(regexps)
+        self.literals = {}
+        self.unindexed = []
+        self._index = defaultdict(list)
+        runs = [[run for run in _literal_runs(regexp) if len(run) >= 3] for regexp in self.regexps]
+        counts = Counter(gram for regexp_runs in runs for run in regexp_runs for gram in _trigrams(run))
+        for position, regexp_runs in enumerate(runs):
+            if not regexp_runs:
+                self.unindexed.append(position)
+                continue
+            _, gram, run = min((counts[gram], gram, run) for run in regexp_runs for gram in _trigrams(run))
+            self._index[gram].append(position)
+            self.literals[position] = run
+
+    def candidates(self, value):
+        """:return: Positions of regexps which may match `value`."""
+        lowered = value.lower()
+        try:
+            lowered.encode('ascii')
+        except UnicodeError:
+            return set(range(len(self.regexps)))
+        candidates = set(self.unindexed)
+        for gram in _trigrams(lowered):
+            for position in self._index.get(gram, ()):
+                if self.literals[position] in lowered:
+                    candidates.add(position)
+        return candidates
+
+    def matching(self, values):
+        """
+        :param values: Strings to search
+        :return: Sorted positions of the regexps which match any of `values`.
+        """
+        matched = set()
+        for value in values:
+            for position in self.candidates(value) - matched:
+                if self.regexps[position].search(value):
+                    matched.add(position)
+        return sorted(matched)
+
+
 class BufferQueue(queue.Queue):
     """Used in place of a file-like object to capture text and access it safely from another thread."""
     # Allow access to the Empty error from here
@@ -548,49 +717,118 @@ def group_entries(entries, identifier):
     return grouped_entries
 
 
-def aggregate_inputs(task, inputs):
+def parallel_map(func, items, max_workers=1):
+    """
+    Calls `func` for each of `items` using up to `max_workers` threads. The logging context of the calling thread
+    (task name, captured output) and the plugins it is running for tasks are used in the worker threads, and work they
+    do is accounted in its metrics.
+
+    :param func: Callable taking a single item.
+    :param items: Iterable of items.
+    :param int max_workers: Maximum amount of concurrent calls. With 1 (default) everything is done in calling thread.
+    :return: List of results, in the same order as `items`.
+    :raises: The first exception raised by `func` (in `items` order), items not yet started are skipped after an error.
+    """
+    from flexget import logger
+    from flexget.task import get_plugin_context, use_plugin_context
+    from flexget.utils import metrics
+
+    items = list(items)
+    max_workers = min(max_workers or 1, len(items))
+    if max_workers <= 1:
+        return [func(item) for item in items]
+
+    results = [None] * len(items)
+    errors = [None] * len(items)
+    work = queue.Queue()
+    for index, item in enumerate(items):
+        work.put((index, item))
+    context = logger.get_local_context()
+    plugin_context = get_plugin_context()
+    counters = metrics.current_counters()
+
+    def worker():
+        with logger.use_local_context(context), use_plugin_context(plugin_context), metrics.use_counters(counters):
+            while not any(errors):
+                try:
+                    index, item = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[index] = func(item)
+                except Exception:
+                    errors[index] = sys.exc_info()
+
+    threads = [threading.Thread(target=worker, name='%s_%s' % (threading.current_thread().name, i))
+               for i in range(max_workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for error in errors:
+        if error:
+            raise_(*error)
+    return results
+
+
+def run_inputs(task, items):
+    """
+    Runs input plugins of `items`, (name, config) pairs, up to `max_parallel_inputs` of the task at a time.
+    Returns whether each of them succeeded and what it returned, in the order of `items`.
+    """
     from flexget import plugin
 
+    def run_input(item):
+        input_name, input_config = item
+        input = plugin.get_plugin_by_name(input_name)
+        if input.api_ver == 1:
+            raise plugin.PluginError('Plugin %s does not support API v2' % input_name)
+        method = input.phase_handlers['input']
+        try:
+            return True, method(task, input_config)
+        except plugin.PluginError as e:
+            log.warning('Error during input plugin %s: %s', input_name, e)
+            return False, None
+
+    return parallel_map(run_input, items, max_workers=task.max_parallel_inputs)
+
+
+def aggregate_inputs(task, inputs):
+    items = [i for item in inputs for i in item.items()]
+    results = run_inputs(task, items)
+
     entries = []
     entry_titles = set()
     entry_urls = set()
     entry_locations = set()
-    for item in inputs:
-        for input_name, input_config in item.items():
-            input = plugin.get_plugin_by_name(input_name)
-            if input.api_ver == 1:
-                raise plugin.PluginError('Plugin %s does not support API v2' % input_name)
-            method = input.phase_handlers['input']
-            try:
-                result = method(task, input_config)
-            except plugin.PluginError as e:
-                log.warning('Error during input plugin %s: %s', input_name, e)
-                continue
-
-            if not result:
-                log.warning('Input %s did not return anything', input_name)
-                continue
+    for (input_name, _), (succeeded, result) in zip(items, results):
+        if not succeeded:
+            continue
+        if not result:
+            log.warning('Input %s did not return anything', input_name)
+            continue
 
-            for entry in result:
-                urls = ([entry['url']] if entry.get('url') else []) + entry.get('urls', [])
+        for entry in result:
+            urls = ([entry['url']] if entry.get('url') else []) + entry.get('urls', [])
 
-                if any(url in entry_urls for url in urls):
-                    log.debug('URL for `%s` already in entry list, skipping.', entry['title'])
-                    continue
+            if any(url in entry_urls for url in urls):
+                log.debug('URL for `%s` already in entry list, skipping.', entry['title'])
+                continue
 
-                if entry['title'] in entry_titles:
-                    log.debug('Ignored duplicate title `%s`', entry['title'])  # TODO: should combine?
-                    continue
+            if entry['title'] in entry_titles:
+                log.debug('Ignored duplicate title `%s`', entry['title'])  # TODO: should combine?
+                continue
 
-                if entry.get('location') and entry['location'] in entry_locations:
-                    log.debug('Ignored duplicate location `%s`', entry['location'])  # TODO: should combine?
-                    continue
+            if entry.get('location') and entry['location'] in entry_locations:
+                log.debug('Ignored duplicate location `%s`', entry['location'])  # TODO: should combine?
+                continue
 
-                entries.append(entry)
-                entry_titles.add(entry['title'])
-                entry_urls.update(urls)
-                if entry.get('location'):
-                    entry_locations.add(entry['location'])
+            entries.append(entry)
+            entry_titles.add(entry['title'])
+            entry_urls.update(urls)
+            if entry.get('location'):
+                entry_locations.add(entry['location'])
 
     return entries
 